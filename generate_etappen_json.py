@@ -2,10 +2,12 @@
 import argparse
 import json
 import logging
+import math
 import os
 from pathlib import Path
 from typing import List, Dict, Any, Tuple
 import re
+from datetime import datetime, timedelta
 
 import gpxpy
 from geopy.distance import geodesic
@@ -39,57 +41,170 @@ def berechne_distanz(p1, p2):
     # Erwartet Tupel (lat, lon, ele)
     return geodesic((p1[0], p1[1]), (p2[0], p2[1])).kilometers
 
-def finde_hochpunkte_und_zwischenpunkte(punkte, min_abstand_start=1.0, min_abstand_ziel=1.0, min_abstand_punkte=5.0, max_luecke=8.0):
+# Gehzeit nach DIN 33466: 4 km/h in der Ebene, 300 Hm/h Aufstieg, 500 Hm/h Abstieg
+GEHGESCHWINDIGKEIT_KMH = 4.0
+AUFSTIEG_HM_PRO_H = 300.0
+ABSTIEG_HM_PRO_H = 500.0
+
+def berechne_gehzeit(distanz_km, aufstieg_m, abstieg_m):
+    """Gehzeit in Stunden: größerer Anteil plus halber kleinerer Anteil (DIN 33466)."""
+    horizontal = distanz_km / GEHGESCHWINDIGKEIT_KMH
+    vertikal = aufstieg_m / AUFSTIEG_HM_PRO_H + abstieg_m / ABSTIEG_HM_PRO_H
+    return max(horizontal, vertikal) + min(horizontal, vertikal) / 2
+
+def berechne_gehzeiten(punkte):
+    """
+    Kumulierte Gehzeit (Stunden ab Start) für jeden Trackpunkt, aus Distanz
+    sowie Auf- und Abstieg seit dem Start.
+    """
+    if not punkte:
+        return []
+    gehzeiten = [0.0]
+    distanz = aufstieg = abstieg = 0.0
+    for vorher, p in zip(punkte, punkte[1:]):
+        distanz += berechne_distanz(vorher, p)
+        diff = p[2] - vorher[2]
+        if diff > 0:
+            aufstieg += diff
+        else:
+            abstieg -= diff
+        gehzeiten.append(berechne_gehzeit(distanz, aufstieg, abstieg))
+    return gehzeiten
+
+def ordne_gehzeiten_zu(punkte, gehzeiten, auswahl):
+    """
+    Gehzeit je ausgewähltem Punkt. Eingefügte Mittelpunkte liegen nicht auf
+    dem Track und erhalten den Mittelwert ihrer Nachbarn.
+    """
+    index = {p: gehzeiten[i] for i, p in reversed(list(enumerate(punkte)))}
+    zeiten = [index.get(p) for p in auswahl]
+    for i, zeit in enumerate(zeiten):
+        if zeit is None:
+            vorher = zeiten[i - 1] if i > 0 else 0.0
+            nachher = next((z for z in zeiten[i + 1:] if z is not None), vorher)
+            zeiten[i] = (vorher + nachher) / 2
+    return zeiten
+
+# Modellzelle in Grad (wie WeatherAPIClient.GRID_RESOLUTION) und geforderte Abdeckung in km
+GITTER_AUFLOESUNG = 0.025
+ABDECKUNG_KM = 2.0
+
+def gitterzelle(p, aufloesung=GITTER_AUFLOESUNG):
+    """Schlüssel der Modellzelle eines Punkts (lat, lon, ele)"""
+    return (math.floor(p[0] / aufloesung), math.floor(p[1] / aufloesung))
+
+def kilometerindizes(punkte):
+    """Indizes der Trackpunkte an jedem vollen Kilometer (inkl. Start und Ziel)"""
+    if not punkte:
+        return []
+    marken = [0]
+    distanz = 0.0
+    naechste = 1.0
+    for i in range(1, len(punkte)):
+        distanz += berechne_distanz(punkte[i - 1], punkte[i])
+        if distanz >= naechste:
+            marken.append(i)
+            naechste = math.floor(distanz) + 1.0
+    if marken[-1] != len(punkte) - 1:
+        marken.append(len(punkte) - 1)
+    return marken
+
+def kilometerpunkte(punkte):
+    """Trackpunkte an jedem vollen Kilometer (inkl. Start und Ziel)"""
+    return [punkte[i] for i in kilometerindizes(punkte)]
+
+def waehle_wetterpunkte(punkte, aufloesung=GITTER_AUFLOESUNG, abdeckung_km=ABDECKUNG_KM):
+    """
+    Wählt möglichst wenige Modellzellen (Greedy-Set-Cover), sodass jeder
+    Trackkilometer höchstens abdeckung_km von einem gewählten Punkt entfernt
+    ist. Start, Ziel (Nachttemperatur an der Hütte) und der höchste Punkt sind
+    immer dabei. Jede weitere Zelle wird durch ihren höchsten Trackpunkt
+    vertreten; ein Kilometer, den kein Vertreter abdeckt, wird durch seinen
+    eigenen Trackpunkt abgedeckt.
+    
+    Args:
+        punkte: Trackpunkte als Tupel (lat, lon, ele)
+        aufloesung: Zellgröße in Grad
+        abdeckung_km: Maximale Entfernung eines Trackkilometers zum nächsten Punkt
+        
+    Returns:
+        Ausgewählte Trackpunkte in Routenreihenfolge
+    """
     if len(punkte) < 2:
-        return punkte
-    start = punkte[0]
-    ziel = punkte[-1]
-    result = [start]
-    # Hochpunkte: nach Höhe sortiert, mind. 1km nach Start und vor Ziel
-    zwischenkandidaten = [p for p in punkte[1:-1]
-                         if berechne_distanz(start, p) >= min_abstand_start and berechne_distanz(p, ziel) >= min_abstand_ziel]
-    hochpunkte = sorted(zwischenkandidaten, key=lambda p: p[2], reverse=True)
-    # Füge Hochpunkte ein, wenn sie mind. min_abstand_punkte voneinander entfernt sind
-    ausgewaehlt = []
-    for hp in hochpunkte:
-        if all(berechne_distanz(hp, p) >= min_abstand_punkte for p in ausgewaehlt):
-            ausgewaehlt.append(hp)
-    # Sortiere nach Reihenfolge auf der Route
-    ausgewaehlt = sorted(ausgewaehlt, key=lambda p: punkte.index(p))
-    result.extend(ausgewaehlt)
-    # Prüfe auf große Lücken (>max_luecke km) und füge ggf. Mittelpunkt ein
-    alle_punkte = result + [ziel]
-    final = [alle_punkte[0]]
-    for i in range(1, len(alle_punkte)):
-        dist = berechne_distanz(alle_punkte[i-1], alle_punkte[i])
-        if dist > max_luecke:
-            # Füge Mittelpunkt ein
-            mid_lat = (alle_punkte[i-1][0] + alle_punkte[i][0]) / 2
-            mid_lon = (alle_punkte[i-1][1] + alle_punkte[i][1]) / 2
-            mid_ele = (alle_punkte[i-1][2] + alle_punkte[i][2]) / 2
-            final.append((mid_lat, mid_lon, mid_ele))
-        final.append(alle_punkte[i])
-    # Entferne doppelte Punkte (nach Koordinaten)
-    unique = []
-    seen = set()
-    for p in final:
-        key = (round(p[0], 6), round(p[1], 6))
-        if key not in seen:
-            unique.append(p)
-            seen.add(key)
-    return unique
-
-def konvertiere_gpx_zu_json(input_dir, output_file):
+        return list(punkte)
+    # Vertreter je Zelle: höchster Trackpunkt, bei Gleichstand der erste
+    vertreter = {}
+    for i, p in enumerate(punkte):
+        zelle = gitterzelle(p, aufloesung)
+        if zelle not in vertreter or p[2] > punkte[vertreter[zelle]][2]:
+            vertreter[zelle] = i
+    marken = kilometerindizes(punkte)
+
+    def abdeckung(i):
+        """Von Trackpunkt i abgedeckte Kilometer"""
+        return {k for k, m in enumerate(marken) if berechne_distanz(punkte[i], punkte[m]) <= abdeckung_km}
+
+    abgedeckt = {zelle: abdeckung(i) for zelle, i in vertreter.items()}
+    hoechster = max(range(len(punkte)), key=lambda i: punkte[i][2])
+    gewaehlt = {0, len(punkte) - 1, hoechster}
+    offen = set(range(len(marken)))
+    for i in gewaehlt:
+        offen -= abdeckung(i)
+    zellen = {gitterzelle(punkte[hoechster], aufloesung)}
+    while offen:
+        # Meiste neu abgedeckte Kilometer, bei Gleichstand die höhere Zelle
+        zelle = max(
+            (z for z in abgedeckt if z not in zellen),
+            key=lambda z: (len(abgedeckt[z] & offen), punkte[vertreter[z]][2]),
+            default=None
+        )
+        if zelle is None or not abgedeckt[zelle] & offen:
+            # Kein Vertreter liegt nah genug: Trackpunkt des Kilometers selbst nehmen
+            i = marken[min(offen)]
+            gewaehlt.add(i)
+            offen -= abdeckung(i)
+            continue
+        zellen.add(zelle)
+        gewaehlt.add(vertreter[zelle])
+        offen -= abgedeckt[zelle]
+    return [punkte[i] for i in sorted(gewaehlt)]
+
+def erzeuge_etappenpunkte(punkte, startzeit="07:00", aufloesung=GITTER_AUFLOESUNG, abdeckung_km=ABDECKUNG_KM):
+    """
+    Wählt die Etappenpunkte aus und ergänzt Höhe und geschätzte Ankunftszeit.
+    
+    Args:
+        punkte: Trackpunkte als Tupel (lat, lon, ele)
+        startzeit: Abmarsch am Startpunkt (HH:MM)
+        aufloesung: Zellgröße des Wettermodells in Grad
+        abdeckung_km: Geforderte Abdeckung je Trackkilometer
+        
+    Returns:
+        Liste von Punkten {"lat", "lon", "ele", "ankunft"}
+    """
+    auswahl = waehle_wetterpunkte(punkte, aufloesung, abdeckung_km)
+    gehzeiten = ordne_gehzeiten_zu(punkte, berechne_gehzeiten(punkte), auswahl)
+    start = datetime.strptime(startzeit, "%H:%M")
+    return [
+        {
+            "lat": p[0],
+            "lon": p[1],
+            "ele": round(p[2]),
+            "ankunft": (start + timedelta(hours=stunden)).strftime("%H:%M")
+        }
+        for p, stunden in zip(auswahl, gehzeiten)
+    ]
+
+def konvertiere_gpx_zu_json(input_dir, output_file, startzeit="07:00", aufloesung=GITTER_AUFLOESUNG, abdeckung_km=ABDECKUNG_KM):
     gpx_files = [f for f in os.listdir(input_dir) if f.lower().endswith('.gpx')]
     gpx_files.sort(key=extrahiere_etappennummer)
     etappen = []
     for fname in gpx_files:
         pfad = os.path.join(input_dir, fname)
         punkte = lade_gpx_punkte(pfad)
-        punkte_auswahl = finde_hochpunkte_und_zwischenpunkte(punkte)
         etappen.append({
             "name": fname,
-            "punkte": [{"lat": p[0], "lon": p[1]} for p in punkte_auswahl]
+            "punkte": erzeuge_etappenpunkte(punkte, startzeit, aufloesung, abdeckung_km)
         })
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(etappen, f, indent=2, ensure_ascii=False)
@@ -111,11 +226,14 @@ def extrahiere_etappennummer(dateiname: str) -> int:
     return 999  # Fallback für Dateien ohne Etappennummer
 
 def main():
-    parser = argparse.ArgumentParser(description="Konvertiert GPX-Etappen zu etappen.json mit Start, Hochpunkten/Zwischenpunkten und Ziel.")
+    parser = argparse.ArgumentParser(description="Konvertiert GPX-Etappen zu etappen.json mit einer minimalen Auswahl an Wetterpunkten je Etappe.")
     parser.add_argument('--input-dir', required=True, help='Verzeichnis mit GPX-Dateien')
     parser.add_argument('--output', default='etappen.json', help='Ziel-Datei')
+    parser.add_argument('--startzeit', default='07:00', help='Abmarschzeit für die Ankunftsschätzung (HH:MM)')
+    parser.add_argument('--aufloesung', type=float, default=GITTER_AUFLOESUNG, help='Zellgröße des Wettermodells in Grad')
+    parser.add_argument('--abdeckung', type=float, default=ABDECKUNG_KM, help='Maximale Entfernung jedes Trackkilometers zu einem Wetterpunkt (km)')
     args = parser.parse_args()
-    konvertiere_gpx_zu_json(args.input_dir, args.output)
+    konvertiere_gpx_zu_json(args.input_dir, args.output, args.startzeit, args.aufloesung, args.abdeckung)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
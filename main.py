@@ -16,17 +16,19 @@ import math
 
 from wetter import wetterdaten, kurztext
 from wetter.config import ConfigError
-from emailversand import sende_email, EmailError
+from emailversand import SMTPSession, sende_email, EmailError
+from src.config import config_service, ConfigFileError
 from src.etappen import lade_heutige_etappe, lade_etappen
 from wetter.fetch import hole_wetterdaten, fetch_weather_data
 from wetter.kurztext import generiere_kurznachricht
 from wetter.delta import delta_warnung
 
-# Debug-Ausgaben für .env-Ladung
-print("Aktuelles Arbeitsverzeichnis:", os.getcwd())
-print("Suche .env-Datei in:", os.path.join(os.getcwd(), '.env'))
-load_dotenv()
-print("GMAIL_APP_PW vorhanden:", bool(os.getenv("GMAIL_APP_PW")))
+def lade_umgebung() -> None:
+    """Lädt die .env-Datei aus dem Arbeitsverzeichnis (beim Start, nicht beim Import)"""
+    logger.debug(f"Aktuelles Arbeitsverzeichnis: {os.getcwd()}")
+    logger.debug(f"Suche .env-Datei in: {os.path.join(os.getcwd(), '.env')}")
+    load_dotenv()
+    logger.debug(f"GMAIL_APP_PW vorhanden: {bool(os.getenv('GMAIL_APP_PW'))}")
 
 # Logging konfigurieren
 def setup_logging() -> None:
@@ -84,15 +86,11 @@ def parse_args() -> argparse.Namespace:
         sys.exit(1)
 
 def lade_konfiguration() -> Dict[str, Any]:
-    """Lädt die Konfiguration aus der YAML-Datei."""
+    """Lädt die Konfiguration aus der YAML-Datei (prozessweit gecacht)."""
     try:
-        with open('config.yaml', 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
-    except FileNotFoundError:
-        logger.error("Konfigurationsdatei config.yaml nicht gefunden")
-        sys.exit(1)
-    except yaml.YAMLError:
-        logger.error("Ungültiges YAML-Format in config.yaml")
+        return config_service('config.yaml').rohdaten()
+    except ConfigFileError as e:
+        logger.error(f"Konfigurationsdatei config.yaml nicht lesbar: {e}")
         sys.exit(1)
     except Exception as e:
         logger.error(f"Fehler beim Laden der Konfiguration: {str(e)}")
@@ -188,17 +186,22 @@ def generiere_wetterbericht(wetterdaten, modus="abend", start_date=None, etappen
         logger.error(f"Fehler beim Generieren des Wetterberichts: {str(e)}")
         return None
 
-def sende_inreach_nachricht(nachricht, inreach_email, smtp_server, smtp_port, benutzername, passwort, smtp_config):
-    """Sendet die InReach-Nachricht."""
+def sende_inreach_nachricht(nachricht, inreach_email, smtp_config, session=None):
+    """
+    Sendet die InReach-Nachricht.
+
+    Args:
+        nachricht: Kurztext für das InReach-Gerät
+        inreach_email: Adresse des InReach-Geräts
+        smtp_config: SMTP-Konfiguration
+        session: Bestehende SMTPSession; ohne wird eine eigene Verbindung geöffnet
+    """
     try:
-        sende_email(
-            nachricht,
-            inreach_email,
-            smtp_server,
-            smtp_port,
-            benutzername,
-            passwort
-        )
+        if session is not None:
+            session.send(nachricht, inreach_email)
+        else:
+            with SMTPSession(smtp_config) as eigene_session:
+                eigene_session.send(nachricht, inreach_email)
         return True
     except Exception as e:
         logger.error(f"Fehler beim Senden der InReach-Nachricht: {str(e)}")
@@ -492,6 +495,7 @@ def main() -> None:
     try:
         # Logging einrichten
         setup_logging()
+        lade_umgebung()
         
         # Argumente parsen
         args = parse_args()
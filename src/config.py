@@ -1,11 +1,13 @@
-import yaml
 import os
 import logging
 import sys
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass, field
 from datetime import date, datetime
-from typing import Dict, Any, Union, Optional
+from types import MappingProxyType
+from typing import Dict, Any, Union, Optional, Tuple
 from pathlib import Path
-from dotenv import load_dotenv
 
 logger = logging.getLogger(__name__)
 
@@ -58,8 +60,15 @@ def validiere_smtp_config(smtp: Dict[str, Any]) -> None:
     for field in required_fields:
         if not smtp.get(field):
             raise ConfigValidationError(f"SMTP-Konfiguration unvollständig ({field} fehlt)")
+        if field == "to" and isinstance(smtp[field], list):
+            # Mehrere Empfänger werden über dieselbe Verbindung beliefert
+            if not all(isinstance(addr, str) and addr for addr in smtp[field]):
+                raise ConfigValidationError("SMTP-Feld 'to' muss ein String oder eine Liste von Strings sein")
+            continue
         if not isinstance(smtp[field], str):
             raise ConfigValidationError(f"SMTP-Feld '{field}' muss ein String sein")
+    if "inreach" in smtp and not isinstance(smtp["inreach"], str):
+        raise ConfigValidationError("SMTP-Feld 'inreach' muss ein String sein")
 
     # Port validieren
     port = smtp.get("port", 587)
@@ -88,37 +97,37 @@ def validiere_umgebungsvariablen() -> None:
             "Bitte erstellen Sie eine .env Datei mit diesen Variablen."
         )
 
-def lade_config(pfad: str = "config.yaml") -> Dict[str, Any]:
+def lese_yaml(pfad: str) -> Dict[str, Any]:
     """
-    Lädt und validiert die Konfiguration.
-    
-    Args:
-        pfad: Pfad zur Konfigurationsdatei
-        
-    Returns:
-        Dictionary mit der validierten Konfiguration
-        
+    Liest die Konfigurationsdatei ohne Validierung.
+
     Raises:
-        ConfigError: Bei Konfigurationsfehlern
+        ConfigFileError: Wenn die Datei fehlt oder kein gültiges YAML ist
     """
-    # Lade .env-Datei
-    load_dotenv()
-    
-    # Stelle sicher, dass das Log-Verzeichnis existiert
-    sicherstelle_verzeichnis("logs")
-    
-    # Validiere Umgebungsvariablen
-    validiere_umgebungsvariablen()
-    
-    # Lade Konfigurationsdatei
+    import yaml
+
     try:
-        with open(pfad, "r") as f:
-            config = yaml.safe_load(f)
+        with open(pfad, "r", encoding="utf-8") as f:
+            return yaml.safe_load(f)
     except (yaml.YAMLError, OSError) as e:
         raise ConfigFileError(f"Fehler beim Lesen der Konfigurationsdatei: {str(e)}")
 
+def validiere_config(config: Any) -> Dict[str, Any]:
+    """
+    Validiert eine geparste Konfiguration und wandelt das Startdatum in ein date.
+
+    Args:
+        config: Inhalt der Konfigurationsdatei
+
+    Returns:
+        Validierte Konfiguration
+
+    Raises:
+        ConfigValidationError: Bei ungültiger Konfiguration
+    """
     if not isinstance(config, dict):
         raise ConfigValidationError("Konfiguration muss ein Dictionary sein")
+    config = dict(config)
 
     # Startdatum prüfen
     startdatum_raw = config.get("startdatum")
@@ -138,16 +147,174 @@ def lade_config(pfad: str = "config.yaml") -> Dict[str, Any]:
     # Schwellwerte prüfen
     schwellen = config.get("schwellen", {})
     validiere_schwellenwerte(schwellen)
-    
-    logger.info("Konfiguration erfolgreich geladen und validiert")
     return config
 
-def get_config() -> Dict[str, Any]:
+def _einfrieren(wert: Any) -> Any:
+    """Unveränderliche Kopie: Dictionaries werden zu Read-only-Mappings, Listen zu Tupeln"""
+    if isinstance(wert, dict):
+        return MappingProxyType({k: _einfrieren(v) for k, v in wert.items()})
+    if isinstance(wert, list):
+        return tuple(_einfrieren(v) for v in wert)
+    return wert
+
+@dataclass(frozen=True)
+class Schwellen:
+    """Typisierte Schwellenwerte aus dem Abschnitt schwellen"""
+    regen: float
+    gewitter: float
+    delta_prozent: float
+    hitze: float
+    wind: float
+    regenmenge: Optional[float] = None
+    # Gleitende Fenster, z.B. {"regen_3h": 5, "wind_3h": 20}
+    fenster: Mapping = field(default_factory=lambda: MappingProxyType({}))
+
+    @classmethod
+    def aus_dict(cls, schwellen: Mapping) -> "Schwellen":
+        """Erstellt die Schwellen aus dem (validierten) Konfigurationsabschnitt"""
+        return cls(
+            regen=schwellen["regen"],
+            gewitter=schwellen["gewitter"],
+            delta_prozent=schwellen["delta_prozent"],
+            hitze=schwellen["hitze"],
+            wind=schwellen["wind"],
+            regenmenge=schwellen.get("regenmenge"),
+            fenster=MappingProxyType({
+                k: v for k, v in schwellen.items()
+                if k.startswith(("regen_", "wind_"))
+            })
+        )
+
+@dataclass(frozen=True, eq=False)
+class Konfiguration(Mapping):
+    """
+    Unveränderliche, validierte Konfiguration. Verhält sich wie ein
+    Read-only-Dictionary (config["schwellen"], config.get(...)) und bietet
+    zusätzlich typisierten Zugriff auf die Schwellen.
+    """
+    daten: Mapping
+    schwellen: Schwellen
+
+    @classmethod
+    def aus_dict(cls, config: Dict[str, Any]) -> "Konfiguration":
+        """Erstellt die Konfiguration aus einem validierten Dictionary"""
+        return cls(daten=_einfrieren(config), schwellen=Schwellen.aus_dict(config["schwellen"]))
+
+    def __getitem__(self, key: str) -> Any:
+        return self.daten[key]
+
+    def __iter__(self):
+        return iter(self.daten)
+
+    def __len__(self) -> int:
+        return len(self.daten)
+
+class ConfigService:
+    """
+    Prozessweiter Cache einer Konfigurationsdatei. Die Datei wird nur neu
+    gelesen und validiert, wenn sich ihre Änderungszeit oder Größe ändert;
+    ein lang laufender Prozess übernimmt so Änderungen ohne Neustart.
+    """
+
+    def __init__(self, pfad: str = "config.yaml"):
+        """
+        Args:
+            pfad: Pfad zur Konfigurationsdatei
+        """
+        self.pfad = pfad
+        self._lock = threading.Lock()
+        self._stand: Optional[Tuple[int, int]] = None
+        self._geparst: Any = None
+        self._rohdaten: Optional[Mapping] = None
+        self._konfiguration: Optional[Konfiguration] = None
+
+    def _aktualisiere(self) -> None:
+        """Liest die Datei neu, falls sie sich seit dem letzten Lesen geändert hat"""
+        try:
+            st = os.stat(self.pfad)
+        except OSError as e:
+            raise ConfigFileError(f"Fehler beim Lesen der Konfigurationsdatei: {str(e)}")
+        stand = (st.st_mtime_ns, st.st_size)
+        if stand != self._stand:
+            self._geparst = lese_yaml(self.pfad)
+            self._rohdaten = _einfrieren(self._geparst)
+            self._konfiguration = None
+            self._stand = stand
+            logger.debug(f"Konfiguration {self.pfad} gelesen")
+
+    def rohdaten(self) -> Any:
+        """
+        Geparste, nicht validierte Konfiguration (unveränderlich).
+
+        Raises:
+            ConfigFileError: Wenn die Datei fehlt oder kein gültiges YAML ist
+        """
+        with self._lock:
+            self._aktualisiere()
+            return self._rohdaten
+
+    def get(self) -> Konfiguration:
+        """
+        Validierte Konfiguration; wird nur nach einer Änderung der Datei neu aufgebaut.
+
+        Raises:
+            ConfigError: Bei Konfigurationsfehlern
+        """
+        with self._lock:
+            self._aktualisiere()
+            if self._konfiguration is None:
+                self._konfiguration = Konfiguration.aus_dict(validiere_config(self._geparst))
+                logger.info("Konfiguration erfolgreich geladen und validiert")
+            return self._konfiguration
+
+    def invalidiere(self) -> None:
+        """Erzwingt ein erneutes Lesen beim nächsten Zugriff"""
+        with self._lock:
+            self._stand = None
+
+_services: Dict[str, ConfigService] = {}
+_services_lock = threading.Lock()
+
+def config_service(pfad: str = "config.yaml") -> ConfigService:
+    """Gemeinsamer ConfigService je (absolutem) Dateipfad"""
+    key = os.path.abspath(pfad)
+    with _services_lock:
+        if key not in _services:
+            _services[key] = ConfigService(key)
+        return _services[key]
+
+def lade_config(pfad: str = "config.yaml") -> Konfiguration:
+    """
+    Lädt und validiert die Konfiguration.
+    
+    Args:
+        pfad: Pfad zur Konfigurationsdatei
+        
+    Returns:
+        Validierte, unveränderliche Konfiguration
+        
+    Raises:
+        ConfigError: Bei Konfigurationsfehlern
+    """
+    from dotenv import load_dotenv
+
+    # Lade .env-Datei
+    load_dotenv()
+    
+    # Stelle sicher, dass das Log-Verzeichnis existiert
+    sicherstelle_verzeichnis("logs")
+    
+    # Validiere Umgebungsvariablen
+    validiere_umgebungsvariablen()
+    
+    return config_service(pfad).get()
+
+def get_config() -> Konfiguration:
     """
     Lädt die Konfiguration mit Fehlerbehandlung.
     
     Returns:
-        Dictionary mit der Konfiguration
+        Validierte, unveränderliche Konfiguration
         
     Raises:
         SystemExit: Bei kritischen Fehlern
@@ -161,5 +328,11 @@ def get_config() -> Dict[str, Any]:
         logger.error(f"Unerwarteter Fehler beim Laden der Konfiguration: {str(e)}")
         sys.exit(1)
 
-# Globale Konfiguration
-config = get_config()
\ No newline at end of file
+def __getattr__(name: str) -> Any:
+    """
+    Kompatibilität für `src.config.config`: die Konfiguration wird erst beim
+    Zugriff geladen, nicht beim Import des Moduls.
+    """
+    if name == "config":
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,184 @@
+"""
+Zeitplan für den Dauerbetrieb (python -m src.main --daemon).
+
+Die Jobs entsprechen den Zeilen aus crontab.txt; ein Scheduler führt sie im
+selben Prozess aus, sodass Konfiguration, Etappen, HTTP-Verbindungen und
+vorkompilierte Templates zwischen den Läufen warm bleiben. SIGTERM und SIGINT
+beenden den Scheduler nach dem laufenden Job.
+"""
+import logging
+import signal
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Wertebereiche der fünf Cron-Felder: Minute, Stunde, Tag, Monat, Wochentag (0 = Sonntag)
+CRON_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+# Längste Wartezeit am Stück; danach wird die Uhr erneut gelesen (Zeitumstellung, Standby)
+MAX_WAIT = 60.0
+
+def parse_cron_field(expr: str, low: int, high: int) -> FrozenSet[int]:
+    """
+    Wertemenge eines Cron-Felds (*, */n, a, a-b, a-b/n und Listen davon).
+
+    Raises:
+        ValueError: Bei ungültigen Ausdrücken oder Werten außerhalb des Bereichs
+    """
+    values = set()
+    for part in expr.split(","):
+        spec, _, step = part.partition("/")
+        if spec == "*":
+            start, end = low, high
+        elif "-" in spec:
+            start, end = (int(v) for v in spec.split("-", 1))
+        else:
+            start = end = int(spec)
+        if not (low <= start <= end <= high):
+            raise ValueError(f"Cron-Feld außerhalb von {low}-{high}: {part}")
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return frozenset(values)
+
+# Vorlauf des Vorwärmers vor dem Bericht in Minuten
+PREWARM_LEAD = 5
+
+@dataclass(frozen=True)
+class CronJob:
+    """
+    Ein Eintrag des Zeitplans: Cron-Ausdruck und Aufgabe (Berichtsmodus,
+    "prewarm:<modus>" oder "outbox"). Mit lead läuft der Job so viele Minuten
+    vor jedem Zeitpunkt des Ausdrucks.
+    """
+    expression: str
+    task: str
+    lead: int = 0
+    fields: Sequence[FrozenSet[int]] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        parts = self.expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron-Ausdruck braucht 5 Felder: {self.expression}")
+        object.__setattr__(self, "fields", tuple(
+            parse_cron_field(part, low, high) for part, (low, high) in zip(parts, CRON_RANGES)
+        ))
+
+    def matches(self, when: datetime) -> bool:
+        """Fällt der Job in die Minute von when?"""
+        minute, hour, day, month, weekday = self.fields
+        return (
+            when.minute in minute and when.hour in hour and when.day in day
+            and when.month in month and when.isoweekday() % 7 in weekday
+        )
+
+    def next_after(self, when: datetime) -> datetime:
+        """Erste Ausführung nach when (passende Minute abzüglich lead)"""
+        lead = timedelta(minutes=self.lead)
+        return self._next_match(when + lead) - lead
+
+    def _next_match(self, when: datetime) -> datetime:
+        """Erste passende Minute nach when"""
+        candidate = when.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Höchstens ein Jahr suchen; stundenweise springen, wenn die Stunde nicht passt
+        limit = candidate + timedelta(days=366)
+        while candidate < limit:
+            if candidate.hour not in self.fields[1]:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+                continue
+            if self.matches(candidate):
+                return candidate
+            candidate += timedelta(minutes=1)
+        raise ValueError(f"Cron-Ausdruck trifft nie zu: {self.expression}")
+
+# Entspricht crontab.txt
+SCHEDULE = (
+    CronJob("0 19 * * *", "evening"),
+    CronJob("30 4 * * *", "morning"),
+    CronJob("*/30 09-17 * * *", "day"),
+    CronJob("*/5 * * * *", "outbox"),
+    CronJob("0 19 * * *", "prewarm:evening", lead=PREWARM_LEAD),
+    CronJob("30 4 * * *", "prewarm:morning", lead=PREWARM_LEAD),
+    CronJob("*/30 09-17 * * *", "prewarm:day", lead=PREWARM_LEAD),
+)
+
+class Scheduler:
+    """
+    Führt Jobs zu ihren Zeitpunkten nacheinander im aufrufenden Thread aus.
+    Wie bei Cron werden Zeitpunkte, die während eines langen Jobs verstreichen,
+    nicht nachgeholt; fällige Jobs derselben Minute laufen in Planreihenfolge.
+    """
+
+    def __init__(
+        self,
+        jobs: Sequence[CronJob],
+        handler: Callable[[CronJob], None],
+        clock: Callable[[], datetime] = datetime.now,
+        wait: Optional[Callable[[float], bool]] = None
+    ):
+        """
+        Args:
+            jobs: Zeitplan
+            handler: Führt einen Job aus; Ausnahmen werden protokolliert
+            clock: Aktuelle Zeit (für Tests austauschbar)
+            wait: Wartet höchstens n Sekunden, True bei Stopp (Standard: Stopp-Event)
+        """
+        self.jobs = list(jobs)
+        self.handler = handler
+        self.clock = clock
+        self._stop = threading.Event()
+        self.wait = wait or self._stop.wait
+
+    def stop(self) -> None:
+        """Beendet run_forever() nach dem laufenden Job"""
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def run_forever(self) -> None:
+        """Läuft bis stop() oder SIGTERM/SIGINT"""
+        previous = {sig: signal.getsignal(sig) for sig in (signal.SIGTERM, signal.SIGINT)}
+        for sig in previous:
+            signal.signal(sig, lambda signum, frame: self._on_signal(signum))
+        try:
+            self._loop()
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+
+    def _on_signal(self, signum: int) -> None:
+        logger.info(f"Signal {signal.Signals(signum).name} empfangen, beende nach dem laufenden Job")
+        self.stop()
+
+    def _loop(self) -> None:
+        now = self.clock()
+        due: Dict[int, datetime] = {i: job.next_after(now) for i, job in enumerate(self.jobs)}
+        while not self.stopped:
+            next_time = min(due.values())
+            remaining = (next_time - self.clock()).total_seconds()
+            if remaining > 0:
+                if self.wait(min(remaining, MAX_WAIT)):
+                    break
+                continue
+            now = self.clock()
+            for i, job in enumerate(self.jobs):
+                if due[i] > now or self.stopped:
+                    continue
+                logger.info(f"Starte Job {job.task} ({job.expression})")
+                try:
+                    self.handler(job)
+                except Exception as e:
+                    logger.error(f"Job {job.task} fehlgeschlagen: {e}", exc_info=True)
+                due[i] = job.next_after(max(now, due[i]))
+            # Während der Jobs verstrichene Zeitpunkte überspringen
+            now = self.clock()
+            for i, job in enumerate(self.jobs):
+                if due[i] < now.replace(second=0, microsecond=0):
+                    due[i] = job.next_after(now)
+
+def next_runs(jobs: Sequence[CronJob], when: datetime) -> List[Tuple[datetime, str]]:
+    """(Zeitpunkt, Aufgabe) der nächsten Ausführung je Job, chronologisch"""
+    return sorted((job.next_after(when), job.task) for job in jobs)
@@ -0,0 +1,248 @@
+"""
+Asynchroner E-Mail-Versand für asyncio-Pipelines.
+
+Gegenstück zu src.email_sender.sende_email: AsyncSMTPTransport hält bis zu
+`concurrency` authentifizierte Verbindungen offen und verwendet sie für
+weitere Nachrichten wieder. Jede Nachricht hat ein eigenes Timeout; eine
+hängende Verbindung wird verworfen, ohne die übrigen aufzuhalten. Während
+eine Etappe versendet wird, kann dieselbe Event-Loop bereits die
+Vorhersage der nächsten abrufen:
+
+    async with AsyncSMTPTransport(config["smtp"]) as transport:
+        versand = asyncio.create_task(transport.send_all({to: [text]}))
+        wetter = await asyncio.to_thread(hole_wetterdaten, ...)
+        await versand
+"""
+import asyncio
+import base64
+import logging
+import os
+import re
+import ssl
+from email import policy
+from email.message import EmailMessage
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.email_sender import EmailError, EmailSendError, empfaenger, erstelle_email_message
+
+logger = logging.getLogger(__name__)
+
+# Gleichzeitig offene Verbindungen je Transport
+CONCURRENCY = 2
+
+class SMTPReplyError(EmailSendError):
+    """Unerwartete Antwort des SMTP-Servers"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+class _Connection:
+    """Eine SMTP-Verbindung über asyncio-Streams"""
+
+    def __init__(self, transport: "AsyncSMTPTransport"):
+        self.transport = transport
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def _reply(self) -> Tuple[int, str]:
+        """Liest eine (ggf. mehrzeilige) Antwort"""
+        lines = []
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                raise ConnectionError("Verbindung vom Server getrennt")
+            text = line.decode("utf-8", "replace").rstrip("\r\n")
+            lines.append(text[4:])
+            if len(text) < 4 or text[3] != "-":
+                return int(text[:3]), "\n".join(lines)
+
+    async def _command(self, line: str, *expected: int) -> str:
+        self.writer.write(f"{line}\r\n".encode("utf-8"))
+        await self.writer.drain()
+        code, message = await self._reply()
+        if code not in expected:
+            raise SMTPReplyError(code, message)
+        return message
+
+    async def open(self) -> None:
+        """Verbindet, wechselt ggf. zu TLS und meldet sich an"""
+        t = self.transport
+        context = ssl.create_default_context()
+        self.reader, self.writer = await asyncio.open_connection(
+            t.host, t.port, ssl=context if t.port == 465 else None
+        )
+        code, message = await self._reply()
+        if code != 220:
+            raise SMTPReplyError(code, message)
+        await self._command("EHLO localhost", 250)
+        if t.port != 465 and t.starttls:
+            await self._command("STARTTLS", 220)
+            await self.writer.start_tls(context)
+            await self._command("EHLO localhost", 250)
+        credentials = base64.b64encode(f"\0{t.user}\0{t.password}".encode("utf-8")).decode("ascii")
+        await self._command(f"AUTH PLAIN {credentials}", 235)
+
+    async def send(self, msg: EmailMessage) -> None:
+        """Überträgt eine Nachricht (MAIL, RCPT, DATA)"""
+        await self._command(f"MAIL FROM:<{msg['From']}>", 250)
+        await self._command(f"RCPT TO:<{msg['To']}>", 250, 251)
+        await self._command("DATA", 354)
+        data = msg.as_bytes(policy=policy.SMTP)
+        # Zeilen mit führendem Punkt verdoppeln ihn (RFC 5321, 4.5.2)
+        data = re.sub(rb"(?m)^\.", b"..", data)
+        if not data.endswith(b"\r\n"):
+            data += b"\r\n"
+        self.writer.write(data + b".\r\n")
+        await self.writer.drain()
+        code, message = await self._reply()
+        if code != 250:
+            raise SMTPReplyError(code, message)
+
+    async def quit(self) -> None:
+        """Beendet die Verbindung mit QUIT"""
+        try:
+            await self._command("QUIT", 221)
+        except Exception:
+            pass
+        self.abort()
+
+    def abort(self) -> None:
+        """Schließt die Verbindung ohne QUIT"""
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+class AsyncSMTPTransport:
+    """
+    Versand über wiederverwendete Verbindungen mit begrenzter Parallelität.
+    Nachrichten an denselben Empfänger gehen in Reihenfolge hinaus,
+    verschiedene Empfänger werden parallel beliefert.
+    """
+
+    def __init__(
+        self,
+        smtp_config: dict,
+        password: Optional[str] = None,
+        concurrency: int = CONCURRENCY,
+        timeout: float = 30.0,
+        max_retries: int = 2
+    ):
+        """
+        Args:
+            smtp_config: SMTP-Konfiguration (wie sende_email)
+            password: SMTP-Passwort (Standard: Umgebungsvariable GMAIL_APP_PW)
+            concurrency: Maximale Anzahl gleichzeitig offener Verbindungen
+            timeout: Timeout je Nachricht in Sekunden (inkl. Verbindungsaufbau)
+            max_retries: Maximale Anzahl Versuche je Nachricht
+        """
+        self.host = smtp_config["host"]
+        self.port = smtp_config.get("port", 587)
+        self.user = smtp_config["user"]
+        self.to = empfaenger(smtp_config)
+        self.subject = smtp_config.get("subject", "Wetterwarnung")
+        self.starttls = smtp_config.get("starttls", True)
+        self.password = password or os.getenv("GMAIL_APP_PW")
+        if not self.password:
+            raise EmailError("E-Mail-Passwort nicht in Umgebungsvariablen gefunden (GMAIL_APP_PW)")
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.connects = 0
+        self.sent = 0
+        self._idle: List[_Connection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncSMTPTransport":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _deliver(self, msg: EmailMessage) -> None:
+        """Ein Zustellversuch über eine freie oder neue Verbindung"""
+        reused = bool(self._idle)
+        connection = self._idle.pop() if reused else _Connection(self)
+        try:
+            async def attempt() -> None:
+                if not reused:
+                    await connection.open()
+                    self.connects += 1
+                await connection.send(msg)
+            await asyncio.wait_for(attempt(), self.timeout)
+        except BaseException:
+            connection.abort()
+            raise
+        self._idle.append(connection)
+
+    async def send(self, text: str, to_addr: Optional[str] = None, subject: Optional[str] = None) -> None:
+        """
+        Sendet eine Nachricht.
+
+        Args:
+            text: Der zu sendende Text
+            to_addr: Empfänger (Standard: erster Empfänger aus smtp.to)
+            subject: Betreff (Standard: smtp.subject)
+
+        Raises:
+            EmailConfigError: Bei ungültigen Adressen
+            EmailSendError: Wenn alle Versuche fehlschlagen
+        """
+        to_addr = to_addr or self.to[0]
+        msg = erstelle_email_message(text, subject or self.subject, self.user, to_addr)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        errors: List[str] = []
+        async with self._slots:
+            for attempt in range(self.max_retries):
+                # Jeder Fehlversuch verwirft seine Verbindung, der nächste
+                # Versuch nimmt eine andere oder baut eine neue auf
+                try:
+                    await self._deliver(msg)
+                    self.sent += 1
+                    logger.info(f"E-Mail erfolgreich an {to_addr} gesendet.")
+                    return
+                except asyncio.TimeoutError:
+                    errors.append(f"Timeout nach {self.timeout:g} s")
+                except (OSError, EmailSendError) as e:
+                    errors.append(str(e))
+                logger.error(f"Fehler beim Senden der E-Mail (Versuch {attempt+1}): {errors[-1]}")
+        raise EmailSendError(f"E-Mail konnte nach {self.max_retries} Versuchen nicht gesendet werden: {'; '.join(errors)}")
+
+    async def send_all(self, messages: Dict[str, Sequence[str]]) -> List[Optional[Exception]]:
+        """
+        Sendet Nachrichten an mehrere Empfänger: je Empfänger der Reihe nach,
+        die Empfänger untereinander parallel (höchstens concurrency Verbindungen).
+
+        Args:
+            messages: Nachrichtentexte je Empfänger
+
+        Returns:
+            Je Empfänger None oder der Fehler, an dem seine Zustellung abbrach
+        """
+        async def deliver(to_addr: str, texts: Sequence[str]) -> Optional[Exception]:
+            for text in texts:
+                try:
+                    await self.send(text, to_addr)
+                except EmailError as e:
+                    return e
+            return None
+        return list(await asyncio.gather(*(deliver(to, texts) for to, texts in messages.items())))
+
+    async def close(self) -> None:
+        """Beendet alle offenen Verbindungen"""
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(connection.quit() for connection in idle))
+
+async def sende_email_async(text: str, smtp_config: dict, timeout: float = 30.0) -> None:
+    """
+    Asynchrones Gegenstück zu sende_email: sendet an alle Empfänger aus smtp.to.
+
+    Raises:
+        EmailError: Bei Problemen mit dem E-Mail-Versand
+    """
+    async with AsyncSMTPTransport(smtp_config, timeout=timeout) as transport:
+        errors = await transport.send_all({to_addr: [text] for to_addr in transport.to})
+    failed = [e for e in errors if e is not None]
+    if failed:
+        raise failed[0]
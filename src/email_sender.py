@@ -21,6 +21,28 @@ class EmailSendError(EmailError):
     """Fehler beim Senden der E-Mail"""
     pass
 
+class EmailRejectedError(EmailSendError):
+    """Der Server hat die Nachricht dauerhaft abgelehnt (5xx); ein erneuter Versuch ist zwecklos"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+def dauerhafte_ablehnung(error: Exception) -> Optional[int]:
+    """
+    SMTP-Code, wenn der Server die Nachricht dauerhaft abgelehnt hat (5xx bei
+    Absender, Empfänger oder Daten); sonst None. Eine fehlgeschlagene Anmeldung
+    betrifft jede Nachricht und zählt nicht als Ablehnung der Nachricht.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        return min(codes) if codes and all(500 <= code < 600 for code in codes) else None
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return None
+    if isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600:
+        return error.smtp_code
+    return None
+
 def validiere_email_adresse(email: str) -> bool:
     if not isinstance(email, str):
         return False
@@ -47,6 +69,136 @@ def erstelle_email_message(
     msg.set_content(text)
     return msg
 
+def empfaenger(smtp_config: dict) -> List[str]:
+    """Empfänger aus smtp.to (eine Adresse oder eine Liste)"""
+    to_addr = smtp_config["to"]
+    return [to_addr] if isinstance(to_addr, str) else list(to_addr)
+
+class SMTPSession:
+    """
+    Eine authentifizierte SMTP-Verbindung für alle Nachrichten eines Laufs.
+    Verbindung, STARTTLS und Login erfolgen einmal beim ersten Versand;
+    bricht die Verbindung ab, wird sie beim nächsten Versuch neu aufgebaut.
+    """
+
+    def __init__(
+        self,
+        smtp_config: dict,
+        password: Optional[str] = None,
+        max_retries: int = 3,
+        retry_delay: float = 5.0,
+        timeout: int = 30
+    ):
+        """
+        Args:
+            smtp_config: SMTP-Konfiguration (host, port, user, to, optional
+                subject und starttls)
+            password: SMTP-Passwort (Standard: Umgebungsvariable GMAIL_APP_PW)
+            max_retries: Maximale Anzahl Versuche je Nachricht
+            retry_delay: Wartezeit zwischen Versuchen in Sekunden
+            timeout: Timeout für SMTP-Operationen in Sekunden
+        """
+        self.host = smtp_config["host"]
+        self.port = smtp_config.get("port", 587)
+        self.user = smtp_config["user"]
+        self.to = empfaenger(smtp_config)
+        self.subject = smtp_config.get("subject", "Wetterwarnung")
+        self.starttls = smtp_config.get("starttls", True)
+        self.password = password or os.getenv("GMAIL_APP_PW")
+        if not self.password:
+            raise EmailError("E-Mail-Passwort nicht in Umgebungsvariablen gefunden (GMAIL_APP_PW)")
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.connects = 0
+        self.sent = 0
+        self._smtp: Optional[smtplib.SMTP] = None
+
+    def __enter__(self) -> "SMTPSession":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def connect(self) -> None:
+        """Baut die Verbindung auf und meldet sich an"""
+        if self.port == 465:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                smtp.starttls()
+        try:
+            smtp.login(self.user, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self._smtp = smtp
+        self.connects += 1
+
+    def _drop(self) -> None:
+        """Verwirft eine (vermutlich defekte) Verbindung ohne QUIT"""
+        if self._smtp is not None:
+            try:
+                self._smtp.close()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def close(self) -> None:
+        """Beendet die Sitzung mit QUIT"""
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def send(self, text: str, to_addr: Optional[str] = None, subject: Optional[str] = None) -> None:
+        """
+        Sendet eine Nachricht über die bestehende Verbindung.
+
+        Args:
+            text: Der zu sendende Text
+            to_addr: Empfänger (Standard: erster Empfänger aus smtp.to)
+            subject: Betreff (Standard: smtp.subject)
+
+        Raises:
+            EmailConfigError: Bei ungültigen Adressen
+            EmailRejectedError: Wenn der Server die Nachricht dauerhaft ablehnt
+            EmailSendError: Wenn alle Versuche fehlschlagen
+        """
+        to_addr = to_addr or self.to[0]
+        msg = erstelle_email_message(text, subject or self.subject, self.user, to_addr)
+        errors: List[str] = []
+        attempt = 0
+        reconnected = False
+        while attempt < self.max_retries:
+            reused = self._smtp is not None
+            try:
+                if self._smtp is None:
+                    self.connect()
+                self._smtp.send_message(msg)
+                self.sent += 1
+                logger.info(f"E-Mail erfolgreich an {to_addr} gesendet.")
+                return
+            except Exception as e:
+                logger.error(f"Fehler beim Senden der E-Mail (Versuch {attempt+1}): {str(e)}")
+                errors.append(str(e))
+                self._drop()
+                code = dauerhafte_ablehnung(e)
+                if code is not None:
+                    raise EmailRejectedError(code, f"E-Mail an {to_addr} dauerhaft abgelehnt: {e}")
+                # Eine vom Server geschlossene Verbindung wird einmal sofort neu
+                # aufgebaut, ohne einen Versuch zu verbrauchen
+                if reused and not reconnected and isinstance(e, (smtplib.SMTPServerDisconnected, ConnectionError)):
+                    reconnected = True
+                    continue
+                attempt += 1
+                if attempt < self.max_retries:
+                    time.sleep(self.retry_delay)
+        raise EmailSendError(f"E-Mail konnte nach {self.max_retries} Versuchen nicht gesendet werden: {'; '.join(errors)}")
+
 def sende_email(
     text: str,
     smtp_config: dict,
@@ -54,37 +206,12 @@ def sende_email(
     retry_delay: float = 5.0,
     timeout: int = 30
 ) -> None:
-    host = smtp_config["host"]
-    port = smtp_config.get("port", 587)
-    user = smtp_config["user"]
-    to_addr = smtp_config["to"]
-    subject = smtp_config.get("subject", "Wetterwarnung")
-    password = os.getenv("GMAIL_APP_PW")
-    if not password:
-        raise EmailError("E-Mail-Passwort nicht in Umgebungsvariablen gefunden (GMAIL_APP_PW)")
-    msg = EmailMessage()
-    msg.set_content(text)
-    msg["Subject"] = subject
-    msg["From"] = user
-    msg["To"] = to_addr
-    msg["Date"] = formatdate(localtime=True)
-    use_ssl = port == 465
-    errors: List[str] = []
-    for attempt in range(max_retries):
-        try:
-            if use_ssl:
-                with smtplib.SMTP_SSL(host, port, timeout=timeout) as smtp:
-                    smtp.login(user, password)
-                    smtp.send_message(msg)
-            else:
-                with smtplib.SMTP(host, port, timeout=timeout) as smtp:
-                    smtp.starttls()
-                    smtp.login(user, password)
-                    smtp.send_message(msg)
-            logger.info(f"E-Mail erfolgreich an {to_addr} gesendet.")
-            return
-        except Exception as e:
-            logger.error(f"Fehler beim Senden der E-Mail (Versuch {attempt+1}): {str(e)}")
-            errors.append(str(e))
-            time.sleep(retry_delay)
-    raise EmailError(f"E-Mail konnte nach {max_retries} Versuchen nicht gesendet werden: {'; '.join(errors)}") 
\ No newline at end of file
+    """
+    Sendet eine E-Mail an alle Empfänger aus smtp.to über eine gemeinsame Sitzung.
+
+    Raises:
+        EmailError: Bei Problemen mit dem E-Mail-Versand
+    """
+    with SMTPSession(smtp_config, max_retries=max_retries, retry_delay=retry_delay, timeout=timeout) as session:
+        for to_addr in empfaenger(smtp_config):
+            session.send(text, to_addr)
@@ -1,12 +1,28 @@
 import datetime
 import json
-from typing import Dict, Any, Optional
+import os
+from typing import Dict, Any, Optional, Tuple
+
+# Geparste Etappen je Datei mit (mtime, Größe) beim Einlesen
+_etappen_cache: Dict[str, Tuple[Tuple[int, int], Any]] = {}
 
 
 def lade_etappen(pfad: str = "etappen.json") -> Dict[str, Any]:
-    """Lädt die Etappendaten aus der JSON-Datei."""
+    """
+    Lädt die Etappendaten aus der JSON-Datei. Das Ergebnis wird je Prozess
+    zwischengespeichert und erst nach einer Änderung der Datei neu gelesen;
+    es darf daher nicht verändert werden.
+    """
+    key = os.path.abspath(pfad)
+    stat = os.stat(key)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _etappen_cache.get(key)
+    if cached and cached[0] == version:
+        return cached[1]
     with open(pfad, "r") as f:
-        return json.load(f)
+        etappen = json.load(f)
+    _etappen_cache[key] = (version, etappen)
+    return etappen
 
 
 def lade_heutige_etappe(config: Dict[str, Any]) -> Dict[str, Any]:
@@ -28,4 +44,28 @@ def lade_heutige_etappe(config: Dict[str, Any]) -> Dict[str, Any]:
     if differenz < 0 or differenz >= len(etappen):
         raise ValueError("Kein gültiger Etappentag – liegt außerhalb des definierten Zeitraums.")
 
-    return etappen[differenz]
\ No newline at end of file
+    return etappen[differenz]
+
+
+def berechne_ankunftsfenster(etappe: Dict[str, Any], stunden: float) -> Dict[Tuple[float, float], Tuple[int, int]]:
+    """
+    Zeitfenster um die geschätzte Ankunftszeit je Etappenpunkt.
+    
+    Args:
+        etappe: Etappendaten, Punkte optional mit "ankunft" (HH:MM)
+        stunden: Fensterbreite vor und nach der Ankunft
+        
+    Returns:
+        Dictionary (lat, lon) -> (von, bis) in Minuten seit Mitternacht;
+        Punkte ohne Ankunftszeit fehlen (ganzer Tag)
+    """
+    rand = int(stunden * 60)
+    fenster = {}
+    for punkt in etappe.get("punkte", []):
+        ankunft = punkt.get("ankunft")
+        if not ankunft:
+            continue
+        zeit = datetime.datetime.strptime(ankunft, "%H:%M")
+        minuten = zeit.hour * 60 + zeit.minute
+        fenster[(punkt["lat"], punkt["lon"])] = (max(0, minuten - rand), min(24 * 60 - 1, minuten + rand))
+    return fenster
@@ -2,199 +2,493 @@ import logging
 import sys
 import argparse
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Sequence, Tuple
+import hashlib
 import json
+import os
 
-from src.config import get_config
-from src.etappen import lade_heutige_etappe
+import requests
+
+from src.config import ConfigError, get_config, lade_config
+from src.daemon import SCHEDULE, CronJob, Scheduler, next_runs
+from src.etappen import lade_heutige_etappe, berechne_ankunftsfenster
 from src.weather.api import WeatherAPIClient
+from src.weather.forecast_cache import ForecastCache
+from src.weather.grid import fetch_route_weather, densify_route
+from src.weather.sampling import AdaptiveSampler, ADAPTIVE_STEP_KM, combine
+from src.weather.phased import fetch_coarse_to_fine
+from src.weather.snapshot import ForecastSnapshot, snapshot_path, prune_snapshots
+from src.weather.warning_state import WarningState
+from src.weather.fingerprint import input_fingerprint, FingerprintStore
 from src.weather.aggregator import WeatherAggregator
 from src.weather.models import StageWeather, WeatherData, ReportMode, WeatherPoint
+from src.weather.adapter import create_stage_weather
 from src.report.generator import ReportGenerator
-from src.email_sender import sende_email, EmailError
-
-# Logging konfigurieren
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/hiking-weather-bot.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+from src.email_sender import empfaenger, EmailError
+from src.outbox import Outbox
+from src.run_lock import RunLock
 
 logger = logging.getLogger(__name__)
 
+def setup_logging() -> None:
+    """Logging in logs/hiking-weather-bot.log und auf stdout (beim Start, nicht beim Import)"""
+    os.makedirs('logs', exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('logs/hiking-weather-bot.log'),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
 def hole_wetterdaten(
     api_client: WeatherAPIClient,
     etappe: dict,
     start_date: datetime,
-    end_date: datetime
+    end_date: datetime,
+    gitter: Optional[float] = None,
+    adaptiv: Optional[int] = None,
+    schwellen: Optional[Dict[str, Any]] = None
 ) -> WeatherData:
     """
-    Holt Wetterdaten für eine Etappe.
+    Holt Wetterdaten für eine Etappe. Tragen die Punkte Ankunftszeiten, wird
+    jeder Punkt bewertet (in seinem eigenen Zeitfenster, Punkte in derselben
+    Modellzelle teilen sich eine Anfrage), sonst nur der Startpunkt.
     
     Args:
         api_client: API-Client
         etappe: Etappendaten
         start_date: Startdatum
         end_date: Enddatum
+        gitter: Punktabstand in km; die verdichtete Route wird aus einem grob
+            abgefragten Gitter interpoliert (eine Anfrage)
+        adaptiv: Anfragebudget für Mittelpunkte; die Etappenpunkte werden
+            immer abgefragt, die Route wird nur dort verdichtet, wo
+            benachbarte Punkte voneinander abweichen
+        schwellen: Schwellenwerte für den zweistufigen Abruf (Tageswerte
+            zuerst, Stundenwerte nur nahe einer Schwelle)
         
     Returns:
         WeatherData-Objekt
     """
-    return api_client.get_weather(
-        latitude=etappe["punkte"][0]["lat"],
-        longitude=etappe["punkte"][0]["lon"],
-        elevation=etappe.get("elevation"),
-        start_date=start_date,
-        end_date=end_date
+    punkte = etappe["punkte"]
+    if gitter:
+        return fetch_route_weather(api_client, punkte, start_date, end_date, step_km=gitter)
+    if adaptiv:
+        route = densify_route(punkte, ADAPTIVE_STEP_KM)
+        original = {(punkt["lat"], punkt["lon"]) for punkt in punkte}
+        # Mittelpunkte in bereits geladenen Zellen verwenden deren Daten ohne neue Anfrage
+        cells: Dict[Tuple[Any, ...], WeatherData] = {}
+        sampler = AdaptiveSampler(
+            lambda punkt: api_client.get_weather_for_points([punkt], start_date, end_date, cells=cells),
+            budget=adaptiv,
+            request_key=api_client.request_key
+        )
+        sampled = sampler.sample(route, [i for i, p in enumerate(route) if (p["lat"], p["lon"]) in original])
+        logger.info(f"Adaptive Abtastung: {sampler.requests} Anfragen für {len(route)} Routenpunkte")
+        return combine(sampled)
+    if not any("ankunft" in punkt for punkt in punkte):
+        punkte = punkte[:1]
+        if punkte[0].get("ele") is None and etappe.get("elevation") is not None:
+            punkte = [dict(punkte[0], ele=etappe["elevation"])]
+    if schwellen is not None:
+        return fetch_coarse_to_fine(api_client, punkte, start_date, end_date, schwellen)
+    return api_client.get_weather_for_points(punkte, start_date, end_date)
+
+def hole_stage_weather(
+    api_client: WeatherAPIClient,
+    etappe: dict,
+    start_date: datetime,
+    ensemble: bool = False,
+    models: Optional[List[str]] = None,
+    gitter: Optional[float] = None,
+    adaptiv: Optional[int] = None,
+    schwellen: Optional[Dict[str, Any]] = None
+) -> StageWeather:
+    """
+    Holt die Wetterdaten für heute, morgen und übermorgen mit einer einzigen
+    Anfrage und teilt sie nach Tagen auf.
+    
+    Args:
+        api_client: API-Client
+        etappe: Etappendaten
+        start_date: Beginn des heutigen Tages
+        ensemble: Zusätzlich Ensemble-Vorhersagen für alle Etappenpunkte holen
+        models: Zusätzlich diese Modelle für alle Etappenpunkte vergleichen
+        gitter: Punktabstand in km für die Gitterabfrage (None: aus)
+        adaptiv: Anfragebudget für die adaptive Abtastung (None: aus)
+        schwellen: Schwellenwerte für den zweistufigen Abruf (None: aus)
+        
+    Returns:
+        StageWeather-Objekt
+    """
+    end_date = start_date + timedelta(days=2)
+    data = hole_wetterdaten(api_client, etappe, start_date, end_date, gitter=gitter, adaptiv=adaptiv, schwellen=schwellen)
+    days = data.split_by_day()
+    
+    if ensemble:
+        for punkt in etappe["punkte"]:
+            members = api_client.get_ensemble(punkt["lat"], punkt["lon"], start_date, end_date)
+            for day, day_members in members.split_by_day().items():
+                day_data = days.setdefault(day, WeatherData(points=[]))
+                if day_data.ensemble is None:
+                    day_data.ensemble = []
+                day_data.ensemble.append(day_members)
+    
+    if models:
+        for punkt in etappe["punkte"]:
+            comparison = api_client.get_multi_model(punkt["lat"], punkt["lon"], start_date, end_date, models)
+            for day, day_models in comparison.split_by_day().items():
+                day_data = days.setdefault(day, WeatherData(points=[]))
+                if day_data.models is None:
+                    day_data.models = []
+                day_data.models.append(day_models)
+    
+    def tag(offset: int) -> WeatherData:
+        return days.get((start_date + timedelta(days=offset)).date(), WeatherData(points=[]))
+    
+    return StageWeather(
+        today=tag(0),
+        tomorrow=tag(1),
+        day_after_tomorrow=tag(2)
+    )
+
+def beschraenke_auf_ankunft(
+    weather: StageWeather,
+    fenster: Dict[Tuple[float, float], Tuple[int, int]],
+    mode: ReportMode
+) -> StageWeather:
+    """
+    Beschränkt die Wetterdaten je Punkt auf das Fenster um die Ankunftszeit.
+    Im Abendbericht bleibt der heutige Tag vollständig (Nachttemperatur).
+    
+    Args:
+        weather: Wetterdaten der Etappe
+        fenster: Zeitfenster je Punkt (siehe berechne_ankunftsfenster)
+        mode: Berichtsmodus
+        
+    Returns:
+        StageWeather-Objekt
+    """
+    if not fenster:
+        return weather
+    
+    def restrict(data: Optional[WeatherData]) -> Optional[WeatherData]:
+        return data.restrict_to_windows(fenster) if data is not None else None
+    
+    return StageWeather(
+        today=weather.today if mode == ReportMode.EVENING else restrict(weather.today),
+        tomorrow=restrict(weather.tomorrow),
+        day_after_tomorrow=restrict(weather.day_after_tomorrow)
     )
 
 def parse_args() -> argparse.Namespace:
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description="Wetterwarnung für Wanderungen")
-    parser.add_argument("--modus", choices=["evening", "morning", "day"], required=True,
+    parser.add_argument("--modus", choices=["evening", "morning", "day"],
                        help="Type of weather report (evening, morning, day)")
+    parser.add_argument("--daemon", action="store_true",
+                       help="Dauerbetrieb: Berichte nach dem Zeitplan aus crontab.txt im selben Prozess")
+    parser.add_argument("--prewarm", action="store_true",
+                       help="Nur Vorhersagen für --modus abrufen und zwischenspeichern, kein Bericht")
     parser.add_argument("--dry-run", action="store_true",
                        help="Nur Ausgabe, kein Versand")
     parser.add_argument("--input", help="Pfad zu Testdaten (JSON)")
     parser.add_argument("--inreach", action="store_true",
                        help="Nachricht für InReach kürzen")
+    parser.add_argument("--ensemble", action="store_true",
+                       help="Ensemble-Vorhersage für Überschreitungswahrscheinlichkeiten nutzen")
+    parser.add_argument("--gitter", nargs="?", type=float, const=0.5, metavar="KM",
+                       help="Gitterabfrage mit Interpolation auf die alle KM verdichtete Route")
+    parser.add_argument("--adaptiv", nargs="?", type=int, const=10, metavar="BUDGET",
+                       help="Route adaptiv abtasten, höchstens BUDGET zusätzliche Anfragen")
+    parser.add_argument("--zweistufig", action="store_true",
+                       help="Erst Tageswerte, Stundenwerte nur für Tage nahe einer Schwelle")
+    parser.add_argument("--modelle", nargs="*", metavar="MODELL",
+                       help="Modelle vergleichen (ohne Angabe: ICON, AROME, ECMWF)")
     
     try:
-        return parser.parse_args()
+        args = parser.parse_args()
     except Exception as e:
         logger.error(f"Fehler beim Parsen der Argumente: {str(e)}")
         parser.print_help()
         sys.exit(1)
+    if not args.modus and not args.daemon:
+        parser.error("--modus ist erforderlich (außer mit --daemon)")
+    return args
 
-def create_weather_data(day_data: Dict[str, Any]) -> WeatherData:
-    """Konvertiert die Testdaten in das WeatherData-Modell."""
-    points = []
-    for hour_data in day_data.get("hourly", []):
-        point = WeatherPoint(
-            latitude=hour_data.get("latitude", 0),
-            longitude=hour_data.get("longitude", 0),
-            elevation=hour_data.get("elevation", 0),
-            time=datetime.fromisoformat(hour_data["time"]),
-            temperature=hour_data.get("temperature_2m", 0),
-            feels_like=hour_data.get("apparent_temperature", 0),
-            precipitation=hour_data.get("precipitation_probability", 0),
-            thunderstorm_probability=hour_data.get("thunderstorm_probability", 0),
-            wind_speed=hour_data.get("wind_speed_10m", 0),
-            wind_direction=hour_data.get("wind_direction_10m", 0),
-            cloud_cover=hour_data.get("cloud_cover", 0)
-        )
-        points.append(point)
-    
-    # Extrahiere Zeitpunkte für Regen und Gewitter
-    rain_time_threshold = None
-    rain_time_max = None
-    thunder_time_threshold = None
-    thunder_time_max = None
-    
-    # Finde Zeitpunkt des Maximums für Regen und Gewitter
-    max_rain = 0
-    max_thunder = 0
-    for point in points:
-        if point.precipitation > max_rain:
-            max_rain = point.precipitation
-            rain_time_max = point.time.isoformat()
-        if point.thunderstorm_probability > max_thunder:
-            max_thunder = point.thunderstorm_probability
-            thunder_time_max = point.time.isoformat()
-    
-    # Finde ersten Zeitpunkt über Schwellenwert
-    for point in points:
-        if point.precipitation > 20 and not rain_time_threshold:  # 20% Schwellenwert
-            rain_time_threshold = point.time.isoformat()
-        if point.thunderstorm_probability > 30 and not thunder_time_threshold:  # 30% Schwellenwert
-            thunder_time_threshold = point.time.isoformat()
-    
-    return WeatherData(
-        points=points,
-        rain_time_threshold=rain_time_threshold,
-        rain_time_max=rain_time_max,
-        thunder_time_threshold=thunder_time_threshold,
-        thunder_time_max=thunder_time_max
+def lade_wetter(
+    args: argparse.Namespace,
+    config: Dict[str, Any],
+    etappe: dict,
+    api_client: WeatherAPIClient
+) -> StageWeather:
+    """
+    Ruft die Wetterdaten einer Etappe mit den Abrufoptionen aus args ab.
+    Bericht und Vorwärmer verwenden dieselben Anfragen, damit die Einträge
+    des Vorwärmers im Cache getroffen werden.
+    """
+    today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return hole_stage_weather(
+        api_client, etappe, today_start,
+        ensemble=args.ensemble,
+        gitter=args.gitter,
+        adaptiv=args.adaptiv,
+        schwellen=config["schwellen"] if args.zweistufig else None,
+        models=(args.modelle or list(WeatherAPIClient.DEFAULT_MODELS)) if args.modelle is not None else None
     )
 
+def prewarm(args: argparse.Namespace, config: Dict[str, Any], api_client: Optional[WeatherAPIClient] = None) -> None:
+    """
+    Füllt den Vorhersage-Cache für den nächsten Bericht im Modus args.modus,
+    ohne einen Bericht zu erstellen oder zu senden. Läuft einige Minuten vor
+    dem Bericht, der danach ohne Wartezeit auf die API auskommt und bei einem
+    Ausfall der Verbindung noch minutenaktuelle Daten hat.
+
+    Args:
+        args: Kommandozeilenargumente (Abrufoptionen wie beim Bericht)
+        config: Konfiguration
+        api_client: Client mit Cache (Standard: neuer Client, der immer abruft)
+    """
+    cache = ForecastCache()
+    api_client = api_client or WeatherAPIClient(cache=cache, max_age=0)
+    etappe = lade_heutige_etappe(config)
+    logger.info(f"Wärme Vorhersagen für {args.modus} vor: {etappe['name']}")
+    lade_wetter(args, config, etappe, api_client)
+    removed = cache.prune()
+    if removed:
+        logger.debug(f"{removed} veraltete Cache-Einträge entfernt")
+
+# Optionen, die Abruf oder Text eines Berichts ändern; nur Läufe mit gleichen
+# Werten teilen sich Sperre und Ergebnis
+RUN_OPTIONS = ("inreach", "input", "ensemble", "gitter", "adaptiv", "zweistufig", "modelle")
+
+def run_key(args: argparse.Namespace, stage_name: str) -> str:
+    """
+    Schlüssel der Berichtssperre aus Modus, Etappe und RUN_OPTIONS.
+
+    Args:
+        args: Kommandozeilenargumente
+        stage_name: Name der heutigen Etappe
+
+    Returns:
+        z.B. "evening-3f2a9c01b7d4"
+    """
+    options = {name: getattr(args, name, None) for name in RUN_OPTIONS}
+    raw = json.dumps([stage_name, options], sort_keys=True, default=str)
+    return f"{args.modus}-{hashlib.sha1(raw.encode()).hexdigest()[:12]}"
+
+def run(args: argparse.Namespace, config: Dict[str, Any], api_client: Optional[WeatherAPIClient] = None) -> None:
+    """
+    Ein Berichtslauf: Wetter holen, aggregieren, rendern und in den Postausgang legen.
+    Läuft bereits ein Bericht desselben Modus mit gleicher Etappe und gleichen
+    Optionen (run_key) in einem anderen Prozess, wird auf ihn gewartet und
+    sein Ergebnis übernommen.
+
+    Args:
+        args: Kommandozeilenargumente (modus, dry_run, input, ...)
+        config: Validierte Konfiguration
+        api_client: Wiederverwendeter API-Client (Daemon), sonst ein neuer
+    """
+    if args.dry_run:
+        # Ohne Versand und ohne Zustand: keine Abstimmung mit anderen Läufen nötig
+        run_report(args, config, api_client)
+        return
+    key = run_key(args, lade_heutige_etappe(config)["name"])
+    with RunLock(key) as lock:
+        shared = lock.shared_result()
+        if shared is not None:
+            logger.info(f"Bericht von parallelem Lauf (PID {shared['pid']}) übernommen, kein erneuter Abruf oder Versand")
+            if shared.get("text"):
+                print(shared["text"])
+            return
+        lock.publish({"text": run_report(args, config, api_client)})
+
+def run_report(args: argparse.Namespace, config: Dict[str, Any], api_client: Optional[WeatherAPIClient] = None) -> Optional[str]:
+    """
+    Berichtslauf ohne Sperre (siehe run()).
+
+    Returns:
+        Gesendeter Berichtstext; None, wenn nichts gesendet wurde
+    """
+    mode = ReportMode(args.modus)
+    logger.info(f"Starte im {mode.value}-Modus")
+    etappe = lade_heutige_etappe(config)
+    logger.info(f"Lade Etappe: {etappe['name']}")
+    # Wetterdaten aus Testdatei laden, falls --input gesetzt
+    if args.input:
+        with open(args.input, 'r') as f:
+            testdata = json.load(f)
+        
+        weather = create_stage_weather(testdata)
+    else:
+        # Vom Vorwärmer abgerufene Antworten werden aus dem Cache gelesen
+        weather = lade_wetter(args, config, etappe, api_client or WeatherAPIClient(cache=ForecastCache()))
+    # Nur die Stunden um die geschätzte Ankunft an jedem Punkt bewerten
+    if args.gitter or args.adaptiv:
+        # Fenster auch für die Zwischenpunkte der verdichteten Route
+        step = args.gitter or ADAPTIVE_STEP_KM
+        etappe = dict(etappe, punkte=densify_route(etappe["punkte"], step))
+    fenster = berechne_ankunftsfenster(etappe, config.get("ankunftsfenster", 2))
+    weather = beschraenke_auf_ankunft(weather, fenster, mode)
+    # Unveränderte Eingaben seit dem letzten Lauf: nichts zu tun
+    snapshot = ForecastSnapshot.load(snapshot_path(etappe["name"], datetime.now())) if mode == ReportMode.DAY else None
+    fingerprint = input_fingerprint(
+        etappe["name"], mode, datetime.now().date(), weather, config["schwellen"],
+        extra={
+            "inreach": args.inreach,
+            "warnungen": config.get("warnungen"),
+            "snapshot": snapshot.digests if snapshot else None
+        }
+    )
+    fingerprints = FingerprintStore.load()
+    previous = fingerprints.matches(etappe["name"], mode, fingerprint)
+    if previous and not args.dry_run:
+        logger.info(f"Eingaben unverändert seit {previous['time']}, überspringe Aggregation, Rendering und Versand")
+        return None
+    # Aggregator und Report-Generator initialisieren
+    aggregator = WeatherAggregator(config["schwellen"])
+    report_generator = ReportGenerator(config["schwellen"])
+    # Report generieren
+    if mode == ReportMode.EVENING:
+        report = aggregator.aggregate_evening_report(
+            etappe["name"],
+            datetime.now(),
+            weather
+        )
+    elif mode == ReportMode.MORNING:
+        report = aggregator.aggregate_morning_report(
+            etappe["name"],
+            datetime.now(),
+            weather
+        )
+        if not args.dry_run:
+            # Gemeldete Stundenreihen als Vergleichsbasis für die Tageswarnungen
+            ForecastSnapshot.from_weather(etappe["name"], datetime.now(), weather.today).save(
+                snapshot_path(etappe["name"], datetime.now())
+            )
+            removed = prune_snapshots()
+            if removed:
+                logger.debug(f"{removed} alte Snapshots entfernt")
+    else:  # ReportMode.DAY
+        if snapshot is None:
+            logger.info("Kein Morgen-Snapshot vorhanden, Vergleich gegen die Schwellen")
+        warnungen = config.get("warnungen", {})
+        state = WarningState.load(
+            config["schwellen"],
+            daily_budget=warnungen.get("max_pro_tag", 3),
+            hysteresis=warnungen.get("hysterese_prozent", 10) / 100
+        )
+        report = aggregator.aggregate_day_warning(
+            etappe["name"],
+            datetime.now(),
+            weather,
+            snapshot=snapshot,
+            state=state
+        )
+        if not report:
+            logger.info("Keine Tageswarnung nötig")
+            if not args.dry_run:
+                state.save()
+                fingerprints.record(etappe["name"], mode, fingerprint, None)
+            return None
+    # Report-Text generieren
+    if args.inreach:
+        # Jede Nachricht wird einzeln gesendet und passt in eine inReach-Nachricht
+        messages = report_generator.generate_inreach_messages(report)
+        report.text = "\n".join(messages)
+    else:
+        report.text = report_generator.generate_report(report)
+        messages = [report.text]
+    if args.dry_run:
+        print("\n=== Wetterbericht (nur Ausgabe, keine E-Mail) ===\n")
+        print(report.text)
+        print("\n=== Ende Bericht ===\n")
+    else:
+        print("=== Wetterbericht ===")
+        print(report.text)
+        print("=====================")
+        smtp_config = config["smtp"]
+        # Erst im Postausgang ablegen, dann sofort einen Zustellversuch
+        # über eine Verbindung; Fehlschläge holt der nächste flush() nach
+        outbox = Outbox()
+        for to_addr in empfaenger(smtp_config):
+            for text in messages:
+                outbox.enqueue(text, to_addr)
+        if smtp_config.get("inreach") and not args.inreach:
+            for text in report_generator.generate_inreach_messages(report):
+                outbox.enqueue(text, smtp_config["inreach"])
+        try:
+            delivered = outbox.flush(smtp_config)
+            logger.info(f"{delivered} Nachricht(en) zugestellt")
+        except EmailError as e:
+            logger.error(f"Zustellung verschoben, Nachrichten bleiben im Postausgang: {e}")
+        if mode == ReportMode.DAY:
+            # Erst nach der Ablage im Postausgang als gemeldet festhalten
+            state.save()
+        fingerprints.record(etappe["name"], mode, fingerprint, report.text)
+        logger.info("Wetterbericht an den Postausgang übergeben")
+        return report.text
+    return None
+
+def run_daemon(args: argparse.Namespace, schedule: Sequence[CronJob] = SCHEDULE) -> int:
+    """
+    Dauerbetrieb nach dem Zeitplan aus crontab.txt. HTTP-Sitzung, API-Client,
+    Etappen und Konfiguration bleiben zwischen den Läufen im Speicher; die
+    Konfiguration wird vor jedem Lauf auf Änderungen geprüft. Vor Abend-,
+    Morgen- und Tagesbericht wärmen eigene Jobs den Vorhersage-Cache vor.
+    Nach SIGTERM wird der Postausgang ein letztes Mal zugestellt.
+
+    Returns:
+        Exit-Code
+    """
+    session = requests.Session()
+    cache = ForecastCache()
+    api_client = WeatherAPIClient(session=session, cache=cache)
+    prewarm_client = WeatherAPIClient(session=session, cache=cache, max_age=0)
+    outbox = Outbox()
+
+    def handle(job: CronJob) -> None:
+        try:
+            config = lade_config()
+        except ConfigError as e:
+            logger.error(f"Konfigurationsfehler, überspringe {job.task}: {e}")
+            return
+        if job.task == "outbox":
+            outbox.flush(config["smtp"])
+        elif job.task.startswith("prewarm:"):
+            mode = job.task.partition(":")[2]
+            prewarm(argparse.Namespace(**dict(vars(args), modus=mode, daemon=False)), config, api_client=prewarm_client)
+        else:
+            run(argparse.Namespace(**dict(vars(args), modus=job.task, daemon=False)), config, api_client=api_client)
+
+    scheduler = Scheduler(schedule, handle)
+    for when, task in next_runs(schedule, datetime.now()):
+        logger.info(f"Nächster Lauf {task}: {when:%d.%m. %H:%M}")
+    try:
+        scheduler.run_forever()
+    finally:
+        logger.info("Daemon beendet, stelle Postausgang zu")
+        try:
+            outbox.flush(lade_config()["smtp"])
+        except Exception as e:
+            logger.error(f"Postausgang konnte nicht zugestellt werden: {e}")
+        session.close()
+    return 0
+
 def main():
     """Hauptfunktion"""
+    setup_logging()
     # Kommandozeilenargumente parsen
     args = parse_args()
-    mode = ReportMode(args.modus)
+    if args.daemon:
+        sys.exit(run_daemon(args))
     try:
-        config = get_config()
-        logger.info(f"Starte im {mode.value}-Modus")
-        etappe = lade_heutige_etappe(config)
-        logger.info(f"Lade Etappe: {etappe['name']}")
-        # Wetterdaten aus Testdatei laden, falls --input gesetzt
-        if args.input:
-            with open(args.input, 'r') as f:
-                testdata = json.load(f)
-            
-            weather = StageWeather(
-                today=create_weather_data(testdata.get('today')),
-                tomorrow=create_weather_data(testdata.get('tomorrow')),
-                day_after_tomorrow=create_weather_data(testdata.get('day_after_tomorrow'))
-            )
-        else:
-            # API-Client initialisieren
-            api_client = WeatherAPIClient()
-            now = datetime.now()
-            today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            tomorrow_start = today_start + timedelta(days=1)
-            day_after_start = tomorrow_start + timedelta(days=1)
-            weather = StageWeather(
-                today=hole_wetterdaten(api_client, etappe, today_start, tomorrow_start),
-                tomorrow=hole_wetterdaten(api_client, etappe, tomorrow_start, day_after_start),
-                day_after_tomorrow=hole_wetterdaten(api_client, etappe, day_after_start, day_after_start + timedelta(days=1))
-            )
-        # Aggregator und Report-Generator initialisieren
-        aggregator = WeatherAggregator(config["schwellen"])
-        report_generator = ReportGenerator(config["schwellen"])
-        # Report generieren
-        if mode == ReportMode.EVENING:
-            report = aggregator.aggregate_evening_report(
-                etappe["name"],
-                datetime.now(),
-                weather
-            )
-        elif mode == ReportMode.MORNING:
-            report = aggregator.aggregate_morning_report(
-                etappe["name"],
-                datetime.now(),
-                weather
-            )
-        else:  # ReportMode.DAY
-            report = aggregator.aggregate_day_warning(
-                etappe["name"],
-                datetime.now(),
-                weather
-            )
-            if not report:
-                logger.info("Keine Tageswarnung nötig")
-                return
-        # Report-Text generieren
-        if args.inreach:
-            report.text = report_generator.generate_inreach(report)
+        if args.prewarm:
+            prewarm(args, get_config())
         else:
-            report.text = report_generator.generate_report(report)
-        if args.dry_run:
-            print("\n=== Wetterbericht (nur Ausgabe, keine E-Mail) ===\n")
-            print(report.text)
-            print("\n=== Ende Bericht ===\n")
-        else:
-            print("=== Wetterbericht ===")
-            print(report.text)
-            print("=====================")
-            sende_email(
-                text=report.text,
-                smtp_config=config["smtp"]
-            )
-            logger.info("Wetterbericht erfolgreich gesendet")
+            run(args, get_config())
     except Exception as e:
         logger.error(f"Fehler: {str(e)}", exc_info=True)
         sys.exit(1)
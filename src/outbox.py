@@ -0,0 +1,194 @@
+"""
+Persistenter Postausgang für E-Mails.
+
+Nachrichten werden zuerst atomar als JSON-Datei in data/outbox/ abgelegt und
+danach in Ablagereihenfolge über eine SMTP-Sitzung zugestellt. Schlägt die
+Zustellung fehl, bleibt die Nachricht liegen und wird nach exponentiell
+wachsender Wartezeit erneut versucht; der Lauf selbst wartet nie.
+
+Aufruf (z.B. per Cron alle 5 Minuten):
+    python -m src.outbox
+"""
+import argparse
+import fcntl
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.email_sender import EmailConfigError, EmailRejectedError, SMTPSession
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_DIR = os.path.join("data", "outbox")
+
+# Wartezeit nach dem ersten Fehlversuch und Obergrenze in Sekunden
+BASE_DELAY = 60.0
+MAX_DELAY = 3600.0
+
+_sequence = itertools.count()
+
+class Outbox:
+    """
+    Postausgang in einem Verzeichnis: eine Datei je Nachricht, der Dateiname
+    (Zeitstempel in Nanosekunden) legt die Zustellreihenfolge fest.
+    Dauerhaft unzustellbare Nachrichten (ungültige Adresse) werden nach
+    failed/ verschoben.
+    """
+
+    def __init__(self, path: str = OUTBOX_DIR, base_delay: float = BASE_DELAY, max_delay: float = MAX_DELAY):
+        """
+        Args:
+            path: Verzeichnis des Postausgangs
+            base_delay: Wartezeit nach dem ersten Fehlversuch in Sekunden
+            max_delay: Maximale Wartezeit zwischen zwei Versuchen in Sekunden
+        """
+        self.path = path
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def _write(self, name: str, entry: Dict[str, Any]) -> None:
+        """Schreibt einen Eintrag atomar"""
+        target = os.path.join(self.path, name)
+        tmp = f"{target}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, target)
+
+    def enqueue(self, text: str, to_addr: str, subject: Optional[str] = None) -> str:
+        """
+        Legt eine Nachricht im Postausgang ab.
+
+        Args:
+            text: Nachrichtentext
+            to_addr: Empfänger
+            subject: Betreff (Standard: smtp.subject beim Versand)
+
+        Returns:
+            Dateiname des Eintrags
+        """
+        os.makedirs(self.path, exist_ok=True)
+        now = time.time()
+        name = f"{time.time_ns():020d}-{os.getpid()}-{next(_sequence):04d}.json"
+        self._write(name, {
+            "to": to_addr,
+            "subject": subject,
+            "text": text,
+            "created": now,
+            "attempts": 0,
+            "next_attempt": now,
+            "last_error": None,
+        })
+        return name
+
+    def pending(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(Dateiname, Eintrag) aller wartenden Nachrichten in Zustellreihenfolge"""
+        try:
+            names = sorted(n for n in os.listdir(self.path) if n.endswith(".json"))
+        except FileNotFoundError:
+            return
+        for name in names:
+            try:
+                with open(os.path.join(self.path, name), encoding="utf-8") as f:
+                    yield name, json.load(f)
+            except FileNotFoundError:
+                # Inzwischen von einem anderen Lauf zugestellt
+                continue
+            except (OSError, ValueError) as e:
+                logger.error(f"Postausgang-Eintrag {name} nicht lesbar, verschiebe nach failed/: {e}")
+                self._fail(name)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.pending())
+
+    def _fail(self, name: str) -> None:
+        """Verschiebt einen Eintrag nach failed/"""
+        failed = os.path.join(self.path, "failed")
+        os.makedirs(failed, exist_ok=True)
+        os.replace(os.path.join(self.path, name), os.path.join(failed, name))
+
+    def backoff(self, attempts: int) -> float:
+        """Wartezeit nach attempts Fehlversuchen"""
+        return min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+
+    def flush(self, smtp_config: Dict[str, Any], password: Optional[str] = None, now: Optional[float] = None) -> int:
+        """
+        Stellt fällige Nachrichten in Reihenfolge über eine Sitzung zu. Beim
+        ersten Fehler wird abgebrochen, damit spätere Nachrichten nicht vor
+        früheren ankommen; die fehlgeschlagene Nachricht erhält ihren nächsten
+        Versuchszeitpunkt. Ungültige Adressen und dauerhafte Ablehnungen (5xx)
+        wandern nach failed/. Läuft bereits ein anderer flush(), kehrt der Aufruf
+        sofort zurück.
+
+        Args:
+            smtp_config: SMTP-Konfiguration
+            password: SMTP-Passwort (Standard: Umgebungsvariable GMAIL_APP_PW)
+            now: Aktueller Zeitpunkt (Unix-Zeit, für Tests)
+
+        Returns:
+            Anzahl zugestellter Nachrichten
+        """
+        if not os.path.isdir(self.path):
+            return 0
+        now = time.time() if now is None else now
+        with open(os.path.join(self.path, ".lock"), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                logger.info("Postausgang wird bereits von einem anderen Prozess zugestellt")
+                return 0
+            delivered = 0
+            # Ein Versuch je Nachricht (plus ein sofortiger Neuaufbau einer
+            # getrennten Verbindung); Wiederholungen übernimmt der nächste flush()
+            with SMTPSession(smtp_config, password=password, max_retries=1) as session:
+                for name, entry in self.pending():
+                    if entry["next_attempt"] > now:
+                        logger.info(f"Postausgang: nächster Versuch für {name} in {entry['next_attempt'] - now:.0f} s")
+                        break
+                    try:
+                        session.send(entry["text"], entry["to"], entry.get("subject"))
+                    except (EmailConfigError, EmailRejectedError) as e:
+                        # Dauerhaft unzustellbar: darf spätere Nachrichten nicht blockieren
+                        logger.error(f"Nachricht {name} unzustellbar, verschiebe nach failed/: {e}")
+                        self._fail(name)
+                        continue
+                    except Exception as e:
+                        entry["attempts"] += 1
+                        entry["next_attempt"] = now + self.backoff(entry["attempts"])
+                        entry["last_error"] = str(e)
+                        self._write(name, entry)
+                        logger.warning(
+                            f"Zustellung von {name} fehlgeschlagen (Versuch {entry['attempts']}), "
+                            f"nächster Versuch in {self.backoff(entry['attempts']):.0f} s"
+                        )
+                        break
+                    os.remove(os.path.join(self.path, name))
+                    delivered += 1
+            return delivered
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Wartende E-Mails aus dem Postausgang zustellen")
+    parser.add_argument("--config", default="config.yaml", help="Konfigurationsdatei mit den SMTP-Daten")
+    parser.add_argument("--outbox", default=OUTBOX_DIR, help="Verzeichnis des Postausgangs")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Kommandozeilen-Einstieg; Rückgabe 1, wenn noch Nachrichten warten"""
+    from src.config import lade_config
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    args = parse_args(argv)
+    outbox = Outbox(args.outbox)
+    delivered = outbox.flush(lade_config(args.config)["smtp"])
+    waiting = len(outbox)
+    logger.info(f"{delivered} Nachricht(en) zugestellt, {waiting} wartend")
+    return 1 if waiting else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
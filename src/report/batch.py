@@ -0,0 +1,250 @@
+"""
+Batch-Rendering vieler aufgezeichneter Szenarien in einem Prozess.
+
+Eingabe ist ein Verzeichnis mit JSON-Testdaten (Format wie --input) oder eine
+JSONL-Datei mit einem Szenario pro Zeile ("-" liest von stdin). Für jedes
+Szenario werden die gewünschten Modi und Varianten gerendert und als
+Textblöcke oder JSONL gestreamt.
+
+Aufruf:
+    python -m src.report.batch tests/ --modus evening day --format inreach --jsonl
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from src.weather.adapter import create_stage_weather
+from src.weather.aggregator import WeatherAggregator
+from src.weather.models import ReportMode
+from src.report.generator import ReportGenerator
+
+logger = logging.getLogger(__name__)
+
+# Ausgabevarianten: Langtext (E-Mail) und Kurztext (InReach)
+VARIANTS = ("long", "inreach")
+
+# Szenarien je Arbeitspaket eines Worker-Prozesses
+CHUNK_SIZE = 32
+
+Case = Tuple[str, Dict[str, Any]]
+
+def iter_cases(source: str) -> Iterator[Case]:
+    """
+    Liest Szenarien aus einem Verzeichnis (*.json) oder einer JSONL-Datei.
+
+    Args:
+        source: Verzeichnis, JSONL-Datei oder "-" für stdin
+
+    Returns:
+        Iterator über (ID, Testdaten); die ID ist "id" aus den Daten, sonst
+        Dateiname bzw. Datei:Zeile
+    """
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(source, name), encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict) and "today" in data:
+                yield data.get("id", name), data
+        return
+
+    stream = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    try:
+        for number, line in enumerate(stream, start=1):
+            if line.strip():
+                data = json.loads(line)
+                yield data.get("id", f"{source}:{number}"), data
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def _stage_name(case_id: str, data: Dict[str, Any]) -> str:
+    """Etappenname aus den Testdaten, sonst die Szenario-ID"""
+    etappe = data.get("etappe")
+    if isinstance(etappe, dict) and etappe.get("name"):
+        return etappe["name"]
+    return data.get("stage_name", case_id)
+
+def _report_date(data: Dict[str, Any]) -> datetime:
+    """Berichtsdatum: "date" aus den Testdaten, sonst die erste Stunde von today"""
+    if data.get("date"):
+        return datetime.fromisoformat(data["date"])
+    hours = (data.get("today") or {}).get("hourly") or []
+    if hours:
+        return datetime.fromisoformat(hours[0]["time"])
+    return datetime.now()
+
+class BatchRenderer:
+    """Rendert Szenarien mit einmal erzeugtem Aggregator und Generator"""
+
+    def __init__(
+        self,
+        thresholds: Dict[str, Any],
+        modes: Sequence[ReportMode] = tuple(ReportMode),
+        variants: Sequence[str] = VARIANTS
+    ):
+        """
+        Args:
+            thresholds: Schwellenwerte aus config.yaml
+            modes: Zu rendernde Modi (Tageswarnung = ReportMode.DAY)
+            variants: Ausgabevarianten aus VARIANTS
+        """
+        unknown = set(variants) - set(VARIANTS)
+        if unknown:
+            raise ValueError(f"Unbekannte Variante(n): {', '.join(sorted(unknown))}")
+        self.modes = list(modes)
+        self.variants = list(variants)
+        self.aggregator = WeatherAggregator(thresholds)
+        self.generator = ReportGenerator(thresholds)
+
+    def render(self, case: Case) -> Dict[str, Any]:
+        """
+        Rendert ein Szenario.
+
+        Args:
+            case: (ID, Testdaten)
+
+        Returns:
+            {"id": ..., "<modus>": {"<variante>": Text} oder None, ...};
+            bei Fehlern {"id": ..., "error": Meldung}
+        """
+        case_id, data = case
+        try:
+            reports = self.aggregator.aggregate_all_modes(
+                _stage_name(case_id, data), _report_date(data), create_stage_weather(data)
+            )
+            result: Dict[str, Any] = {"id": case_id}
+            for mode in self.modes:
+                report = reports[mode]
+                if report is None:
+                    # Keine Tageswarnung nötig
+                    result[mode.value] = None
+                    continue
+                texts = {}
+                if "long" in self.variants:
+                    texts["long"] = self.generator.generate_report(report)
+                if "inreach" in self.variants:
+                    texts["inreach"] = self.generator.generate_inreach(report)
+                result[mode.value] = texts
+            return result
+        except Exception as e:
+            logger.warning(f"Szenario {case_id} fehlgeschlagen: {e}")
+            return {"id": case_id, "error": str(e)}
+
+# Renderer der Worker-Prozesse, einmal je Prozess im Initializer erzeugt
+_worker_renderer: Optional[BatchRenderer] = None
+
+def _init_worker(thresholds: Dict[str, Any], modes: Sequence[ReportMode], variants: Sequence[str]) -> None:
+    global _worker_renderer
+    _worker_renderer = BatchRenderer(thresholds, modes, variants)
+
+def _render_in_worker(case: Case) -> Dict[str, Any]:
+    return _worker_renderer.render(case)
+
+def render_batch(
+    cases: Iterable[Case],
+    thresholds: Dict[str, Any],
+    modes: Sequence[ReportMode] = tuple(ReportMode),
+    variants: Sequence[str] = VARIANTS,
+    workers: int = 1,
+    chunk_size: int = CHUNK_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """
+    Rendert viele Szenarien und liefert die Ergebnisse in Eingabereihenfolge.
+    Die Eingabe wird dabei gestreamt, nicht vollständig eingelesen.
+
+    Args:
+        cases: (ID, Testdaten), z.B. aus iter_cases()
+        thresholds: Schwellenwerte aus config.yaml
+        modes: Zu rendernde Modi
+        variants: Ausgabevarianten
+        workers: Anzahl Worker-Prozesse (1: im aktuellen Prozess)
+        chunk_size: Szenarien je Arbeitspaket eines Workers
+
+    Returns:
+        Iterator über die Ergebnisse von BatchRenderer.render()
+    """
+    thresholds = dict(thresholds)
+    modes = list(modes)
+    variants = list(variants)
+    if workers <= 1:
+        renderer = BatchRenderer(thresholds, modes, variants)
+        for case in cases:
+            yield renderer.render(case)
+        return
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(thresholds, modes, variants)) as pool:
+        yield from pool.imap(_render_in_worker, cases, chunksize=chunk_size)
+
+def write_text(results: Iterable[Dict[str, Any]], out: TextIO) -> int:
+    """Schreibt die Ergebnisse als lesbare Textblöcke; gibt die Anzahl Fehler zurück"""
+    errors = 0
+    for result in results:
+        if "error" in result:
+            errors += 1
+            out.write(f"### {result['id']}: FEHLER {result['error']}\n\n")
+            continue
+        for mode, texts in result.items():
+            if mode == "id":
+                continue
+            if texts is None:
+                out.write(f"### {result['id']} [{mode}]: keine Warnung\n\n")
+                continue
+            for variant, text in texts.items():
+                out.write(f"### {result['id']} [{mode}/{variant}]\n{text}\n\n")
+    return errors
+
+def write_jsonl(results: Iterable[Dict[str, Any]], out: TextIO) -> int:
+    """Schreibt ein Ergebnis je Zeile als JSON; gibt die Anzahl Fehler zurück"""
+    errors = 0
+    for result in results:
+        errors += "error" in result
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+    return errors
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Wetterberichte für viele Szenarien rendern")
+    parser.add_argument("source", help="Verzeichnis mit JSON-Testdaten, JSONL-Datei oder - für stdin")
+    parser.add_argument("--modus", nargs="+", choices=[m.value for m in ReportMode],
+                        default=[m.value for m in ReportMode], help="Zu rendernde Modi")
+    parser.add_argument("--format", nargs="+", choices=VARIANTS, default=list(VARIANTS),
+                        help="Ausgabevarianten")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Anzahl Worker-Prozesse (0: alle CPUs)")
+    parser.add_argument("--jsonl", action="store_true", help="Ergebnisse als JSONL ausgeben")
+    parser.add_argument("--output", help="Ausgabedatei (Standard: stdout)")
+    parser.add_argument("--config", default="config.yaml", help="Konfigurationsdatei mit den Schwellen")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Kommandozeilen-Einstieg; Rückgabe 1, wenn ein Szenario fehlschlug"""
+    from src.config import config_service
+
+    args = parse_args(argv)
+    thresholds = config_service(args.config).get()["schwellen"]
+    workers = args.workers or os.cpu_count() or 1
+    results = render_batch(
+        iter_cases(args.source),
+        thresholds,
+        modes=[ReportMode(m) for m in args.modus],
+        variants=args.format,
+        workers=workers
+    )
+    write = write_jsonl if args.jsonl else write_text
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            errors = write(results, out)
+    else:
+        errors = write(results, sys.stdout)
+    if errors:
+        logger.error(f"{errors} Szenario(s) fehlgeschlagen")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,14 @@
 import logging
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import TYPE_CHECKING, Optional, Dict, Any, List
 from src.weather.models import WeatherReport, ReportMode, WeatherData
-import yaml
+from src.report import templates
+from src.report.inreach import InReachPacker
 import os
 
+if TYPE_CHECKING:
+    from src.config import Konfiguration
+
 logger = logging.getLogger(__name__)
 
 class ReportGenerator:
@@ -93,74 +97,8 @@ class ReportGenerator:
         return f"{etappe} | {gewitter} | {regen} | {wind} | {hitze} | {nacht}"
     
     def generate_evening_inreach(self, report: WeatherReport, rain_prob_threshold, rain_prob_time_threshold, rain_amt_threshold, rain_amt_time_threshold, rain_prob_max, rain_prob_time_max, rain_amt_max, rain_amt_time_max, thunder_prob_threshold, thunder_prob_time_threshold, thunder_prob_max, thunder_prob_time_max):
-        etappe = report.stage_name
-        def fmt(val, unit=None):
-            if val is None or (isinstance(val, (float, int)) and val == 0):
-                return "-"
-            return f"{val}{unit}" if unit else str(val)
-        def fmt_time_short(timestr):
-            """Format time as HH only for InReach format"""
-            if not timestr:
-                return None
-            try:
-                # Try to parse as ISO format first
-                return datetime.fromisoformat(timestr).strftime("%H")
-            except Exception:
-                # If that fails, try to extract hours from HH:MM format
-                if ':' in timestr:
-                    return timestr.split(':')[0]
-                # If no colon, try to get first two characters
-                return timestr[:2] if len(timestr) >= 2 else timestr
-        def fmt_val_time(val, time, unit=None):
-            v = fmt(val, unit)
-            if v == "-":
-                return "-"
-            if not time:
-                return v
-            t = fmt_time_short(time)
-            if t is None:
-                return v
-            return f"{v}@{t}"
-        def fmt_risk_with_time(threshold_val, threshold_time, max_val, max_time, unit=None):
-            """Format risk value, showing only one value if threshold equals maximum"""
-            if threshold_val is None and max_val is None:
-                return "-"
-            if threshold_val == max_val and threshold_time == max_time:
-                # Same value and time - show only once
-                return fmt_val_time(threshold_val, threshold_time, unit)
-            else:
-                # Different values or times - show both
-                threshold_str = fmt_val_time(threshold_val, threshold_time, unit)
-                max_str = fmt_val_time(max_val, max_time, unit)
-                if threshold_str == "-" and max_str != "-":
-                    return max_str
-                elif threshold_str != "-" and max_str == "-":
-                    return threshold_str
-                elif threshold_str == "-" and max_str == "-":
-                    return "-"
-                else:
-                    return f"{threshold_str} ({max_str})"
-        
-        # Gewitter
-        gewitter = fmt_risk_with_time(thunder_prob_threshold, thunder_prob_time_threshold, thunder_prob_max, thunder_prob_time_max, '%')
-        
-        # Regen - combine probability and amount
-        rain_prob_str = fmt_risk_with_time(rain_prob_threshold, rain_prob_time_threshold, rain_prob_max, rain_prob_time_max, '%')
-        rain_amt_str = fmt_risk_with_time(rain_amt_threshold, rain_amt_time_threshold, rain_amt_max, rain_amt_time_max, 'mm')
-        
-        if rain_prob_str == "-" and rain_amt_str == "-":
-            regen = "-"
-        elif rain_prob_str == "-":
-            regen = rain_amt_str
-        elif rain_amt_str == "-":
-            regen = rain_prob_str
-        else:
-            regen = f"{rain_prob_str} {rain_amt_str}"
-        
-        wind = fmt(report.max_wind_speed, "km/h")
-        hitze = fmt(report.max_feels_like, "°C")
-        nacht = fmt(report.night_temperature, "°C")
-        return f"{etappe} | Gewitter {gewitter} | Regen {regen} | Wind {wind} | Hitze {hitze} | Nacht {nacht}"
+        values = _inreach_values(report, rain_prob_threshold, rain_prob_time_threshold, rain_amt_threshold, rain_amt_time_threshold, rain_prob_max, rain_prob_time_max, rain_amt_max, rain_amt_time_max, thunder_prob_threshold, thunder_prob_time_threshold, thunder_prob_max, thunder_prob_time_max)
+        return templates.EVENING_INREACH.render(values)
     
     def generate_evening_email_html(self, report: WeatherReport, rain_prob_threshold: Optional[float], rain_prob_time_threshold: Optional[str], rain_amt_threshold: Optional[float], rain_amt_time_threshold: Optional[str], rain_prob_max: Optional[float], rain_prob_time_max: Optional[str], rain_amt_max: Optional[float], rain_amt_time_max: Optional[str], thunder_prob_threshold: Optional[float], thunder_time_threshold: Optional[str], thunder_prob_max: Optional[float], thunder_time_max: Optional[str]) -> str:
         return report.text
@@ -169,140 +107,11 @@ class ReportGenerator:
         return report.text
     
     def generate_morning_report(self, report: WeatherReport) -> str:
-        def fmt(val, unit=None):
-            if val is None or (isinstance(val, (float, int)) and val == 0):
-                return "-"
-            return f"{val}{unit}" if unit else str(val)
-        def fmt_time(timestr):
-            if not timestr:
-                return None
-            try:
-                return datetime.fromisoformat(timestr).strftime("%H:%M")
-            except Exception:
-                return timestr[-5:] if len(timestr) >= 5 else timestr
-        def fmt_val_time(val, time, unit=None):
-            v = fmt(val, unit)
-            t = fmt_time(time)
-            if v == "-":
-                return "-"
-            if t is None:
-                return v
-            return f"{v}@{t}"
-        def fmt_risk_with_time(threshold_val, threshold_time, max_val, max_time, unit=None):
-            """Format risk value, showing only one value if threshold equals maximum"""
-            if threshold_val is None and max_val is None:
-                return "-"
-            if threshold_val == max_val and threshold_time == max_time:
-                # Same value and time - show only once
-                return fmt_val_time(threshold_val, threshold_time, unit)
-            else:
-                # Different values or times - show both
-                threshold_str = fmt_val_time(threshold_val, threshold_time, unit)
-                max_str = fmt_val_time(max_val, max_time, unit)
-                if threshold_str == "-" and max_str != "-":
-                    return max_str
-                elif threshold_str != "-" and max_str == "-":
-                    return threshold_str
-                elif threshold_str == "-" and max_str == "-":
-                    return "-"
-                else:
-                    return f"{threshold_str} ({max_str})"
-        
-        # Regenwahrscheinlichkeit
-        regen_prob = fmt_risk_with_time(report.rain_prob_threshold, report.rain_prob_time_threshold, report.rain_prob_max, report.rain_prob_time_max, "%")
-        # Niederschlagsmenge
-        regen_amt = fmt_risk_with_time(report.rain_amt_threshold, report.rain_amt_time_threshold, report.rain_amt_max, report.rain_amt_time_max, "mm")
-        # Gewitterwahrscheinlichkeit
-        gew = fmt_risk_with_time(report.thunder_prob_threshold, report.thunder_prob_time_threshold, report.thunder_prob_max, report.thunder_prob_time_max, "%")
-        # Wind
-        wind = fmt(report.max_wind_speed, "km/h")
-        # Hitze
-        hitze = fmt(report.max_feels_like, "°C")
-        # Übermorgen Gewitter
-        gew_plus1 = fmt(report.next_day_thunderstorm, "%")
-        lines = [
-            f"Wetterbericht für {report.stage_name} am {report.date.strftime('%d.%m.%Y')}",
-            "",
-            "Risiken für heute:",
-            f"  Regenwahrscheinlichkeit: {regen_prob}",
-            f"  Niederschlagsmenge: {regen_amt}",
-            f"  Gewitterwahrscheinlichkeit: {gew}",
-            f"  Wind: {wind}",
-            f"  Hitze: {hitze}",
-            "",
-            "Gewitterwahrscheinlichkeit für morgen:",
-            f"  {gew_plus1}"
-        ]
-        return "\n".join(lines)
+        return templates.MORNING_LONG.render(vars(report))
     
     def generate_morning_inreach(self, report: WeatherReport, rain_prob_threshold, rain_prob_time_threshold, rain_amt_threshold, rain_amt_time_threshold, rain_prob_max, rain_prob_time_max, rain_amt_max, rain_amt_time_max, thunder_prob_threshold, thunder_prob_time_threshold, thunder_prob_max, thunder_prob_time_max):
-        etappe = report.stage_name
-        def fmt(val, unit=None):
-            if val is None or (isinstance(val, (float, int)) and val == 0):
-                return "-"
-            return f"{val}{unit}" if unit else str(val)
-        def fmt_time_short(timestr):
-            """Format time as HH only for InReach format"""
-            if not timestr:
-                return None
-            try:
-                # Try to parse as ISO format first
-                return datetime.fromisoformat(timestr).strftime("%H")
-            except Exception:
-                # If that fails, try to extract hours from HH:MM format
-                if ':' in timestr:
-                    return timestr.split(':')[0]
-                # If no colon, try to get first two characters
-                return timestr[:2] if len(timestr) >= 2 else timestr
-        def fmt_val_time(val, time, unit=None):
-            v = fmt(val, unit)
-            if v == "-":
-                return "-"
-            if not time:
-                return v
-            t = fmt_time_short(time)
-            if t is None:
-                return v
-            return f"{v}@{t}"
-        def fmt_risk_with_time(threshold_val, threshold_time, max_val, max_time, unit=None):
-            """Format risk value, showing only one value if threshold equals maximum"""
-            if threshold_val is None and max_val is None:
-                return "-"
-            if threshold_val == max_val and threshold_time == max_time:
-                # Same value and time - show only once
-                return fmt_val_time(threshold_val, threshold_time, unit)
-            else:
-                # Different values or times - show both
-                threshold_str = fmt_val_time(threshold_val, threshold_time, unit)
-                max_str = fmt_val_time(max_val, max_time, unit)
-                if threshold_str == "-" and max_str != "-":
-                    return max_str
-                elif threshold_str != "-" and max_str == "-":
-                    return threshold_str
-                elif threshold_str == "-" and max_str == "-":
-                    return "-"
-                else:
-                    return f"{threshold_str} ({max_str})"
-        
-        # Gewitter
-        gewitter = fmt_risk_with_time(thunder_prob_threshold, thunder_prob_time_threshold, thunder_prob_max, thunder_prob_time_max, '%')
-        
-        # Regen - combine probability and amount
-        rain_prob_str = fmt_risk_with_time(rain_prob_threshold, rain_prob_time_threshold, rain_prob_max, rain_prob_time_max, '%')
-        rain_amt_str = fmt_risk_with_time(rain_amt_threshold, rain_amt_time_threshold, rain_amt_max, rain_amt_time_max, 'mm')
-        
-        if rain_prob_str == "-" and rain_amt_str == "-":
-            regen = "-"
-        elif rain_prob_str == "-":
-            regen = rain_amt_str
-        elif rain_amt_str == "-":
-            regen = rain_prob_str
-        else:
-            regen = f"{rain_prob_str} {rain_amt_str}"
-        
-        wind = fmt(report.max_wind_speed, "km/h")
-        hitze = fmt(report.max_feels_like, "°C")
-        return f"{etappe} | Gewitter {gewitter} | Regen {regen} | Wind {wind} | Hitze {hitze}"
+        values = _inreach_values(report, rain_prob_threshold, rain_prob_time_threshold, rain_amt_threshold, rain_amt_time_threshold, rain_prob_max, rain_prob_time_max, rain_amt_max, rain_amt_time_max, thunder_prob_threshold, thunder_prob_time_threshold, thunder_prob_max, thunder_prob_time_max)
+        return templates.MORNING_INREACH.render(values)
     
     def generate_morning_email_html(self, report: WeatherReport, rain_prob_threshold: Optional[float], rain_prob_time_threshold: Optional[str], rain_amt_threshold: Optional[float], rain_amt_time_threshold: Optional[str], rain_prob_max: Optional[float], rain_prob_time_max: Optional[str], rain_amt_max: Optional[float], rain_amt_time_max: Optional[str], thunder_prob_threshold: Optional[float], thunder_time_threshold: Optional[str], thunder_prob_max: Optional[float], thunder_time_max: Optional[str]) -> str:
         return report.text
@@ -320,73 +129,8 @@ class ReportGenerator:
         return f"{etappe} | {gewitter} | {regen} | {wind} | {hitze}"
     
     def generate_day_inreach(self, report: WeatherReport, rain_prob_threshold, rain_prob_time_threshold, rain_amt_threshold, rain_amt_time_threshold, rain_prob_max, rain_prob_time_max, rain_amt_max, rain_amt_time_max, thunder_prob_threshold, thunder_prob_time_threshold, thunder_prob_max, thunder_prob_time_max):
-        etappe = report.stage_name
-        def fmt(val, unit=None):
-            if val is None or (isinstance(val, (float, int)) and val == 0):
-                return "-"
-            return f"{val}{unit}" if unit else str(val)
-        def fmt_time_short(timestr):
-            """Format time as HH only for InReach format"""
-            if not timestr:
-                return None
-            try:
-                # Try to parse as ISO format first
-                return datetime.fromisoformat(timestr).strftime("%H")
-            except Exception:
-                # If that fails, try to extract hours from HH:MM format
-                if ':' in timestr:
-                    return timestr.split(':')[0]
-                # If no colon, try to get first two characters
-                return timestr[:2] if len(timestr) >= 2 else timestr
-        def fmt_val_time(val, time, unit=None):
-            v = fmt(val, unit)
-            if v == "-":
-                return "-"
-            if not time:
-                return v
-            t = fmt_time_short(time)
-            if t is None:
-                return v
-            return f"{v}@{t}"
-        def fmt_risk_with_time(threshold_val, threshold_time, max_val, max_time, unit=None):
-            """Format risk value, showing only one value if threshold equals maximum"""
-            if threshold_val is None and max_val is None:
-                return "-"
-            if threshold_val == max_val and threshold_time == max_time:
-                # Same value and time - show only once
-                return fmt_val_time(threshold_val, threshold_time, unit)
-            else:
-                # Different values or times - show both
-                threshold_str = fmt_val_time(threshold_val, threshold_time, unit)
-                max_str = fmt_val_time(max_val, max_time, unit)
-                if threshold_str == "-" and max_str != "-":
-                    return max_str
-                elif threshold_str != "-" and max_str == "-":
-                    return threshold_str
-                elif threshold_str == "-" and max_str == "-":
-                    return "-"
-                else:
-                    return f"{threshold_str} ({max_str})"
-        
-        # Gewitter
-        gewitter = fmt_risk_with_time(thunder_prob_threshold, thunder_prob_time_threshold, thunder_prob_max, thunder_prob_time_max, '%')
-        
-        # Regen - combine probability and amount
-        rain_prob_str = fmt_risk_with_time(rain_prob_threshold, rain_prob_time_threshold, rain_prob_max, rain_prob_time_max, '%')
-        rain_amt_str = fmt_risk_with_time(rain_amt_threshold, rain_amt_time_threshold, rain_amt_max, rain_amt_time_max, 'mm')
-        
-        if rain_prob_str == "-" and rain_amt_str == "-":
-            regen = "-"
-        elif rain_prob_str == "-":
-            regen = rain_amt_str
-        elif rain_amt_str == "-":
-            regen = rain_prob_str
-        else:
-            regen = f"{rain_prob_str} {rain_amt_str}"
-        
-        wind = fmt(report.max_wind_speed, "km/h")
-        hitze = fmt(report.max_feels_like, "°C")
-        return f"{etappe} | Gewitter {gewitter} | Regen {regen} | Wind {wind} | Hitze {hitze}"
+        values = _inreach_values(report, rain_prob_threshold, rain_prob_time_threshold, rain_amt_threshold, rain_amt_time_threshold, rain_prob_max, rain_prob_time_max, rain_amt_max, rain_amt_time_max, thunder_prob_threshold, thunder_prob_time_threshold, thunder_prob_max, thunder_prob_time_max)
+        return templates.DAY_INREACH.render(values)
     
     def generate_day_email_html(self, report: WeatherReport, rain_prob_threshold: Optional[float], rain_prob_time_threshold: Optional[str], rain_amt_threshold: Optional[float], rain_amt_time_threshold: Optional[str], rain_prob_max: Optional[float], rain_prob_time_max: Optional[str], rain_amt_max: Optional[float], rain_amt_time_max: Optional[str], thunder_prob_threshold: Optional[float], thunder_time_threshold: Optional[str], thunder_prob_max: Optional[float], thunder_time_max: Optional[str]) -> str:
         return report.text
@@ -395,76 +139,7 @@ class ReportGenerator:
         return report.text
     
     def generate_evening_report_long(self, report: WeatherReport) -> str:
-        def fmt(val, unit=None):
-            if val is None or (isinstance(val, (float, int)) and val == 0):
-                return "-"
-            return f"{val}{unit}" if unit else str(val)
-        def fmt_time(timestr):
-            if not timestr:
-                return None
-            try:
-                return datetime.fromisoformat(timestr).strftime("%H:%M")
-            except Exception:
-                return timestr[-5:] if len(timestr) >= 5 else timestr
-        def fmt_val_time(val, time, unit=None):
-            v = fmt(val, unit)
-            t = fmt_time(time)
-            if v == "-":
-                return "-"
-            if t is None:
-                return v
-            return f"{v}@{t}"
-        def fmt_risk_with_time(threshold_val, threshold_time, max_val, max_time, unit=None):
-            """Format risk value, showing only one value if threshold equals maximum"""
-            if threshold_val is None and max_val is None:
-                return "-"
-            if threshold_val == max_val and threshold_time == max_time:
-                # Same value and time - show only once
-                return fmt_val_time(threshold_val, threshold_time, unit)
-            else:
-                # Different values or times - show both
-                threshold_str = fmt_val_time(threshold_val, threshold_time, unit)
-                max_str = fmt_val_time(max_val, max_time, unit)
-                if threshold_str == "-" and max_str != "-":
-                    return max_str
-                elif threshold_str != "-" and max_str == "-":
-                    return threshold_str
-                elif threshold_str == "-" and max_str == "-":
-                    return "-"
-                else:
-                    return f"{threshold_str} ({max_str})"
-        
-        # Regenwahrscheinlichkeit
-        regen_prob = fmt_risk_with_time(report.rain_prob_threshold, report.rain_prob_time_threshold, report.rain_prob_max, report.rain_prob_time_max, "%")
-        # Niederschlagsmenge
-        regen_amt = fmt_risk_with_time(report.rain_amt_threshold, report.rain_amt_time_threshold, report.rain_amt_max, report.rain_amt_time_max, "mm")
-        # Gewitterwahrscheinlichkeit
-        gew = fmt_risk_with_time(report.thunder_prob_threshold, report.thunder_prob_time_threshold, report.thunder_prob_max, report.thunder_prob_time_max, "%")
-        # Wind
-        wind = fmt(report.max_wind_speed, "km/h")
-        # Hitze
-        hitze = fmt(report.max_feels_like, "°C")
-        # Nacht
-        nacht = fmt(report.night_temperature, "°C")
-        # Übermorgen Gewitter
-        gew_plus1 = fmt(report.next_day_thunderstorm, "%")
-        lines = [
-            f"Wetterbericht für {report.stage_name} am {report.date.strftime('%d.%m.%Y')}",
-            "",
-            "Nachttemperatur:",
-            f"  {nacht}",
-            "",
-            "Risiken für morgen:",
-            f"  Regenwahrscheinlichkeit: {regen_prob}",
-            f"  Niederschlagsmenge: {regen_amt}",
-            f"  Gewitterwahrscheinlichkeit: {gew}",
-            f"  Wind: {wind}",
-            f"  Hitze: {hitze}",
-            "",
-            "Gewitterwahrscheinlichkeit für übermorgen:",
-            f"  {gew_plus1}"
-        ]
-        return "\n".join(lines)
+        return templates.EVENING_LONG.render(vars(report))
 
     def generate_report(self, report: WeatherReport) -> str:
         """
@@ -473,11 +148,58 @@ class ReportGenerator:
         ansonsten das ausführliche Langtext-Format.
         """
         if report.mode == ReportMode.EVENING:
-            return self.generate_evening_report_long(report)
+            text = self.generate_evening_report_long(report)
         elif report.mode == ReportMode.MORNING:
-            return self.generate_morning_report(report)
+            text = self.generate_morning_report(report)
         else:  # ReportMode.DAY
-            return self.generate_day_warning(report)
+            text = self.generate_day_warning(report)
+        if report.ensemble_probabilities:
+            text += "\n\n" + self._format_ensemble(report.ensemble_probabilities)
+        if report.deltas:
+            text += "\n\n" + self._format_deltas(report.deltas)
+        rolling = self._format_rolling(report.rolling_metrics)
+        if rolling:
+            text += "\n\n" + rolling
+        return text
+
+    def _format_rolling(self, metrics: Optional[Dict[str, Dict[str, Any]]]) -> str:
+        """Formatiert die überschrittenen gleitenden Kennzahlen mit dem Ende ihres Fensters"""
+        labels = {"regen": ("Regen", "mm"), "wind": ("Wind", "km/h")}
+        lines = []
+        for key, metric in (metrics or {}).items():
+            if not metric["exceeded"]:
+                continue
+            name, _, hours = key.partition("_")
+            label, unit = labels.get(name, (name, ""))
+            lines.append(f"  {label} {hours}: {metric['value']:g}{unit} bis {metric['time']}")
+        if not lines:
+            return ""
+        return "Gleitende Fenster (Schwelle überschritten):\n" + "\n".join(lines)
+
+    def _format_deltas(self, deltas: Dict[str, float]) -> str:
+        """Formatiert die Anstiege gegenüber dem Morgenbericht"""
+        labels = {
+            "rain_probability": ("Regenwahrscheinlichkeit", "%"),
+            "thunderstorm_probability": ("Gewitterwahrscheinlichkeit", "%"),
+            "precipitation": ("Niederschlagsmenge", "mm"),
+            "wind_speed": ("Wind", "km/h"),
+            "feels_like": ("Hitze", "°C"),
+        }
+        lines = [
+            f"  {labels[name][0]}: +{value:g}{labels[name][1]}"
+            for name, value in deltas.items()
+            if name in labels and value > 0
+        ]
+        return "Änderung seit dem Morgenbericht:\n" + "\n".join(lines)
+
+    def _format_ensemble(self, probabilities: Dict[str, float]) -> str:
+        """Formatiert die Ensemble-Überschreitungswahrscheinlichkeiten"""
+        labels = {"regen": "Regen", "wind": "Wind", "hitze": "Hitze"}
+        parts = [
+            f"{labels.get(risk, risk)} {self._format_percentage(p * 100)}"
+            for risk, p in probabilities.items()
+        ]
+        return "Ensemble (Schwelle überschritten):\n  " + " | ".join(parts)
 
     def _format_thunder(self, prob, time_threshold, time_max):
         if prob is None or prob == 0.0:
@@ -534,27 +256,59 @@ class ReportGenerator:
         thunder_prob_max = getattr(report, 'thunder_prob_max', None)
         thunder_prob_time_max = getattr(report, 'thunder_prob_time_max', None)
         
+        values = (rain_prob_threshold, rain_prob_time_threshold, rain_amt_threshold, rain_amt_time_threshold, rain_prob_max, rain_prob_time_max, rain_amt_max, rain_amt_time_max, thunder_prob_threshold, thunder_prob_time_threshold, thunder_prob_max, thunder_prob_time_max)
         if report.mode.name == "EVENING":
-            return self.generate_evening_inreach(report, rain_prob_threshold, rain_prob_time_threshold, rain_amt_threshold, rain_amt_time_threshold, rain_prob_max, rain_prob_time_max, rain_amt_max, rain_amt_time_max, thunder_prob_threshold, thunder_prob_time_threshold, thunder_prob_max, thunder_prob_time_max)
+            text = self.generate_evening_inreach(report, *values)
         elif report.mode.name == "MORNING":
-            return self.generate_morning_inreach(report, rain_prob_threshold, rain_prob_time_threshold, rain_amt_threshold, rain_amt_time_threshold, rain_prob_max, rain_prob_time_max, rain_amt_max, rain_amt_time_max, thunder_prob_threshold, thunder_prob_time_threshold, thunder_prob_max, thunder_prob_time_max)
+            text = self.generate_morning_inreach(report, *values)
         elif report.mode.name == "DAY":
-            return self.generate_day_inreach(report, rain_prob_threshold, rain_prob_time_threshold, rain_amt_threshold, rain_amt_time_threshold, rain_prob_max, rain_prob_time_max, rain_amt_max, rain_amt_time_max, thunder_prob_threshold, thunder_prob_time_threshold, thunder_prob_max, thunder_prob_time_max)
+            text = self.generate_day_inreach(report, *values)
         else:
             return "-"
+        if report.model_confidence:
+            # Kompakter Konfidenzmarker aus dem Modellvergleich
+            text += f" | Konf {report.model_confidence}"
+        return text
 
-def load_config():
-    config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config.yaml')
-    with open(config_path, 'r') as file:
-        return yaml.safe_load(file)
+    def generate_inreach_messages(self, report: WeatherReport) -> List[str]:
+        """
+        Kurztext als möglichst wenige inReach-Nachrichten (höchstes Risiko zuerst).
+
+        Returns:
+            Nachrichten mit jeweils höchstens 160 Zeichen
+        """
+        return InReachPacker(self.thresholds).pack(report)
+
+def _inreach_values(report: WeatherReport, *values: Any) -> Dict[str, Any]:
+    """Feldwerte für die InReach-Templates: Berichtsfelder plus übergebene Schwellen-/Maximalwerte"""
+    return dict(
+        zip(_INREACH_KEYS, values),
+        stage_name=report.stage_name,
+        max_wind_speed=report.max_wind_speed,
+        max_feels_like=report.max_feels_like,
+        night_temperature=report.night_temperature
+    )
+
+_INREACH_KEYS = (
+    'rain_prob_threshold', 'rain_prob_time_threshold', 'rain_amt_threshold', 'rain_amt_time_threshold',
+    'rain_prob_max', 'rain_prob_time_max', 'rain_amt_max', 'rain_amt_time_max',
+    'thunder_prob_threshold', 'thunder_prob_time_threshold', 'thunder_prob_max', 'thunder_prob_time_max'
+)
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config.yaml')
+
+def load_config() -> "Konfiguration":
+    """Validierte Konfiguration aus dem prozessweiten Cache (YAML wird erst hier geladen)"""
+    from src.config import config_service
+
+    return config_service(CONFIG_PATH).get()
 
 def determine_risk_level(max_values: Dict[str, float], next_day_thunderstorm: Optional[float], thunderstorm_plus1: Optional[float]) -> str:
     """
     Bestimmt das Risikolevel basierend auf den Maximalwerten und der Spezifikation.
     Nutzt Schwellenwerte aus config.yaml für Regen, Gewitter, Wind und Hitze. Gibt das höchste gefundene Level zurück.
     """
-    config = load_config()
-    thresholds = config['schwellen']
+    thresholds = load_config().schwellen
 
     def risk_level(value, threshold):
         if value is None:
@@ -566,16 +320,16 @@ def determine_risk_level(max_values: Dict[str, float], next_day_thunderstorm: Op
         return 0  # niedrig
 
     levels = [
-        risk_level(max_values.get('precipitation', 0), thresholds['regen']),
-        risk_level(max_values.get('thunderstorm_probability', 0), thresholds['gewitter']),
-        risk_level(max_values.get('wind_speed', 0), thresholds['wind']),
-        risk_level(max_values.get('feels_like', 0), thresholds['hitze'])
+        risk_level(max_values.get('precipitation', 0), thresholds.regen),
+        risk_level(max_values.get('thunderstorm_probability', 0), thresholds.gewitter),
+        risk_level(max_values.get('wind_speed', 0), thresholds.wind),
+        risk_level(max_values.get('feels_like', 0), thresholds.hitze)
     ]
     # Consider next day/plus1 thunderstorm for warning
     if next_day_thunderstorm is not None:
-        levels.append(risk_level(next_day_thunderstorm, thresholds['gewitter']))
+        levels.append(risk_level(next_day_thunderstorm, thresholds.gewitter))
     if thunderstorm_plus1 is not None:
-        levels.append(risk_level(thunderstorm_plus1, thresholds['gewitter']))
+        levels.append(risk_level(thunderstorm_plus1, thresholds.gewitter))
 
     max_level = max(levels)
     if max_level == 2:
@@ -746,11 +500,7 @@ def extract_threshold_and_max_values(weather_data: WeatherData, threshold_config
     )
 
 def generate_report(mode: ReportMode, stage_name: str, date: datetime, weather_data: WeatherData, next_day_thunderstorm: Optional[float] = None, thunderstorm_plus1: Optional[float] = None) -> WeatherReport:
-    import yaml, os
-    config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config.yaml')
-    with open(config_path, 'r') as file:
-        config = yaml.safe_load(file)
-    thresholds = config['schwellen']
+    thresholds = load_config()['schwellen']
     max_values = weather_data.get_max_values()
     min_values = weather_data.get_min_values()
     extracted = extract_threshold_and_max_values(weather_data, thresholds)
@@ -787,8 +537,7 @@ def generate_report(mode: ReportMode, stage_name: str, date: datetime, weather_d
 if __name__ == "__main__":
     from datetime import datetime
     from src.weather.models import WeatherPoint, WeatherData, ReportMode
-    import yaml
-    config = yaml.safe_load(open('config.yaml'))
+    config = load_config()
     wd = WeatherData(points=[
         WeatherPoint(latitude=47.3769, longitude=8.5417, elevation=400, time=datetime(2023,1,1,10,0), temperature=18, feels_like=16, precipitation=2, rain_probability=25, thunderstorm_probability=25, wind_speed=10, wind_direction=180, cloud_cover=50),
         WeatherPoint(latitude=47.3769, longitude=8.5417, elevation=400, time=datetime(2023,1,1,15,0), temperature=22, feels_like=20, precipitation=5, rain_probability=60, thunderstorm_probability=60, wind_speed=15, wind_direction=200, cloud_cover=70)
@@ -0,0 +1,125 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from src.weather.models import WeatherReport
+from src.report import templates
+
+# Maximale Länge einer inReach-Nachricht
+INREACH_LIMIT = 160
+
+# Ab Stufe 3 wird der Etappenname auf diese Länge gekürzt
+STAGE_SHORT = 20
+
+# Trennzeichen je Abkürzungsstufe (0: wie generate_inreach, 3: am kürzesten)
+SEPARATORS = (" | ", " | ", "|", " ")
+
+_rain = templates.rain(templates.hour)
+_thunder = templates.risk("thunder_prob", "%", templates.hour)
+
+def _compact(field: templates.Field) -> templates.Field:
+    """Ohne Leerzeichen vor der Klammer: 35%@16(50%@17)"""
+    return lambda v: field(v).replace(" (", "(")
+
+# (Bezeichnungen je Stufe, Formatierer je Stufe)
+FIELDS: Dict[str, Tuple[Sequence[str], Sequence[templates.Field]]] = {
+    "gewitter": (("Gewitter", "Gewitter", "Gew", "G"), (_thunder, _thunder, _compact(_thunder), _compact(_thunder))),
+    "regen": (("Regen", "Regen", "Reg", "R"), (_rain, _rain, _compact(_rain), _compact(_rain))),
+    "wind": (("Wind", "Wind", "Wind", "W"), (templates.value("max_wind_speed", "km/h"),) * 3 + (templates.value("max_wind_speed"),)),
+    "hitze": (("Hitze", "Hitze", "Hitze", "H"), (templates.value("max_feels_like", "°C"),) * 3 + (templates.value("max_feels_like"),)),
+    "nacht": (("Nacht", "Nacht", "Nacht", "N"), (templates.value("night_temperature", "°C"),) * 3 + (templates.value("night_temperature"),)),
+    "konf": (("Konf", "Konf", "Konf", "K:"), (templates.text("model_confidence"),) * 4),
+}
+
+class InReachPacker:
+    """
+    Verpackt einen WeatherReport in möglichst wenige inReach-Nachrichten.
+    Die Felder werden nach Risiko sortiert (höchstes zuerst) und in Stufen
+    abgekürzt; gewählt wird die ausführlichste Stufe, die mit der kleinsten
+    möglichen Anzahl Nachrichten auskommt. Ist eine Aufteilung unvermeidbar,
+    werden die Teile nummeriert ("1/2 ...").
+    """
+
+    def __init__(self, thresholds: Dict[str, Any], limit: int = INREACH_LIMIT):
+        """
+        Args:
+            thresholds: Schwellenwerte aus config.yaml (für die Risikoreihenfolge)
+            limit: Maximale Zeichen je Nachricht
+        """
+        self.thresholds = thresholds
+        self.limit = limit
+
+    def _ratio(self, value: Optional[float], threshold_key: str) -> float:
+        """Wert relativ zur Schwelle; 0 ohne Wert oder Schwelle"""
+        threshold = self.thresholds.get(threshold_key)
+        if value is None or not threshold:
+            return 0.0
+        return value / threshold
+
+    def order(self, report: WeatherReport) -> List[str]:
+        """Felder in Ausgabereihenfolge: Risiken absteigend, danach Nacht und Konfidenz"""
+        risks = {
+            "gewitter": self._ratio(report.thunder_prob_max or report.max_thunderstorm_probability, "gewitter"),
+            "regen": max(self._ratio(report.rain_prob_max, "regen"), self._ratio(report.rain_amt_max, "regenmenge")),
+            "wind": self._ratio(report.max_wind_speed, "wind"),
+            "hitze": self._ratio(report.max_feels_like, "hitze"),
+        }
+        fields = sorted(risks, key=lambda name: -risks[name])
+        if report.night_temperature is not None:
+            fields.append("nacht")
+        if report.model_confidence:
+            fields.append("konf")
+        return fields
+
+    def _render(self, report: WeatherReport, fields: List[str], tier: int) -> List[str]:
+        """Etappenname und Felder in einer Abkürzungsstufe"""
+        values = vars(report)
+        stage = report.stage_name if tier < 3 else report.stage_name[:STAGE_SHORT]
+        parts = [stage]
+        for name in fields:
+            labels, formatters = FIELDS[name]
+            text = formatters[tier](values)
+            if text == "-" and tier > 0:
+                # Ab Stufe 1 entfallen Felder ohne Information
+                continue
+            parts.append(f"{labels[tier]}{text}" if tier == 3 else f"{labels[tier]} {text}")
+        return parts
+
+    def _split(self, parts: List[str], separator: str) -> List[str]:
+        """
+        Verteilt die Teile der Reihe nach auf Nachrichten (Reihenfolge bleibt,
+        damit die höchsten Risiken in der ersten Nachricht stehen). Das
+        sequentielle Auffüllen ergibt bei fester Reihenfolge die kleinste Anzahl.
+        """
+        if len(separator.join(parts)) <= self.limit:
+            return [separator.join(parts)]
+        count = 2
+        while True:
+            capacity = self.limit - len(f"{count}/{count} ")
+            messages: List[str] = []
+            current = ""
+            for part in parts:
+                part = part[:capacity]
+                candidate = f"{current}{separator}{part}" if current else part
+                if len(candidate) <= capacity:
+                    current = candidate
+                else:
+                    messages.append(current)
+                    current = part
+            messages.append(current)
+            if len(messages) <= count:
+                return [f"{i}/{len(messages)} {m}" for i, m in enumerate(messages, start=1)]
+            count = len(messages)
+
+    def pack(self, report: WeatherReport) -> List[str]:
+        """
+        Args:
+            report: Aggregierter Wetterbericht
+
+        Returns:
+            Nachrichten mit jeweils höchstens limit Zeichen
+        """
+        fields = self.order(report)
+        candidates = [
+            self._split(self._render(report, fields, tier), separator)
+            for tier, separator in enumerate(SEPARATORS)
+        ]
+        fewest = min(len(messages) for messages in candidates)
+        return next(messages for messages in candidates if len(messages) == fewest)
@@ -0,0 +1,191 @@
+import string
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+# Ein Feldformatierer liest seine Werte aus einem Mapping und liefert den Text
+Field = Callable[[Mapping[str, Any]], str]
+
+@lru_cache(maxsize=256)
+def clock_time(timestr: str) -> str:
+    """Zeitangabe als HH:MM (Langtext)"""
+    try:
+        return datetime.fromisoformat(timestr).strftime("%H:%M")
+    except Exception:
+        return timestr[-5:] if len(timestr) >= 5 else timestr
+
+@lru_cache(maxsize=256)
+def hour(timestr: str) -> str:
+    """Zeitangabe als HH (InReach)"""
+    try:
+        return datetime.fromisoformat(timestr).strftime("%H")
+    except Exception:
+        if ':' in timestr:
+            return timestr.split(':')[0]
+        return timestr[:2] if len(timestr) >= 2 else timestr
+
+def format_value(val: Any, unit: Optional[str] = None) -> str:
+    """Wert mit Einheit; fehlende Werte und 0 werden als "-" dargestellt"""
+    if val is None or (isinstance(val, (float, int)) and val == 0):
+        return "-"
+    return f"{val}{unit}" if unit else str(val)
+
+def format_value_time(val: Any, time: Optional[str], unit: Optional[str], time_format: Callable[[str], str]) -> str:
+    """Wert mit Zeitpunkt, z.B. 30%@14:00"""
+    v = format_value(val, unit)
+    if v == "-" or not time:
+        return v
+    return f"{v}@{time_format(time)}"
+
+def format_risk(
+    threshold_val: Any,
+    threshold_time: Optional[str],
+    max_val: Any,
+    max_time: Optional[str],
+    unit: Optional[str],
+    time_format: Callable[[str], str]
+) -> str:
+    """Schwellen- und Maximalwert; sind beide gleich, wird nur einer angezeigt"""
+    if threshold_val is None and max_val is None:
+        return "-"
+    threshold_str = format_value_time(threshold_val, threshold_time, unit, time_format)
+    if threshold_val == max_val and threshold_time == max_time:
+        return threshold_str
+    max_str = format_value_time(max_val, max_time, unit, time_format)
+    if threshold_str == "-":
+        return max_str
+    if max_str == "-":
+        return threshold_str
+    return f"{threshold_str} ({max_str})"
+
+def text(key: str) -> Field:
+    """Feld als Text"""
+    return lambda v: str(v[key])
+
+def date(key: str, date_format: str = "%d.%m.%Y") -> Field:
+    """Datumsfeld"""
+    return lambda v: v[key].strftime(date_format)
+
+def value(key: str, unit: Optional[str] = None) -> Field:
+    """Einzelwert mit Einheit"""
+    return lambda v: format_value(v[key], unit)
+
+def risk(prefix: str, unit: str, time_format: Callable[[str], str]) -> Field:
+    """Risiko aus <prefix>_threshold, <prefix>_time_threshold, <prefix>_max und <prefix>_time_max"""
+    keys = (f"{prefix}_threshold", f"{prefix}_time_threshold", f"{prefix}_max", f"{prefix}_time_max")
+    return lambda v: format_risk(v[keys[0]], v[keys[1]], v[keys[2]], v[keys[3]], unit, time_format)
+
+def rain(time_format: Callable[[str], str]) -> Field:
+    """Regenwahrscheinlichkeit und -menge in einem Feld (InReach)"""
+    prob = risk("rain_prob", "%", time_format)
+    amount = risk("rain_amt", "mm", time_format)
+
+    def render(v: Mapping[str, Any]) -> str:
+        prob_str = prob(v)
+        amount_str = amount(v)
+        if prob_str == "-":
+            return amount_str
+        if amount_str == "-":
+            return prob_str
+        return f"{prob_str} {amount_str}"
+    return render
+
+class Template:
+    """
+    Einmal kompiliertes Ausgabeformat. Das Muster wird beim Erstellen in eine
+    Formatzeichenkette mit Positionsplatzhaltern und eine flache Liste von
+    Feldformatierern zerlegt; render() ist danach ein einziger Durchlauf über
+    diese Liste.
+    """
+
+    def __init__(self, pattern: str, fields: Dict[str, Field]):
+        """
+        Args:
+            pattern: Formatmuster mit {feld}-Platzhaltern
+            fields: Feldformatierer je Platzhalter
+        """
+        parts: List[str] = []
+        self.fields: List[Field] = []
+        for literal, name, _, _ in string.Formatter().parse(pattern):
+            parts.append(literal.replace("{", "{{").replace("}", "}}"))
+            if name is not None:
+                parts.append("{}")
+                self.fields.append(fields[name])
+        self.format = "".join(parts).format
+
+    def render(self, values: Mapping[str, Any]) -> str:
+        """
+        Args:
+            values: Feldwerte, z.B. vars(report)
+
+        Returns:
+            Fertiger Text
+        """
+        return self.format(*[field(values) for field in self.fields])
+
+_LONG_FIELDS = {
+    "stage": text("stage_name"),
+    "date": date("date"),
+    "rain_prob": risk("rain_prob", "%", clock_time),
+    "rain_amt": risk("rain_amt", "mm", clock_time),
+    "thunder": risk("thunder_prob", "%", clock_time),
+    "wind": value("max_wind_speed", "km/h"),
+    "heat": value("max_feels_like", "°C"),
+    "night": value("night_temperature", "°C"),
+    "thunder_next": value("next_day_thunderstorm", "%"),
+}
+
+_INREACH_FIELDS = {
+    "stage": text("stage_name"),
+    "thunder": risk("thunder_prob", "%", hour),
+    "rain": rain(hour),
+    "wind": value("max_wind_speed", "km/h"),
+    "heat": value("max_feels_like", "°C"),
+    "night": value("night_temperature", "°C"),
+}
+
+_RISKS = (
+    "  Regenwahrscheinlichkeit: {rain_prob}\n"
+    "  Niederschlagsmenge: {rain_amt}\n"
+    "  Gewitterwahrscheinlichkeit: {thunder}\n"
+    "  Wind: {wind}\n"
+    "  Hitze: {heat}\n"
+)
+
+MORNING_LONG = Template(
+    "Wetterbericht für {stage} am {date}\n"
+    "\n"
+    "Risiken für heute:\n"
+    + _RISKS +
+    "\n"
+    "Gewitterwahrscheinlichkeit für morgen:\n"
+    "  {thunder_next}",
+    _LONG_FIELDS
+)
+
+EVENING_LONG = Template(
+    "Wetterbericht für {stage} am {date}\n"
+    "\n"
+    "Nachttemperatur:\n"
+    "  {night}\n"
+    "\n"
+    "Risiken für morgen:\n"
+    + _RISKS +
+    "\n"
+    "Gewitterwahrscheinlichkeit für übermorgen:\n"
+    "  {thunder_next}",
+    _LONG_FIELDS
+)
+
+EVENING_INREACH = Template(
+    "{stage} | Gewitter {thunder} | Regen {rain} | Wind {wind} | Hitze {heat} | Nacht {night}",
+    _INREACH_FIELDS
+)
+
+MORNING_INREACH = Template(
+    "{stage} | Gewitter {thunder} | Regen {rain} | Wind {wind} | Hitze {heat}",
+    _INREACH_FIELDS
+)
+
+# Die Tageswarnung nutzt dasselbe Kurzformat wie der Morgenbericht
+DAY_INREACH = MORNING_INREACH
@@ -0,0 +1,154 @@
+"""
+Prozessübergreifende Sperre für Berichtsläufe.
+
+Überlappen sich zwei Läufe desselben Modus (z.B. eine langsame Tageswarnung
+und der nächste */30-Lauf oder ein manueller Abendlauf neben dem Cronjob),
+wartet der zweite auf den ersten und übernimmt dessen Ergebnis, statt
+dieselben Vorhersagen erneut abzurufen und doppelt zu senden.
+
+Die Sperre ist ein flock() auf data/locks/<schlüssel>.lock; der Kernel gibt
+sie frei, wenn der haltende Prozess stirbt. Die Datei enthält PID und
+Status des letzten Halters, sodass ein abgebrochener Lauf erkannt wird.
+"""
+import fcntl
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LOCK_DIR = os.path.join("data", "locks")
+
+# Maximale Wartezeit auf einen laufenden Bericht in Sekunden
+LOCK_TIMEOUT = 600.0
+
+# Abstand der Sperrversuche beim Warten in Sekunden
+POLL_INTERVAL = 0.2
+
+class RunLockTimeout(Exception):
+    """Der laufende Bericht wurde nicht innerhalb der Wartezeit fertig"""
+    pass
+
+class RunLock:
+    """
+    Exklusive Sperre je Schlüssel mit geteiltem Ergebnis.
+
+    Verwendung:
+        with RunLock("evening") as lock:
+            shared = lock.shared_result()
+            if shared is None:
+                ...
+                lock.publish({"text": text})
+    """
+
+    def __init__(
+        self,
+        key: str,
+        directory: str = LOCK_DIR,
+        timeout: float = LOCK_TIMEOUT,
+        poll_interval: float = POLL_INTERVAL
+    ):
+        """
+        Args:
+            key: Name der Sperre, z.B. der Berichtsmodus
+            directory: Verzeichnis für Sperr- und Ergebnisdateien
+            timeout: Maximale Wartezeit auf einen anderen Halter in Sekunden
+            poll_interval: Abstand der Sperrversuche in Sekunden
+        """
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", key)
+        self.key = key
+        self.path = os.path.join(directory, f"{name}.lock")
+        self.result_path = os.path.join(directory, f"{name}.json")
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.waited = False
+        self.recovered: Optional[Dict[str, Any]] = None
+        self._requested: Optional[float] = None
+        self._file = None
+
+    def __enter__(self) -> "RunLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release(failed=exc_type is not None)
+
+    def _holder(self) -> Dict[str, Any]:
+        """Zuletzt eingetragener Halter (leer, wenn unbekannt)"""
+        self._file.seek(0)
+        try:
+            return json.loads(self._file.read() or "{}")
+        except ValueError:
+            return {}
+
+    def _write_holder(self, state: str) -> None:
+        self._file.seek(0)
+        self._file.truncate()
+        json.dump({"pid": os.getpid(), "state": state, "time": time.time()}, self._file)
+        self._file.flush()
+
+    def acquire(self) -> None:
+        """
+        Holt die Sperre; hält sie ein anderer Prozess, wird bis timeout gewartet.
+
+        Raises:
+            RunLockTimeout: Wenn die Sperre nicht rechtzeitig frei wird
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._requested = time.time()
+        self._file = open(self.path, "a+")
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if not self.waited:
+                    logger.info(f"Lauf {self.key} läuft bereits (PID {self._holder().get('pid')}), warte")
+                    self.waited = True
+                if time.monotonic() >= deadline:
+                    self._file.close()
+                    self._file = None
+                    raise RunLockTimeout(f"Sperre {self.key} nach {self.timeout:g} s nicht frei")
+                time.sleep(self.poll_interval)
+        holder = self._holder()
+        if holder.get("state") == "running":
+            # Der letzte Halter ist gestorben, ohne die Sperre aufzuräumen
+            logger.warning(f"Lauf {self.key} von PID {holder.get('pid')} wurde abgebrochen, übernehme")
+            self.recovered = holder
+        self._write_holder("running")
+
+    def release(self, failed: bool = False) -> None:
+        """Gibt die Sperre frei und vermerkt den Ausgang des Laufs"""
+        if self._file is None:
+            return
+        self._write_holder("failed" if failed else "done")
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+    def shared_result(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns:
+            Ergebnis eines Laufs, der fertig wurde, während dieser Prozess auf
+            die Sperre wartete; sonst None
+        """
+        try:
+            with open(self.result_path, encoding="utf-8") as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if result.get("finished", 0) >= self._requested:
+            return result
+        return None
+
+    def publish(self, result: Dict[str, Any]) -> None:
+        """Speichert das Ergebnis atomar für wartende Prozesse"""
+        entry = dict(result, pid=os.getpid(), finished=time.time())
+        tmp = f"{self.result_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, self.result_path)
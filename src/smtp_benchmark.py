@@ -0,0 +1,181 @@
+"""
+Durchsatz- und Latenzmessung des E-Mail-Versands gegen den lokalen SMTP-Empfänger.
+
+Gemessen werden Nachrichten pro Sekunde sowie p50/p99 der Latenz je Nachricht
+für sende_email (neue Verbindung je Nachricht), SMTPSession (eine Verbindung
+für alle Nachrichten) und AsyncSMTPTransport (mehrere parallele Verbindungen).
+
+Aufruf:
+    python -m src.smtp_benchmark --count 200 --latency 0.01 --fail-rate 0.05
+"""
+import argparse
+import asyncio
+import logging
+import math
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from src.email_async import AsyncSMTPTransport
+from src.email_sender import EmailError, SMTPSession, sende_email
+from src.smtp_sink import SMTPSink
+
+VARIANTS = ("sende_email", "session", "async")
+
+# Passwort für den Empfänger, der jede Anmeldung akzeptiert
+_PASSWORD = "benchmark"
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """p-Quantil (Nearest-Rank) einer Messreihe"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+@contextmanager
+def _password() -> Iterator[None]:
+    """sende_email liest das Passwort aus der Umgebung; nur für die Messung setzen"""
+    previous = os.environ.get("GMAIL_APP_PW")
+    os.environ["GMAIL_APP_PW"] = _PASSWORD
+    try:
+        yield
+    finally:
+        if previous is None:
+            del os.environ["GMAIL_APP_PW"]
+        else:
+            os.environ["GMAIL_APP_PW"] = previous
+
+def _timed(send: Callable[[str], None], count: int) -> List[Optional[float]]:
+    """Latenzen je Nachricht; None für Nachrichten, die nicht zugestellt wurden"""
+    latencies: List[Optional[float]] = []
+    for i in range(count):
+        start = time.perf_counter()
+        try:
+            send(f"Nachricht {i}")
+            latencies.append(time.perf_counter() - start)
+        except EmailError:
+            latencies.append(None)
+    return latencies
+
+def _run_sende_email(config: Dict[str, Any], count: int, retries: int, concurrency: int) -> List[Optional[float]]:
+    with _password():
+        return _timed(lambda text: sende_email(text, config, max_retries=retries, retry_delay=0), count)
+
+def _run_session(config: Dict[str, Any], count: int, retries: int, concurrency: int) -> List[Optional[float]]:
+    with SMTPSession(config, password=_PASSWORD, max_retries=retries, retry_delay=0) as session:
+        return _timed(lambda text: session.send(text), count)
+
+def _run_async(config: Dict[str, Any], count: int, retries: int, concurrency: int) -> List[Optional[float]]:
+    async def run() -> List[Optional[float]]:
+        async with AsyncSMTPTransport(config, password=_PASSWORD, concurrency=concurrency, max_retries=retries) as transport:
+            # Ein Sender je Verbindung, damit die Latenz keine Wartezeit auf
+            # eine freie Verbindung enthält
+            async def worker(numbers: range) -> List[Optional[float]]:
+                latencies: List[Optional[float]] = []
+                for i in numbers:
+                    start = time.perf_counter()
+                    try:
+                        await transport.send(f"Nachricht {i}")
+                        latencies.append(time.perf_counter() - start)
+                    except EmailError:
+                        latencies.append(None)
+                return latencies
+            results = await asyncio.gather(*(worker(range(w, count, concurrency)) for w in range(concurrency)))
+            return [latency for latencies in results for latency in latencies]
+    return asyncio.run(run())
+
+_RUNNERS = {
+    "sende_email": _run_sende_email,
+    "session": _run_session,
+    "async": _run_async,
+}
+
+def benchmark(
+    variant: str,
+    count: int = 100,
+    latency: float = 0.0,
+    fail_rate: float = 0.0,
+    retries: int = 3,
+    concurrency: int = 4,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Misst eine Versandvariante gegen einen frisch gestarteten Empfänger.
+
+    Args:
+        variant: Eine der VARIANTS
+        count: Anzahl Nachrichten
+        latency: Antwortverzögerung des Empfängers je SMTP-Befehl in Sekunden
+        fail_rate: Anteil der vom Empfänger abgelehnten Zustellversuche
+        retries: Versuche je Nachricht
+        concurrency: Parallele Verbindungen der asynchronen Variante
+        seed: Startwert für die Fehlerauswahl
+
+    Returns:
+        {"variant", "messages", "delivered", "connections", "seconds",
+        "rate" (Nachrichten/s), "p50", "p99" (Sekunden)}
+    """
+    if variant not in _RUNNERS:
+        raise ValueError(f"Unbekannte Variante: {variant}")
+    with SMTPSink(latency=latency, fail_rate=fail_rate, seed=seed) as sink:
+        start = time.perf_counter()
+        latencies = _RUNNERS[variant](sink.smtp_config(), count, retries, concurrency)
+        seconds = time.perf_counter() - start
+        connections = sink.connections
+    delivered = [l for l in latencies if l is not None]
+    return {
+        "variant": variant,
+        "messages": count,
+        "delivered": len(delivered),
+        "connections": connections,
+        "seconds": seconds,
+        "rate": len(delivered) / seconds if seconds else 0.0,
+        "p50": percentile(delivered, 50),
+        "p99": percentile(delivered, 99),
+    }
+
+def format_result(result: Dict[str, Any]) -> str:
+    """Eine Tabellenzeile"""
+    return (
+        f"{result['variant']:<12} {result['delivered']:>5}/{result['messages']:<5} "
+        f"{result['connections']:>5} {result['rate']:>9.1f} "
+        f"{result['p50'] * 1000:>9.2f} {result['p99'] * 1000:>9.2f}"
+    )
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="E-Mail-Versand gegen einen lokalen SMTP-Empfänger messen")
+    parser.add_argument("--variant", nargs="+", choices=VARIANTS, default=list(VARIANTS),
+                        help="Zu messende Versandvarianten")
+    parser.add_argument("--count", type=int, default=100, help="Nachrichten je Variante")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Antwortverzögerung des Empfängers je SMTP-Befehl in Sekunden")
+    parser.add_argument("--fail-rate", type=float, default=0.0,
+                        help="Anteil der abgelehnten Zustellversuche (0-1)")
+    parser.add_argument("--retries", type=int, default=3, help="Versuche je Nachricht")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Parallele Verbindungen der asynchronen Variante")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Kommandozeilen-Einstieg; gibt eine Tabelle je Variante aus"""
+    args = parse_args(argv)
+    # Abgelehnte Versuche sind bei --fail-rate gewollt und stehen in der Tabelle
+    logging.basicConfig(level=logging.CRITICAL)
+    print(f"{'Variante':<12} {'zugestellt':>11} {'Verb.':>5} {'Nachr./s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for variant in args.variant:
+        result = benchmark(
+            variant,
+            count=args.count,
+            latency=args.latency,
+            fail_rate=args.fail_rate,
+            retries=args.retries,
+            concurrency=args.concurrency
+        )
+        print(format_result(result))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+Lokaler SMTP-Empfänger für Tests und Messungen.
+
+Spricht das für den Versand nötige SMTP (EHLO, AUTH, MAIL, RCPT, DATA, QUIT)
+ohne TLS, akzeptiert jede Anmeldung und hält die empfangenen Nachrichten im
+Speicher. Läuft in einem Hintergrund-Thread im selben Prozess. Antwortzeit
+(latency), Anteil vorübergehend abgelehnter Nachrichten (fail_rate) und
+dauerhaft abgelehnte Empfänger (reject) sind einstellbar, um einen langsamen
+oder gestörten Server nachzubilden.
+
+Verwendung:
+    with SMTPSink(latency=0.02, fail_rate=0.1) as sink:
+        config = sink.smtp_config()
+"""
+import random
+import socketserver
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    """Eine SMTP-Verbindung"""
+
+    def _reply(self, line: str) -> None:
+        self.server.sink._delay()
+        self.wfile.write(f"{line}\r\n".encode("utf-8"))
+
+    def _auth(self, argument: str) -> None:
+        """AUTH PLAIN/LOGIN: Zugangsdaten werden abgefragt, aber nicht geprüft"""
+        parts = argument.split()
+        mechanism = parts[0].upper() if parts else ""
+        if mechanism == "PLAIN" and len(parts) == 1:
+            self._reply("334 ")
+            self.rfile.readline()
+        elif mechanism == "LOGIN":
+            for _ in range(2 - (len(parts) > 1)):
+                self._reply("334 ")
+                self.rfile.readline()
+        elif mechanism != "PLAIN":
+            self._reply("504 Unbekanntes Verfahren")
+            return
+        self._reply("235 Angemeldet")
+
+    def _data(self) -> bytes:
+        """Liest den Nachrichtentext bis zur Zeile mit einem einzelnen Punkt"""
+        lines: List[bytes] = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line == b".\r\n":
+                break
+            lines.append(line[1:] if line.startswith(b"..") else line)
+        return b"".join(lines)
+
+    def handle(self) -> None:
+        sink: "SMTPSink" = self.server.sink
+        sink._opened(self.connection)
+        try:
+            self._reply("220 localhost SMTP-Sink")
+            sender: Optional[str] = None
+            recipients: List[str] = []
+            while True:
+                raw = self.rfile.readline()
+                if not raw:
+                    return
+                line = raw.decode("utf-8", "replace").rstrip("\r\n")
+                verb, _, argument = line.partition(" ")
+                verb = verb.upper()
+                if verb == "EHLO":
+                    sink._delay()
+                    self.wfile.write(b"250-localhost\r\n250-AUTH PLAIN LOGIN\r\n250-8BITMIME\r\n250 SMTPUTF8\r\n")
+                elif verb == "HELO":
+                    self._reply("250 localhost")
+                elif verb == "AUTH":
+                    self._auth(argument)
+                elif verb == "MAIL":
+                    sender = argument.partition(":")[2].strip().strip("<>").split(">")[0]
+                    recipients = []
+                    self._reply("250 OK")
+                elif verb == "RCPT":
+                    recipient = argument.partition(":")[2].strip().strip("<>").split(">")[0]
+                    if recipient in sink.reject:
+                        self._reply("550 Empfänger unbekannt")
+                    else:
+                        recipients.append(recipient)
+                        self._reply("250 OK")
+                elif verb == "DATA":
+                    self._reply("354 Ende mit <CRLF>.<CRLF>")
+                    data = self._data()
+                    if sink._should_fail():
+                        self._reply("451 Vorübergehender Fehler, später erneut versuchen")
+                    else:
+                        sink._received(sender, recipients, data)
+                        self._reply("250 OK")
+                elif verb in ("RSET", "NOOP"):
+                    self._reply("250 OK")
+                elif verb == "QUIT":
+                    self._reply("221 Tschüss")
+                    return
+                else:
+                    self._reply("502 Nicht unterstützt")
+        except OSError:
+            # Verbindung vom Client oder per drop_connections() getrennt
+            return
+        finally:
+            sink._closed(self.connection)
+
+class _SinkServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class SMTPSink:
+    """SMTP-Server im Hintergrund-Thread, der Nachrichten annimmt oder gezielt ablehnt"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        fail_rate: float = 0.0,
+        seed: Optional[int] = None,
+        reject: Sequence[str] = ()
+    ):
+        """
+        Args:
+            host: Adresse, an die der Server gebunden wird
+            port: Port (0: freien Port wählen)
+            latency: Verzögerung vor jeder Serverantwort in Sekunden
+            fail_rate: Anteil der Nachrichten, die mit 451 abgelehnt werden
+            seed: Startwert für die Fehlerauswahl (reproduzierbare Läufe)
+            reject: Empfänger, die dauerhaft mit 550 abgelehnt werden
+        """
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.reject = set(reject)
+        self._random = random.Random(seed)
+        self.failures = 0
+        self._server = _SinkServer((host, port), _SinkHandler, bind_and_activate=True)
+        self._server.sink = self
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._open: Set[Any] = set()
+        self.host, self.port = self._server.server_address[:2]
+        self.connections = 0
+        self.messages: List[Dict[str, Any]] = []
+
+    def __enter__(self) -> "SMTPSink":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Startet den Server-Thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Beendet den Server und alle offenen Verbindungen"""
+        self._server.shutdown()
+        self.drop_connections()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def drop_connections(self) -> None:
+        """Trennt alle offenen Verbindungen, wie ein Server nach Leerlauf-Timeout"""
+        with self._lock:
+            sockets = list(self._open)
+        for sock in sockets:
+            try:
+                sock.shutdown(2)
+            except OSError:
+                pass
+
+    def smtp_config(self, **overrides: Any) -> Dict[str, Any]:
+        """SMTP-Konfiguration für diesen Server (ohne STARTTLS)"""
+        config = {
+            "host": self.host,
+            "port": self.port,
+            "user": "sender@example.com",
+            "to": "empfaenger@example.com",
+            "starttls": False,
+        }
+        config.update(overrides)
+        return config
+
+    def _delay(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            if self.fail_rate and self._random.random() < self.fail_rate:
+                self.failures += 1
+                return True
+            return False
+
+    def _opened(self, sock: Any) -> None:
+        with self._lock:
+            self._open.add(sock)
+            self.connections += 1
+
+    def _closed(self, sock: Any) -> None:
+        with self._lock:
+            self._open.discard(sock)
+
+    def _received(self, sender: Optional[str], recipients: List[str], data: bytes) -> None:
+        with self._lock:
+            self.messages.append({"from": sender, "to": list(recipients), "data": data})
@@ -1,5 +1,6 @@
+from datetime import datetime
 from typing import Dict, Any
-from src.weather.models import WeatherData, WeatherPoint
+from src.weather.models import WeatherData, WeatherPoint, StageWeather
 
 def convert_to_legacy_format(weather_data: WeatherData) -> Dict[str, Any]:
     """
@@ -44,4 +45,71 @@ def _convert_wind_direction(degrees: float) -> str:
     """Konvertiert Windrichtung in Grad zu Himmelsrichtung"""
     directions = ['N', 'NO', 'O', 'SO', 'S', 'SW', 'W', 'NW']
     index = round(degrees / 45) % 8
-    return directions[index] 
\ No newline at end of file
+    return directions[index] 
+
+def create_weather_data(day_data: Dict[str, Any]) -> WeatherData:
+    """Konvertiert die Testdaten in das WeatherData-Modell."""
+    points = []
+    for hour_data in day_data.get("hourly", []):
+        point = WeatherPoint(
+            latitude=hour_data.get("latitude", 0),
+            longitude=hour_data.get("longitude", 0),
+            elevation=hour_data.get("elevation", 0),
+            time=datetime.fromisoformat(hour_data["time"]),
+            temperature=hour_data.get("temperature_2m", 0),
+            feels_like=hour_data.get("apparent_temperature", 0),
+            precipitation=hour_data.get("precipitation_probability", 0),
+            thunderstorm_probability=hour_data.get("thunderstorm_probability", 0),
+            wind_speed=hour_data.get("wind_speed_10m", 0),
+            wind_direction=hour_data.get("wind_direction_10m", 0),
+            cloud_cover=hour_data.get("cloud_cover", 0)
+        )
+        points.append(point)
+    
+    # Extrahiere Zeitpunkte für Regen und Gewitter
+    rain_time_threshold = None
+    rain_time_max = None
+    thunder_time_threshold = None
+    thunder_time_max = None
+    
+    # Finde Zeitpunkt des Maximums für Regen und Gewitter
+    max_rain = 0
+    max_thunder = 0
+    for point in points:
+        if point.precipitation > max_rain:
+            max_rain = point.precipitation
+            rain_time_max = point.time.isoformat()
+        if point.thunderstorm_probability > max_thunder:
+            max_thunder = point.thunderstorm_probability
+            thunder_time_max = point.time.isoformat()
+    
+    # Finde ersten Zeitpunkt über Schwellenwert
+    for point in points:
+        if point.precipitation > 20 and not rain_time_threshold:  # 20% Schwellenwert
+            rain_time_threshold = point.time.isoformat()
+        if point.thunderstorm_probability > 30 and not thunder_time_threshold:  # 30% Schwellenwert
+            thunder_time_threshold = point.time.isoformat()
+    
+    return WeatherData(
+        points=points,
+        rain_time_threshold=rain_time_threshold,
+        rain_time_max=rain_time_max,
+        thunder_time_threshold=thunder_time_threshold,
+        thunder_time_max=thunder_time_max
+    )
+
+def create_stage_weather(data: Dict[str, Any]) -> StageWeather:
+    """
+    Konvertiert Testdaten mit today/tomorrow/day_after_tomorrow in StageWeather.
+
+    Args:
+        data: Testdaten (z.B. tests/testdaten_edgecase.json)
+
+    Returns:
+        StageWeather-Objekt
+    """
+    return StageWeather(
+        today=create_weather_data(data.get('today')),
+        tomorrow=create_weather_data(data.get('tomorrow')),
+        day_after_tomorrow=create_weather_data(data.get('day_after_tomorrow'))
+    )
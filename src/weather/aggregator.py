@@ -1,12 +1,107 @@
+import re
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from src.weather.models import (
     WeatherData,
     StageWeather,
     WeatherReport,
     ReportMode,
-    WeatherPoint
+    WeatherPoint,
+    EnsembleData,
+    MultiModelData
 )
+from src.weather.snapshot import ForecastSnapshot
+from src.weather.warning_state import WarningState, WARNING_RISKS
+
+# Gleitende Kennzahlen: Präfix der Schwelle -> (WeatherPoint-Feld, Reduktion).
+# Eine Schwelle "regen_3h: 5" bedeutet: Regensumme über 3 Stunden ab 5 mm.
+ROLLING_METRICS = {
+    "regen": ("precipitation", "sum"),
+    "wind": ("wind_speed", "mean"),
+}
+
+_ROLLING_KEY = re.compile(r"^(?P<metric>[a-z]+)_(?P<hours>\d+)h$")
+
+def _window_bounds(length: int, window: int) -> int:
+    """Effektive Fensterbreite: kürzere Reihen bilden ein einziges Fenster"""
+    return max(1, min(window, length))
+
+def rolling_sum(values: Sequence[Optional[float]], window: int) -> List[float]:
+    """
+    Gleitende Summe über vollständige Fenster mittels Präfixsummen (O(n)).
+    
+    Args:
+        values: Stündliche Werte (None zählt als 0)
+        window: Fensterbreite in Stunden
+        
+    Returns:
+        Liste der Fenstersummen; Eintrag i endet bei values[i + window - 1]
+    """
+    if not values:
+        return []
+    window = _window_bounds(len(values), window)
+    prefix = [0.0]
+    for v in values:
+        prefix.append(prefix[-1] + (v or 0))
+    return [prefix[i + window] - prefix[i] for i in range(len(values) - window + 1)]
+
+def rolling_mean(values: Sequence[Optional[float]], window: int) -> List[float]:
+    """
+    Gleitender Mittelwert über vollständige Fenster (O(n)).
+    
+    Args:
+        values: Stündliche Werte (None zählt als 0)
+        window: Fensterbreite in Stunden
+        
+    Returns:
+        Liste der Fenstermittel; Eintrag i endet bei values[i + window - 1]
+    """
+    if not values:
+        return []
+    window = _window_bounds(len(values), window)
+    return [total / window for total in rolling_sum(values, window)]
+
+# Ensemble-Risiken: Name -> (EnsembleData-Variable, Schlüssel der Schwelle)
+ENSEMBLE_RISKS = {
+    "regen": ("precipitation", "regenmenge"),
+    "wind": ("wind_speed", "wind"),
+    "hitze": ("feels_like", "hitze"),
+}
+
+# Modellvergleich: Variable -> Schlüssel der Schwelle, an der die Streuung gemessen wird
+MODEL_VARIABLES = {
+    "precipitation": "regenmenge",
+    "wind_speed": "wind",
+    "feels_like": "hitze",
+}
+
+# Konfidenzstufen nach Streuung relativ zur Schwelle (aufsteigend)
+MODEL_AGREEMENT = (
+    (0.25, "hoch"),
+    (0.5, "mittel"),
+)
+
+def _member_maxima(matrix: List[List[Optional[float]]]) -> List[Optional[float]]:
+    """Maximum je Member über alle Stunden (fehlende Stunden werden ignoriert)"""
+    return [max([v for v in row if v is not None], default=None) for row in matrix]
+
+def _elementwise_max(a: List[Optional[float]], b: List[Optional[float]]) -> List[Optional[float]]:
+    """Verknüpft zwei Member-Vektoren elementweise per Maximum"""
+    return [y if x is None else x if y is None else (x if x >= y else y) for x, y in zip(a, b)]
+
+# Tageswarnung gegen Snapshot: Wahrscheinlichkeiten vergleichen mit delta_prozent,
+# Mengen mit ihrer Schwelle
+DELTA_PERCENT_FIELDS = ("rain_probability", "thunderstorm_probability")
+DELTA_THRESHOLDS = {
+    "precipitation": "regenmenge",
+    "wind_speed": "wind",
+    "feels_like": "hitze",
+}
+
+_ROLLING_FUNCTIONS = {
+    "sum": rolling_sum,
+    "mean": rolling_mean,
+}
 
 class WeatherAggregator:
     """Aggregiert Wetterdaten nach den spezifizierten Regeln"""
@@ -70,184 +165,313 @@ class WeatherAggregator:
         Returns:
             Dictionary mit Schwellen- und Maximalwerten
         """
-        rain_prob_threshold = None
-        rain_prob_max = None
-        rain_amt_threshold = None
-        rain_amt_max = None
-        thunder_prob_threshold = None
-        thunder_prob_max = None
-        rain_prob_time_threshold = None
-        rain_prob_time_max = None
-        rain_amt_time_threshold = None
-        rain_amt_time_max = None
-        thunder_time_threshold = None
-        thunder_time_max = None
-
+        return self._summarize(weather_data)["threshold_values"]
+    
+    def _summarize(self, data: Optional[WeatherData]) -> Dict[str, Dict[str, Any]]:
+        """
+        Berechnet Maximalwerte sowie Schwellen- und Maximalzeitpunkte eines
+        Tages in einem einzigen Durchlauf über alle Punkte.
+        
+        Args:
+            data: Wetterdaten eines Tages
+            
+        Returns:
+            Dictionary mit 'max_values' (wie WeatherData.get_max_values) und
+            'threshold_values' (Schwellen- und Maximalwerte mit Zeitpunkten)
+        """
+        threshold_values: Dict[str, Any] = {
+            'rain_prob_threshold': None,
+            'rain_prob_time_threshold': None,
+            'rain_amt_threshold': None,
+            'rain_amt_time_threshold': None,
+            'rain_prob_max': None,
+            'rain_prob_time_max': None,
+            'rain_amt_max': None,
+            'rain_amt_time_max': None,
+            'thunder_prob_threshold': None,
+            'thunder_time_threshold': None,
+            'thunder_prob_max': None,
+            'thunder_time_max': None
+        }
+        if not data or not data.points:
+            return {
+                "max_values": {},
+                "threshold_values": threshold_values,
+                "rolling_metrics": self._rolling_metrics(data),
+                "ensemble_probabilities": self.aggregate_ensemble(data.ensemble if data else None),
+                "model_comparison": self.compare_models(data.models if data else None)
+            }
+        
         rain_prob_thresh = self.thresholds.get('regen', 0)
         rain_amt_thresh = self.thresholds.get('regenmenge', 0)
         thunder_thresh = self.thresholds.get('gewitter', 0)
-
+        
+        first = data.points[0]
+        max_temperature = first.temperature
+        max_feels_like = first.feels_like
+        max_precipitation = first.precipitation
+        max_thunderstorm = first.thunderstorm_probability or 0
+        max_wind_speed = first.wind_speed
+        max_cloud_cover = None
+        
         max_rain_prob = -1
         max_rain_amt = -1
         max_thunder_prob = -1
+        tv = threshold_values
         
-        for p in weather_data.points:
+        for p in data.points:
+            # Maximalwerte über alle Punkte
+            if p.temperature > max_temperature:
+                max_temperature = p.temperature
+            if p.feels_like > max_feels_like:
+                max_feels_like = p.feels_like
+            if p.wind_speed > max_wind_speed:
+                max_wind_speed = p.wind_speed
+            if p.cloud_cover is not None and (max_cloud_cover is None or p.cloud_cover > max_cloud_cover):
+                max_cloud_cover = p.cloud_cover
+            
             # Niederschlagsmenge (mm)
             if p.precipitation is not None:
-                if rain_amt_threshold is None and p.precipitation >= rain_amt_thresh:
-                    rain_amt_threshold = p.precipitation
-                    rain_amt_time_threshold = p.time.strftime('%H:%M')
+                if max_precipitation is None or p.precipitation > max_precipitation:
+                    max_precipitation = p.precipitation
+                if tv['rain_amt_threshold'] is None and p.precipitation >= rain_amt_thresh:
+                    tv['rain_amt_threshold'] = p.precipitation
+                    tv['rain_amt_time_threshold'] = p.time.strftime('%H:%M')
                 if p.precipitation > max_rain_amt:
                     max_rain_amt = p.precipitation
-                    rain_amt_max = p.precipitation
-                    rain_amt_time_max = p.time.strftime('%H:%M')
+                    tv['rain_amt_max'] = p.precipitation
+                    tv['rain_amt_time_max'] = p.time.strftime('%H:%M')
             
             # Regenwahrscheinlichkeit (%)
-            if hasattr(p, 'rain_probability') and p.rain_probability is not None:
-                if rain_prob_threshold is None and p.rain_probability >= rain_prob_thresh:
-                    rain_prob_threshold = int(p.rain_probability)
-                    rain_prob_time_threshold = p.time.strftime('%H:%M')
+            if p.rain_probability is not None:
+                if tv['rain_prob_threshold'] is None and p.rain_probability >= rain_prob_thresh:
+                    tv['rain_prob_threshold'] = int(p.rain_probability)
+                    tv['rain_prob_time_threshold'] = p.time.strftime('%H:%M')
                 if p.rain_probability > max_rain_prob:
                     max_rain_prob = int(p.rain_probability)
-                    rain_prob_max = int(p.rain_probability)
-                    rain_prob_time_max = p.time.strftime('%H:%M')
+                    tv['rain_prob_max'] = int(p.rain_probability)
+                    tv['rain_prob_time_max'] = p.time.strftime('%H:%M')
             
             # Gewitterwahrscheinlichkeit
             if p.thunderstorm_probability is not None:
-                if thunder_prob_threshold is None and p.thunderstorm_probability >= thunder_thresh:
-                    thunder_prob_threshold = int(p.thunderstorm_probability)
-                    thunder_time_threshold = p.time.strftime('%H:%M')
+                if p.thunderstorm_probability > max_thunderstorm:
+                    max_thunderstorm = p.thunderstorm_probability
+                if tv['thunder_prob_threshold'] is None and p.thunderstorm_probability >= thunder_thresh:
+                    tv['thunder_prob_threshold'] = int(p.thunderstorm_probability)
+                    tv['thunder_time_threshold'] = p.time.strftime('%H:%M')
                 if p.thunderstorm_probability > max_thunder_prob:
                     max_thunder_prob = int(p.thunderstorm_probability)
-                    thunder_prob_max = int(p.thunderstorm_probability)
-                    thunder_time_max = p.time.strftime('%H:%M')
+                    tv['thunder_prob_max'] = int(p.thunderstorm_probability)
+                    tv['thunder_time_max'] = p.time.strftime('%H:%M')
         
         # Fallback: if no threshold exceeded, use max values
-        if rain_amt_threshold is None and rain_amt_max is not None:
-            rain_amt_threshold = rain_amt_max
-            rain_amt_time_threshold = rain_amt_time_max
-        if rain_prob_threshold is None and rain_prob_max is not None:
-            rain_prob_threshold = rain_prob_max
-            rain_prob_time_threshold = rain_prob_time_max
-        if thunder_prob_threshold is None and thunder_prob_max is not None:
-            thunder_prob_threshold = thunder_prob_max
-            thunder_time_threshold = thunder_time_max
+        if tv['rain_amt_threshold'] is None and tv['rain_amt_max'] is not None:
+            tv['rain_amt_threshold'] = tv['rain_amt_max']
+            tv['rain_amt_time_threshold'] = tv['rain_amt_time_max']
+        if tv['rain_prob_threshold'] is None and tv['rain_prob_max'] is not None:
+            tv['rain_prob_threshold'] = tv['rain_prob_max']
+            tv['rain_prob_time_threshold'] = tv['rain_prob_time_max']
+        if tv['thunder_prob_threshold'] is None and tv['thunder_prob_max'] is not None:
+            tv['thunder_prob_threshold'] = tv['thunder_prob_max']
+            tv['thunder_time_threshold'] = tv['thunder_time_max']
         
+        max_values = {
+            "temperature": max_temperature,
+            "feels_like": max_feels_like,
+            "precipitation": max_precipitation if max_precipitation is not None else 0,
+            "thunderstorm_probability": max_thunderstorm,
+            "wind_speed": max_wind_speed,
+            "cloud_cover": max_cloud_cover
+        }
         return {
-            'rain_prob_threshold': rain_prob_threshold,
-            'rain_prob_time_threshold': rain_prob_time_threshold,
-            'rain_amt_threshold': rain_amt_threshold,
-            'rain_amt_time_threshold': rain_amt_time_threshold,
-            'rain_prob_max': rain_prob_max,
-            'rain_prob_time_max': rain_prob_time_max,
-            'rain_amt_max': rain_amt_max,
-            'rain_amt_time_max': rain_amt_time_max,
-            'thunder_prob_threshold': thunder_prob_threshold,
-            'thunder_time_threshold': thunder_time_threshold,
-            'thunder_prob_max': thunder_prob_max,
-            'thunder_time_max': thunder_time_max
+            "max_values": max_values,
+            "threshold_values": threshold_values,
+            "rolling_metrics": self._rolling_metrics(data),
+            "ensemble_probabilities": self.aggregate_ensemble(data.ensemble),
+            "model_comparison": self.compare_models(data.models)
         }
     
-    def aggregate_evening_report(
-        self,
-        stage_name: str,
-        date: datetime,
-        weather: StageWeather
-    ) -> WeatherReport:
+    def _rolling_config(self) -> List[Tuple[str, str, str, int]]:
         """
-        Erstellt einen Abendbericht.
+        Liest die gleitenden Kennzahlen aus den Schwellenwerten.
+        
+        Returns:
+            Liste von (Schlüssel, Feld, Reduktion, Fensterbreite)
+        """
+        specs = []
+        for key in self.thresholds:
+            match = _ROLLING_KEY.match(str(key))
+            if not match or match.group("metric") not in ROLLING_METRICS:
+                continue
+            field, reduction = ROLLING_METRICS[match.group("metric")]
+            specs.append((key, field, reduction, int(match.group("hours"))))
+        return specs
+    
+    def _rolling_metrics(self, data: Optional[WeatherData]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Berechnet die konfigurierten gleitenden Kennzahlen über alle Standorte.
+        
+        Jede Zeitreihe wird pro Kennzahl genau einmal linear durchlaufen, die
+        Gesamtkosten bleiben damit linear in der Anzahl der Messwerte.
         
         Args:
-            stage_name: Name der Etappe
-            date: Datum
-            weather: Wetterdaten
+            data: Wetterdaten eines Tages
             
         Returns:
-            WeatherReport-Objekt
+            Dictionary Schlüssel -> {value, time, threshold, exceeded} oder None,
+            wenn keine gleitenden Schwellen konfiguriert sind
         """
-        # Nachttemperatur vom letzten Punkt der heutigen Etappe
-        night_temp = self._get_night_temperature(weather.today)
-        
-        # Maximalwerte für die morgige Etappe
-        max_values = self._get_max_values(weather.tomorrow) if weather.tomorrow else {}
+        specs = self._rolling_config()
+        if not specs:
+            return None
+        series = data.get_hourly_series() if data else {}
+        metrics: Dict[str, Dict[str, Any]] = {}
+        for key, field, reduction, hours in specs:
+            best_value = None
+            best_time = None
+            for columns in series.values():
+                values = columns[field]
+                windowed = _ROLLING_FUNCTIONS[reduction](values, hours)
+                offset = _window_bounds(len(values), hours) - 1
+                for i, value in enumerate(windowed):
+                    if best_value is None or value > best_value:
+                        best_value = value
+                        best_time = columns["time"][i + offset].strftime('%H:%M')
+            threshold = self.thresholds[key]
+            metrics[key] = {
+                "value": round(best_value, 1) if best_value is not None else None,
+                "time": best_time,
+                "threshold": threshold,
+                "exceeded": best_value is not None and best_value >= threshold
+            }
+        return metrics
+    
+    def aggregate_ensemble(self, ensembles: Optional[List[EnsembleData]]) -> Optional[Dict[str, float]]:
+        """
+        Berechnet je Risiko die Wahrscheinlichkeit, dass die Schwelle an
+        irgendeinem Punkt der Etappe zu irgendeiner Stunde überschritten wird.
         
-        # Gewitterwahrscheinlichkeit für übermorgen
-        thunderstorm_plus1 = self._get_next_day_thunderstorm(weather.day_after_tomorrow)
+        Die Reduktion erfolgt als Member×Stunden-Matrix: zuerst das Maximum
+        je Member über die Stunden, dann elementweise über die Punkte, zuletzt
+        der Anteil der Member über der Schwelle.
         
-        # Zeitpunkte aus den Wetterdaten extrahieren (angenommen, WeatherData hat ein Attribut .meta oder .extras mit diesen Infos)
-        rain_time_threshold = weather.tomorrow.rain_time_threshold if weather.tomorrow else None
-        rain_time_max = weather.tomorrow.rain_time_max if weather.tomorrow else None
-        thunder_time_threshold = weather.tomorrow.thunder_time_threshold if weather.tomorrow else None
-        thunder_time_max = weather.tomorrow.thunder_time_max if weather.tomorrow else None
+        Args:
+            ensembles: Ensemble-Vorhersagen je Etappenpunkt
+            
+        Returns:
+            Dictionary Risiko -> Anteil der Member (0..1) oder None ohne Ensemble
+        """
+        if not ensembles:
+            return None
+        probabilities: Dict[str, float] = {}
+        for risk, (variable, threshold_key) in ENSEMBLE_RISKS.items():
+            threshold = self.thresholds.get(threshold_key)
+            if threshold is None:
+                continue
+            stage_maxima: Optional[List[Optional[float]]] = None
+            for ensemble in ensembles:
+                matrix = ensemble.members.get(variable)
+                if not matrix:
+                    continue
+                maxima = _member_maxima(matrix)
+                stage_maxima = maxima if stage_maxima is None else _elementwise_max(stage_maxima, maxima)
+            if not stage_maxima:
+                continue
+            exceeding = sum(1 for v in stage_maxima if v is not None and v >= threshold)
+            probabilities[risk] = round(exceeding / len(stage_maxima), 2)
+        return probabilities
+    
+    def compare_models(self, datasets: Optional[List[MultiModelData]]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Vergleicht die Modelle nebeneinander: Maximum je Modell über alle
+        Punkte und Stunden, Streuung zwischen den Modellen und daraus die
+        Übereinstimmung (hoch/mittel/niedrig) relativ zur Schwelle.
         
-        # Schwellen- und Maximalwerte extrahieren
-        threshold_values = self._extract_threshold_and_max_values(weather.tomorrow) if weather.tomorrow else {}
+        Args:
+            datasets: Mehrmodell-Vorhersagen je Etappenpunkt
+            
+        Returns:
+            Dictionary Variable -> {models, spread, agreement} oder None
+        """
+        if not datasets:
+            return None
+        comparison: Dict[str, Dict[str, Any]] = {}
+        for variable, threshold_key in MODEL_VARIABLES.items():
+            peaks: Dict[str, float] = {}
+            for data in datasets:
+                for model, series in data.values.get(variable, {}).items():
+                    peak = max([v for v in series if v is not None], default=None)
+                    if peak is not None and (model not in peaks or peak > peaks[model]):
+                        peaks[model] = peak
+            if not peaks:
+                continue
+            spread = max(peaks.values()) - min(peaks.values())
+            threshold = self.thresholds.get(threshold_key) or 0
+            ratio = spread / threshold if threshold else 0
+            agreement = next((level for limit, level in MODEL_AGREEMENT if ratio <= limit), "niedrig")
+            comparison[variable] = {
+                "models": {model: round(peak, 1) for model, peak in peaks.items()},
+                "spread": round(spread, 1),
+                "agreement": agreement
+            }
+        return comparison
+    
+    def _model_confidence(self, comparison: Optional[Dict[str, Dict[str, Any]]]) -> Optional[str]:
+        """Gesamtkonfidenz: die schlechteste Übereinstimmung aller Variablen"""
+        if not comparison:
+            return None
+        order = [level for _, level in MODEL_AGREEMENT] + ["niedrig"]
+        return max((entry["agreement"] for entry in comparison.values()), key=order.index)
+    
+    def _cached_summary(
+        self,
+        data: Optional[WeatherData],
+        cache: Dict[int, Dict[str, Dict[str, Any]]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Liefert die Zusammenfassung eines Tages, berechnet sie aber nur einmal
+        pro WeatherData-Objekt.
         
-        return WeatherReport(
-            mode=ReportMode.EVENING,
-            stage_name=stage_name,
-            date=date,
-            night_temperature=night_temp,
-            max_temperature=max_values.get("temperature", 0),
-            max_feels_like=max_values.get("feels_like", 0),
-            max_precipitation=max_values.get("precipitation", 0),
-            max_precipitation_probability=max_values.get("precipitation_probability", None),
-            max_thunderstorm_probability=max_values.get("thunderstorm_probability"),
-            max_wind_speed=max_values.get("wind_speed", 0),
-            max_cloud_cover=max_values.get("cloud_cover", 0),
-            next_day_thunderstorm=self._get_next_day_thunderstorm(weather.tomorrow),
-            thunderstorm_plus1=thunderstorm_plus1,
-            text="",  # Wird später generiert
-            rain_time_threshold=rain_time_threshold,
-            rain_time_max=rain_time_max,
-            thunder_time_threshold=thunder_time_threshold,
-            thunder_time_max=thunder_time_max,
-            # Schwellen- und Maximalwerte
-            rain_prob_threshold=threshold_values.get('rain_prob_threshold'),
-            rain_prob_time_threshold=threshold_values.get('rain_prob_time_threshold'),
-            rain_amt_threshold=threshold_values.get('rain_amt_threshold'),
-            rain_amt_time_threshold=threshold_values.get('rain_amt_time_threshold'),
-            rain_prob_max=threshold_values.get('rain_prob_max'),
-            rain_prob_time_max=threshold_values.get('rain_prob_time_max'),
-            rain_amt_max=threshold_values.get('rain_amt_max'),
-            rain_amt_time_max=threshold_values.get('rain_amt_time_max'),
-            thunder_prob_threshold=threshold_values.get('thunder_prob_threshold'),
-            thunder_prob_time_threshold=threshold_values.get('thunder_time_threshold'),
-            thunder_prob_max=threshold_values.get('thunder_prob_max'),
-            thunder_prob_time_max=threshold_values.get('thunder_time_max')
-        )
+        Args:
+            data: Wetterdaten eines Tages
+            cache: Zwischenspeicher, geteilt zwischen den Berichtsmodi
+            
+        Returns:
+            Zusammenfassung wie von _summarize
+        """
+        key = id(data)
+        if key not in cache:
+            cache[key] = self._summarize(data)
+        return cache[key]
     
-    def aggregate_morning_report(
+    def _build_report(
         self,
+        mode: ReportMode,
         stage_name: str,
         date: datetime,
-        weather: StageWeather
+        summary: Dict[str, Dict[str, Any]],
+        **extra: Any
     ) -> WeatherReport:
         """
-        Erstellt einen Morgenbericht.
+        Baut einen WeatherReport aus einer Tageszusammenfassung.
         
         Args:
+            mode: Berichtsmodus
             stage_name: Name der Etappe
             date: Datum
-            weather: Wetterdaten
+            summary: Zusammenfassung des relevanten Tages
+            **extra: Modusspezifische Felder (Nachttemperatur, Gewitter +1, ...)
             
         Returns:
             WeatherReport-Objekt
         """
-        # Maximalwerte für die heutige Etappe
-        max_values = self._get_max_values(weather.today)
-        
-        # Gewitterwahrscheinlichkeit für morgen
-        next_day_thunderstorm = self._get_next_day_thunderstorm(weather.tomorrow)
-        
-        # Schwellen- und Maximalwerte extrahieren
-        threshold_values = self._extract_threshold_and_max_values(weather.today)
-        
+        max_values = summary["max_values"]
+        threshold_values = summary["threshold_values"]
         return WeatherReport(
-            mode=ReportMode.MORNING,
+            mode=mode,
             stage_name=stage_name,
             date=date,
-            night_temperature=None,  # Keine Nachttemperatur im Morgenbericht
+            night_temperature=extra.pop("night_temperature", None),
             max_temperature=max_values.get("temperature", 0),
             max_feels_like=max_values.get("feels_like", 0),
             max_precipitation=max_values.get("precipitation", 0),
@@ -255,7 +479,7 @@ class WeatherAggregator:
             max_thunderstorm_probability=max_values.get("thunderstorm_probability"),
             max_wind_speed=max_values.get("wind_speed", 0),
             max_cloud_cover=max_values.get("cloud_cover", 0),
-            next_day_thunderstorm=next_day_thunderstorm,
+            next_day_thunderstorm=extra.pop("next_day_thunderstorm", None),
             text="",  # Wird später generiert
             # Schwellen- und Maximalwerte
             rain_prob_threshold=threshold_values['rain_prob_threshold'],
@@ -269,15 +493,132 @@ class WeatherAggregator:
             thunder_prob_threshold=threshold_values['thunder_prob_threshold'],
             thunder_prob_time_threshold=threshold_values['thunder_time_threshold'],
             thunder_prob_max=threshold_values['thunder_prob_max'],
-            thunder_prob_time_max=threshold_values['thunder_time_max']
+            thunder_prob_time_max=threshold_values['thunder_time_max'],
+            rolling_metrics=summary.get("rolling_metrics"),
+            ensemble_probabilities=summary.get("ensemble_probabilities"),
+            model_comparison=summary.get("model_comparison"),
+            model_confidence=self._model_confidence(summary.get("model_comparison")),
+            **extra
         )
     
-    def aggregate_day_warning(
+    def _build_evening_report(
+        self,
+        stage_name: str,
+        date: datetime,
+        weather: StageWeather,
+        cache: Dict[int, Dict[str, Dict[str, Any]]]
+    ) -> WeatherReport:
+        """Baut den Abendbericht aus (ggf. bereits berechneten) Zusammenfassungen."""
+        tomorrow = self._cached_summary(weather.tomorrow, cache)
+        day_after = self._cached_summary(weather.day_after_tomorrow, cache)
+        return self._build_report(
+            ReportMode.EVENING,
+            stage_name,
+            date,
+            tomorrow,
+            # Nachttemperatur vom letzten Punkt der heutigen Etappe
+            night_temperature=self._get_night_temperature(weather.today),
+            next_day_thunderstorm=(
+                tomorrow["max_values"].get("thunderstorm_probability") if weather.tomorrow else None
+            ),
+            # Gewitterwahrscheinlichkeit für übermorgen
+            thunderstorm_plus1=(
+                day_after["max_values"].get("thunderstorm_probability") if weather.day_after_tomorrow else None
+            ),
+            rain_time_threshold=weather.tomorrow.rain_time_threshold if weather.tomorrow else None,
+            rain_time_max=weather.tomorrow.rain_time_max if weather.tomorrow else None,
+            thunder_time_threshold=weather.tomorrow.thunder_time_threshold if weather.tomorrow else None,
+            thunder_time_max=weather.tomorrow.thunder_time_max if weather.tomorrow else None
+        )
+    
+    def _build_morning_report(
+        self,
+        stage_name: str,
+        date: datetime,
+        weather: StageWeather,
+        cache: Dict[int, Dict[str, Dict[str, Any]]]
+    ) -> WeatherReport:
+        """Baut den Morgenbericht aus (ggf. bereits berechneten) Zusammenfassungen."""
+        tomorrow = self._cached_summary(weather.tomorrow, cache)
+        return self._build_report(
+            ReportMode.MORNING,
+            stage_name,
+            date,
+            self._cached_summary(weather.today, cache),
+            # Gewitterwahrscheinlichkeit für morgen
+            next_day_thunderstorm=(
+                tomorrow["max_values"].get("thunderstorm_probability") if weather.tomorrow else None
+            )
+        )
+    
+    def _build_day_warning(
+        self,
+        stage_name: str,
+        date: datetime,
+        weather: StageWeather,
+        cache: Dict[int, Dict[str, Dict[str, Any]]]
+    ) -> Optional[WeatherReport]:
+        """Baut die Tageswarnung, falls eine signifikante Verschlechterung vorliegt."""
+        today = self._cached_summary(weather.today, cache)
+        max_values = today["max_values"]
+        rolling = today.get("rolling_metrics") or {}
+        
+        # Prüfe auf signifikante Verschlechterung
+        if (max_values.get("precipitation", 0) > self.thresholds["regen"] or
+            (max_values.get("thunderstorm_probability") or 0) > self.thresholds["gewitter"] or
+            max_values.get("wind_speed", 0) > self.thresholds["wind"] or
+            any(metric["exceeded"] for metric in rolling.values())):
+            # Keine Vorhersage für morgen
+            return self._build_report(ReportMode.DAY, stage_name, date, today)
+        
+        return None
+    
+    def aggregate_evening_report(
+        self,
+        stage_name: str,
+        date: datetime,
+        weather: StageWeather
+    ) -> WeatherReport:
+        """
+        Erstellt einen Abendbericht.
+        
+        Args:
+            stage_name: Name der Etappe
+            date: Datum
+            weather: Wetterdaten
+            
+        Returns:
+            WeatherReport-Objekt
+        """
+        return self._build_evening_report(stage_name, date, weather, {})
+    
+    def aggregate_morning_report(
         self,
         stage_name: str,
         date: datetime,
         weather: StageWeather
     ) -> WeatherReport:
+        """
+        Erstellt einen Morgenbericht.
+        
+        Args:
+            stage_name: Name der Etappe
+            date: Datum
+            weather: Wetterdaten
+            
+        Returns:
+            WeatherReport-Objekt
+        """
+        return self._build_morning_report(stage_name, date, weather, {})
+    
+    def aggregate_day_warning(
+        self,
+        stage_name: str,
+        date: datetime,
+        weather: StageWeather,
+        snapshot: Optional[ForecastSnapshot] = None,
+        state: Optional[WarningState] = None
+    ) -> Optional[WeatherReport]:
         """
         Erstellt eine Tageswarnung bei signifikanter Verschlechterung.
         
@@ -285,48 +626,102 @@ class WeatherAggregator:
             stage_name: Name der Etappe
             date: Datum
             weather: Wetterdaten
+            snapshot: Snapshot des Morgenberichts; wenn vorhanden, wird nur
+                gegen ihn verglichen statt absolut gegen die Schwellen
+            state: Warnzustand; unterdrückt Wiederholungen (Hysterese,
+                Tagesbudget) und wird dabei aktualisiert
             
         Returns:
             WeatherReport-Objekt oder None wenn keine Warnung nötig
         """
-        # Maximalwerte für die heutige Etappe
-        max_values = self._get_max_values(weather.today)
+        cache: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        if snapshot is None:
+            report = self._build_day_warning(stage_name, date, weather, cache)
+        else:
+            deltas = self.compute_deltas(snapshot, weather.today)
+            report = None
+            if deltas["worsened"]:
+                today = self._cached_summary(weather.today, cache)
+                report = self._build_report(ReportMode.DAY, stage_name, date, today, deltas=deltas["max_increase"])
+        if state is None:
+            return report
         
-        # Prüfe auf signifikante Verschlechterung
-        if (max_values.get("precipitation", 0) > self.thresholds["regen"] or
-            max_values.get("thunderstorm_probability", 0) > self.thresholds["gewitter"] or
-            max_values.get("wind_speed", 0) > self.thresholds["wind"]):
-            
-            # Schwellen- und Maximalwerte extrahieren
-            threshold_values = self._extract_threshold_and_max_values(weather.today)
+        current = report or self._build_report(ReportMode.DAY, stage_name, date, self._cached_summary(weather.today, cache))
+        values = {risk: getattr(current, attribute) for risk, (attribute, _, _) in WARNING_RISKS.items()}
+        # Gleitende Kennzahlen zählen als eigene Risiken mit ihrer Schwelle
+        values.update({key: metric["value"] for key, metric in (current.rolling_metrics or {}).items()})
+        increases = deltas["worsened_fields"] if snapshot is not None else None
+        day = date.date() if isinstance(date, datetime) else date
+        if report is None:
+            # Auch ohne Warnung fortschreiben, damit Risiken unter dem Hystereseband enden
+            state.observe(values, day, increases)
+            return None
+        if not state.decide(values, day, increases):
+            return None
+        return report
+    
+    def compute_deltas(self, snapshot: ForecastSnapshot, data: WeatherData) -> Dict[str, Any]:
+        """
+        Stündliche Änderungen je Punkt gegenüber dem Snapshot. Nur Stunden,
+        die sich geändert haben, werden ausgewertet.
+        
+        Args:
+            snapshot: Snapshot des Morgenberichts
+            data: Aktuelle Wetterdaten des Tages
             
-            return WeatherReport(
-                mode=ReportMode.DAY,
-                stage_name=stage_name,
-                date=date,
-                night_temperature=None,
-                max_temperature=max_values.get("temperature", 0),
-                max_feels_like=max_values.get("feels_like", 0),
-                max_precipitation=max_values.get("precipitation", 0),
-                max_precipitation_probability=max_values.get("precipitation_probability", None),
-                max_thunderstorm_probability=max_values.get("thunderstorm_probability"),
-                max_wind_speed=max_values.get("wind_speed", 0),
-                max_cloud_cover=max_values.get("cloud_cover", 0),
-                next_day_thunderstorm=None,  # Keine Vorhersage für morgen
-                text="",  # Wird später generiert
-                # Schwellen- und Maximalwerte
-                rain_prob_threshold=threshold_values['rain_prob_threshold'],
-                rain_prob_time_threshold=threshold_values['rain_prob_time_threshold'],
-                rain_amt_threshold=threshold_values['rain_amt_threshold'],
-                rain_amt_time_threshold=threshold_values['rain_amt_time_threshold'],
-                rain_prob_max=threshold_values['rain_prob_max'],
-                rain_prob_time_max=threshold_values['rain_prob_time_max'],
-                rain_amt_max=threshold_values['rain_amt_max'],
-                rain_amt_time_max=threshold_values['rain_amt_time_max'],
-                thunder_prob_threshold=threshold_values['thunder_prob_threshold'],
-                thunder_prob_time_threshold=threshold_values['thunder_time_threshold'],
-                thunder_prob_max=threshold_values['thunder_prob_max'],
-                thunder_prob_time_max=threshold_values['thunder_time_max']
-            )
+        Returns:
+            Dictionary mit 'max_increase' (Feld -> größter Anstieg),
+            'worsened' (signifikante Verschlechterung), 'worsened_fields'
+            (Feld -> größter signifikanter Anstieg) und 'changed_hours'
+        """
+        delta_limit = self.thresholds.get("delta_prozent", 0)
+        max_increase: Dict[str, float] = {}
+        worsened_fields: Dict[str, float] = {}
+        changed_hours = 0
+        for hours in snapshot.diff(data).values():
+            changed_hours += len(hours)
+            for changes in hours.values():
+                for name, (old, new) in changes.items():
+                    increase = (new or 0) - (old or 0)
+                    if increase > max_increase.get(name, 0):
+                        max_increase[name] = round(increase, 1)
+                    if name in DELTA_PERCENT_FIELDS:
+                        # Wahrscheinlichkeiten: Anstieg um mindestens delta_prozent Punkte
+                        significant = bool(delta_limit and increase >= delta_limit)
+                    else:
+                        # Mengen: Schwelle neu überschritten
+                        threshold = self.thresholds.get(DELTA_THRESHOLDS.get(name, ""))
+                        significant = bool(threshold and (new or 0) > threshold >= (old or 0))
+                    if significant and increase > worsened_fields.get(name, float("-inf")):
+                        worsened_fields[name] = round(increase, 1)
+        return {
+            "max_increase": max_increase,
+            "worsened": bool(worsened_fields),
+            "worsened_fields": worsened_fields,
+            "changed_hours": changed_hours
+        }
+    
+    def aggregate_all_modes(
+        self,
+        stage_name: str,
+        date: datetime,
+        weather: StageWeather
+    ) -> Dict[ReportMode, Optional[WeatherReport]]:
+        """
+        Erstellt Abendbericht, Morgenbericht und Tageswarnung aus einem
+        gemeinsamen Datensatz. Jeder Tag wird dabei nur einmal ausgewertet.
         
-        return None 
\ No newline at end of file
+        Args:
+            stage_name: Name der Etappe
+            date: Datum
+            weather: Wetterdaten
+            
+        Returns:
+            Dictionary ReportMode -> WeatherReport (Tageswarnung ggf. None)
+        """
+        cache: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        return {
+            ReportMode.EVENING: self._build_evening_report(stage_name, date, weather, cache),
+            ReportMode.MORNING: self._build_morning_report(stage_name, date, weather, cache),
+            ReportMode.DAY: self._build_day_warning(stage_name, date, weather, cache)
+        }
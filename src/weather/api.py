@@ -1,8 +1,11 @@
 import logging
+import math
 import requests
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-from src.weather.models import WeatherPoint, WeatherData
+import time
+from datetime import datetime, date, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+from src.weather.models import WeatherPoint, WeatherData, EnsembleData, MultiModelData
+from src.weather.forecast_cache import FRESH_SECONDS, ForecastCache
 
 logger = logging.getLogger(__name__)
 
@@ -22,35 +25,101 @@ class WeatherAPIClient:
     """Client für die Open-Meteo API"""
     
     BASE_URL = "https://api.open-meteo.com/v1/forecast"
+    ENSEMBLE_URL = "https://ensemble-api.open-meteo.com/v1/ensemble"
     
-    def __init__(self, timeout: int = 30):
+    # Ensemble-Variablen der API -> Feldnamen im Projekt
+    ENSEMBLE_VARIABLES = {
+        "precipitation": "precipitation",
+        "wind_speed_10m": "wind_speed",
+        "apparent_temperature": "feels_like",
+    }
+    
+    # Variablen für den Modellvergleich -> Feldnamen im Projekt
+    MULTI_MODEL_VARIABLES = {
+        "precipitation": "precipitation",
+        "wind_speed_10m": "wind_speed",
+        "apparent_temperature": "feels_like",
+    }
+    DEFAULT_MODELS = ("icon_seamless", "meteofrance_seamless", "ecmwf_ifs025")
+    
+    # Tageswerte für den groben ersten Abruf (siehe src.weather.phased)
+    DAILY_VARIABLES = (
+        "temperature_2m_max",
+        "temperature_2m_min",
+        "apparent_temperature_max",
+        "apparent_temperature_min",
+        "precipitation_sum",
+        "precipitation_probability_max",
+        "wind_speed_10m_max",
+        "wind_direction_10m_dominant",
+        "weather_code",
+    )
+    
+    # Punkte innerhalb derselben Zelle (Grad) teilen sich eine Anfrage
+    GRID_RESOLUTION = 0.025
+    
+    def __init__(
+        self,
+        timeout: int = 30,
+        session: Optional[requests.Session] = None,
+        cache: Optional[ForecastCache] = None,
+        max_age: float = FRESH_SECONDS
+    ):
+        """
+        Args:
+            timeout: Timeout je Anfrage in Sekunden
+            session: Gemeinsame HTTP-Sitzung, deren Verbindungen über mehrere
+                Läufe offen bleiben (Daemon); ohne wird requests.get verwendet
+            cache: Antwort-Cache (z.B. vom Vorwärmer gefüllt); ohne wird immer abgerufen
+            max_age: Höchstalter eines Cache-Eintrags, der den Abruf ersetzt
+                (0: immer abrufen und den Cache nur schreiben)
+        """
         self.timeout = timeout
+        self.session = session
+        self.cache = cache
+        self.max_age = max_age
     
-    def _make_request(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    def _make_request(self, params: Dict[str, Any], url: Optional[str] = None) -> Dict[str, Any]:
         """
         Führt eine API-Anfrage durch.
         
         Args:
             params: API-Parameter
+            url: Abweichender Endpunkt (Standard: BASE_URL)
             
         Returns:
             API-Antwort als Dictionary
             
         Raises:
-            WeatherAPIRequestError: Bei Fehlern der API-Anfrage
+            WeatherAPIRequestError: Bei Fehlern der API-Anfrage (und ohne
+                ausreichend aktuellen Cache-Eintrag)
         """
+        url = url or self.BASE_URL
+        if self.cache is not None and self.max_age > 0:
+            entry = self.cache.get(url, params, self.max_age)
+            if entry is not None:
+                return entry["data"]
         try:
-            response = requests.get(
-                self.BASE_URL,
+            response = (self.session or requests).get(
+                url,
                 params=params,
                 timeout=self.timeout
             )
             response.raise_for_status()
-            return response.json()
+            data = response.json()
         except requests.RequestException as e:
-            raise WeatherAPIRequestError(f"API-Anfrage fehlgeschlagen: {str(e)}")
+            # Bei Ausfall der API auf den letzten abgerufenen Stand zurückfallen
+            entry = self.cache.get(url, params, self.cache.stale_seconds) if self.cache is not None else None
+            if entry is None:
+                raise WeatherAPIRequestError(f"API-Anfrage fehlgeschlagen: {str(e)}")
+            age = (time.time() - entry["fetched"]) / 60
+            logger.warning(f"API-Anfrage fehlgeschlagen ({e}), verwende Daten von vor {age:.0f} min")
+            return entry["data"]
         except ValueError as e:
             raise WeatherAPIParseError(f"Ungültige API-Antwort: {str(e)}")
+        if self.cache is not None:
+            self.cache.put(url, params, data)
+        return data
     
     def _parse_weather_point(
         self,
@@ -97,9 +166,10 @@ class WeatherAPIClient:
         self,
         latitude: float,
         longitude: float,
-        elevation: float,
+        elevation: Optional[float],
         start_date: datetime,
-        end_date: datetime
+        end_date: datetime,
+        model_elevation: bool = False
     ) -> WeatherData:
         """
         Holt Wetterdaten für einen Zeitraum.
@@ -107,9 +177,10 @@ class WeatherAPIClient:
         Args:
             latitude: Breitengrad
             longitude: Längengrad
-            elevation: Höhe
+            elevation: Höhe (None: Geländehöhe am Punkt, von Open-Meteo korrigiert)
             start_date: Startdatum
             end_date: Enddatum
+            model_elevation: Werte auf Modellhöhe ohne Höhenkorrektur abrufen
             
         Returns:
             WeatherData-Objekt
@@ -117,10 +188,124 @@ class WeatherAPIClient:
         Raises:
             WeatherAPIError: Bei API-Fehlern
         """
+        params = self._weather_params(latitude, longitude, elevation, start_date, end_date, model_elevation)
+        response = self._make_request(params)
+        return self._parse_weather(response, latitude, longitude, elevation)
+    
+    def get_weather_batch(
+        self,
+        coordinates: List[Tuple[float, float]],
+        start_date: datetime,
+        end_date: datetime,
+        model_elevation: bool = True
+    ) -> List[WeatherData]:
+        """
+        Holt Wetterdaten für mehrere Koordinaten mit einer einzigen Anfrage
+        (kommagetrennte Koordinaten).
+        
+        Args:
+            coordinates: Liste von (Breitengrad, Längengrad)
+            start_date: Startdatum
+            end_date: Enddatum
+            model_elevation: Werte auf Modellhöhe (für die Höhenkorrektur je
+                Punkt); sonst auf die Geländehöhe jeder Koordinate korrigiert
+            
+        Returns:
+            WeatherData je Koordinate in derselben Reihenfolge
+            
+        Raises:
+            WeatherAPIError: Bei API-Fehlern
+        """
+        if not coordinates:
+            return []
+        params = self._weather_params(
+            ",".join(str(lat) for lat, _ in coordinates),
+            ",".join(str(lon) for _, lon in coordinates),
+            None,
+            start_date,
+            end_date,
+            model_elevation
+        )
+        response = self._make_request(params)
+        # Bei einer einzelnen Koordinate liefert die API ein Objekt statt einer Liste
+        responses = response if isinstance(response, list) else [response]
+        if len(responses) != len(coordinates):
+            raise WeatherAPIParseError(
+                f"{len(responses)} Antworten für {len(coordinates)} Koordinaten erhalten"
+            )
+        return [
+            self._parse_weather(item, lat, lon, None)
+            for item, (lat, lon) in zip(responses, coordinates)
+        ]
+    
+    def get_daily_batch(
+        self,
+        coordinates: List[Tuple[float, float]],
+        start_date: datetime,
+        end_date: datetime,
+        model_elevation: bool = True
+    ) -> List[Tuple[Optional[float], Dict[date, Dict[str, Any]]]]:
+        """
+        Holt nur die Tageswerte (DAILY_VARIABLES) für mehrere Koordinaten mit
+        einer einzigen Anfrage.
+        
+        Args:
+            coordinates: Liste von (Breitengrad, Längengrad)
+            start_date: Startdatum
+            end_date: Enddatum
+            model_elevation: Werte auf Modellhöhe statt auf Geländehöhe
+            
+        Returns:
+            Je Koordinate (Höhe der Werte, {Tag: {Variable: Wert}})
+            
+        Raises:
+            WeatherAPIError: Bei API-Fehlern
+        """
+        if not coordinates:
+            return []
+        params = {
+            "latitude": ",".join(str(lat) for lat, _ in coordinates),
+            "longitude": ",".join(str(lon) for _, lon in coordinates),
+            "daily": list(self.DAILY_VARIABLES),
+            "timezone": "auto",
+            "start_date": start_date.strftime("%Y-%m-%d"),
+            "end_date": end_date.strftime("%Y-%m-%d")
+        }
+        if model_elevation:
+            params["elevation"] = "nan"
+        response = self._make_request(params)
+        responses = response if isinstance(response, list) else [response]
+        if len(responses) != len(coordinates):
+            raise WeatherAPIParseError(
+                f"{len(responses)} Antworten für {len(coordinates)} Koordinaten erhalten"
+            )
+        result = []
+        try:
+            for item in responses:
+                daily = item["daily"]
+                days = {}
+                for i, day in enumerate(daily["time"]):
+                    days[date.fromisoformat(day)] = {
+                        var: daily[var][i] for var in self.DAILY_VARIABLES if var in daily
+                    }
+                result.append((item.get("elevation"), days))
+        except (KeyError, IndexError, ValueError) as e:
+            raise WeatherAPIParseError(f"Unerwartetes API-Antwortformat: {str(e)}")
+        return result
+    
+    def _weather_params(
+        self,
+        latitude: Any,
+        longitude: Any,
+        elevation: Optional[float],
+        start_date: datetime,
+        end_date: datetime,
+        model_elevation: bool = False
+    ) -> Dict[str, Any]:
+        """Parameter der stündlichen Vorhersage (Koordinaten einzeln oder kommagetrennt)"""
         params = {
             "latitude": latitude,
             "longitude": longitude,
-            "elevation": elevation,
             "hourly": [
                 "temperature_2m",
                 "apparent_temperature",
@@ -134,10 +319,40 @@ class WeatherAPIClient:
             "start_date": start_date.strftime("%Y-%m-%d"),
             "end_date": end_date.strftime("%Y-%m-%d")
         }
+        # "nan" liefert die Werte auf Modellhöhe ohne Höhenkorrektur; ohne
+        # Angabe korrigiert Open-Meteo auf die Geländehöhe des Punkts
+        if model_elevation:
+            params["elevation"] = "nan"
+        elif elevation is not None:
+            params["elevation"] = elevation
+        return params
+    
+    def _parse_weather(
+        self,
+        response: Dict[str, Any],
+        latitude: float,
+        longitude: float,
+        elevation: Optional[float]
+    ) -> WeatherData:
+        """
+        Parst eine stündliche Vorhersage.
         
+        Args:
+            response: API-Antwort für einen Standort
+            latitude: Breitengrad
+            longitude: Längengrad
+            elevation: Höhe (None: Modellhöhe aus der Antwort)
+            
+        Returns:
+            WeatherData-Objekt
+            
+        Raises:
+            WeatherAPIParseError: Bei unerwartetem Antwortformat
+        """
         try:
-            response = self._make_request(params)
             hourly = response["hourly"]
+            if elevation is None:
+                elevation = response.get("elevation")
             
             points = []
             for i in range(len(hourly["time"])):
@@ -168,4 +383,235 @@ class WeatherAPIClient:
             )
             
         except (KeyError, IndexError) as e:
-            raise WeatherAPIParseError(f"Unerwartetes API-Antwortformat: {str(e)}") 
\ No newline at end of file
+            raise WeatherAPIParseError(f"Unerwartetes API-Antwortformat: {str(e)}") 
+    
+    def grid_cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        """Schlüssel der Modellzelle, in der ein Punkt liegt"""
+        return (
+            math.floor(latitude / self.GRID_RESOLUTION),
+            math.floor(longitude / self.GRID_RESOLUTION)
+        )
+    
+    def request_key(self, point: Dict[str, Any]) -> Tuple[Any, ...]:
+        """
+        Anfrage, die get_weather_for_points für einen Etappenpunkt stellt:
+        seine Modellzelle, ohne Höhe ("ele") seine Koordinate.
+        """
+        if point.get("ele") is None:
+            return ("punkt", point["lat"], point["lon"])
+        return self.grid_cell(point["lat"], point["lon"])
+    
+    def get_weather_for_points(
+        self,
+        points: List[Dict[str, Any]],
+        start_date: datetime,
+        end_date: datetime,
+        cells: Optional[Dict[Tuple[Any, ...], WeatherData]] = None
+    ) -> WeatherData:
+        """
+        Holt Wetterdaten für mehrere Etappenpunkte. Punkte mit Höhe ("ele")
+        teilen sich eine Anfrage je Modellzelle auf Modellhöhe; ihre
+        Temperaturen werden anschließend auf die Punkthöhe umgerechnet. Punkte
+        ohne Höhe werden einzeln mit der Höhenkorrektur von Open-Meteo abgefragt.
+        
+        Args:
+            points: Etappenpunkte mit "lat", "lon" und optional "ele"
+            start_date: Startdatum
+            end_date: Enddatum
+            cells: Bereits geladene Anfragen je request_key(), die über
+                mehrere Aufrufe geteilt werden (wird ergänzt)
+            
+        Returns:
+            WeatherData-Objekt mit den Stundenwerten aller Punkte
+            
+        Raises:
+            WeatherAPIError: Bei API-Fehlern
+        """
+        cells = {} if cells is None else cells
+        result: Optional[WeatherData] = None
+        for point in points:
+            key = self.request_key(point)
+            # Ohne Höhe keine Umrechnung möglich: Anfrage je Koordinate statt je Zelle
+            if point.get("ele") is None:
+                if key not in cells:
+                    cells[key] = self.get_weather(point["lat"], point["lon"], None, start_date, end_date)
+                result = self._append(result, cells[key].for_location(point["lat"], point["lon"], None))
+                continue
+            if key not in cells:
+                cells[key] = self.get_weather(point["lat"], point["lon"], None, start_date, end_date, model_elevation=True)
+            else:
+                logger.debug(f"Zelle {key} bereits geladen für {point['lat']}, {point['lon']}")
+            result = self._append(result, cells[key].for_location(point["lat"], point["lon"], point["ele"]))
+        return result or WeatherData(points=[])
+    
+    @staticmethod
+    def _append(result: Optional[WeatherData], data: WeatherData) -> WeatherData:
+        """Hängt die Punkte von data an result an (oder übernimmt data)"""
+        if result is None:
+            return data
+        result.points.extend(data.points)
+        return result
+    
+    def get_ensemble(
+        self,
+        latitude: float,
+        longitude: float,
+        start_date: datetime,
+        end_date: datetime,
+        model: str = "icon_seamless"
+    ) -> EnsembleData:
+        """
+        Holt eine Ensemble-Vorhersage (alle Member) für einen Zeitraum.
+        
+        Args:
+            latitude: Breitengrad
+            longitude: Längengrad
+            start_date: Startdatum
+            end_date: Enddatum
+            model: Ensemble-Modell der Open-Meteo Ensemble API
+            
+        Returns:
+            EnsembleData-Objekt mit Member×Stunden-Matrizen
+            
+        Raises:
+            WeatherAPIError: Bei API-Fehlern
+        """
+        params = {
+            "latitude": latitude,
+            "longitude": longitude,
+            "hourly": list(self.ENSEMBLE_VARIABLES),
+            "models": model,
+            "timezone": "auto",
+            "start_date": start_date.strftime("%Y-%m-%d"),
+            "end_date": end_date.strftime("%Y-%m-%d")
+        }
+        response = self._make_request(params, url=self.ENSEMBLE_URL)
+        return self._parse_ensemble(response, latitude, longitude)
+    
+    def _parse_ensemble(
+        self,
+        response: Dict[str, Any],
+        latitude: float,
+        longitude: float
+    ) -> EnsembleData:
+        """
+        Parst eine Ensemble-Antwort. Die API liefert je Variable eine Spalte
+        für den Kontrolllauf ("precipitation") und eine pro Member
+        ("precipitation_member01", ...).
+        
+        Args:
+            response: API-Antwort
+            latitude: Breitengrad
+            longitude: Längengrad
+            
+        Returns:
+            EnsembleData-Objekt
+            
+        Raises:
+            WeatherAPIParseError: Bei unerwartetem Antwortformat
+        """
+        try:
+            hourly = response["hourly"]
+            times = [datetime.fromisoformat(t.replace("Z", "+00:00")) for t in hourly["time"]]
+            members: Dict[str, List[List[Optional[float]]]] = {}
+            for api_name, field in self.ENSEMBLE_VARIABLES.items():
+                prefix = f"{api_name}_member"
+                columns = sorted(
+                    key for key in hourly
+                    if key == api_name or key.startswith(prefix)
+                )
+                if columns:
+                    members[field] = [hourly[key] for key in columns]
+            if not members:
+                raise WeatherAPIParseError("Ensemble-Antwort enthält keine bekannten Variablen")
+            return EnsembleData(
+                latitude=latitude,
+                longitude=longitude,
+                times=times,
+                members=members
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise WeatherAPIParseError(f"Unerwartetes Ensemble-Antwortformat: {str(e)}")
+    
+    def get_multi_model(
+        self,
+        latitude: float,
+        longitude: float,
+        start_date: datetime,
+        end_date: datetime,
+        models: Optional[List[str]] = None
+    ) -> MultiModelData:
+        """
+        Holt die Vorhersagen mehrerer Modelle mit einer einzigen Anfrage.
+        
+        Args:
+            latitude: Breitengrad
+            longitude: Längengrad
+            start_date: Startdatum
+            end_date: Enddatum
+            models: Modellnamen der Open-Meteo API (Standard: DEFAULT_MODELS)
+            
+        Returns:
+            MultiModelData-Objekt
+            
+        Raises:
+            WeatherAPIError: Bei API-Fehlern
+        """
+        models = list(models or self.DEFAULT_MODELS)
+        params = {
+            "latitude": latitude,
+            "longitude": longitude,
+            "hourly": list(self.MULTI_MODEL_VARIABLES),
+            "models": ",".join(models),
+            "timezone": "auto",
+            "start_date": start_date.strftime("%Y-%m-%d"),
+            "end_date": end_date.strftime("%Y-%m-%d")
+        }
+        response = self._make_request(params)
+        return self._parse_multi_model(response, latitude, longitude, models)
+    
+    def _parse_multi_model(
+        self,
+        response: Dict[str, Any],
+        latitude: float,
+        longitude: float,
+        models: List[str]
+    ) -> MultiModelData:
+        """
+        Parst eine Mehrmodell-Antwort. Die API hängt den Modellnamen an jede
+        Variable an ("precipitation_icon_seamless", ...).
+        
+        Args:
+            response: API-Antwort
+            latitude: Breitengrad
+            longitude: Längengrad
+            models: Angefragte Modelle
+            
+        Returns:
+            MultiModelData-Objekt
+            
+        Raises:
+            WeatherAPIParseError: Bei unerwartetem Antwortformat
+        """
+        try:
+            hourly = response["hourly"]
+            times = [datetime.fromisoformat(t.replace("Z", "+00:00")) for t in hourly["time"]]
+            values: Dict[str, Dict[str, List[Optional[float]]]] = {}
+            for api_name, field in self.MULTI_MODEL_VARIABLES.items():
+                per_model = {
+                    model: hourly[f"{api_name}_{model}"]
+                    for model in models
+                    if f"{api_name}_{model}" in hourly
+                }
+                if per_model:
+                    values[field] = per_model
+            if not values:
+                raise WeatherAPIParseError("Mehrmodell-Antwort enthält keine bekannten Variablen")
+            return MultiModelData(
+                latitude=latitude,
+                longitude=longitude,
+                times=times,
+                values=values
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise WeatherAPIParseError(f"Unerwartetes Mehrmodell-Antwortformat: {str(e)}")
@@ -0,0 +1,125 @@
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+from collections.abc import Mapping
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+from src.weather.models import ReportMode, StageWeather
+
+logger = logging.getLogger(__name__)
+
+# Tage, die in den Bericht eines Modus eingehen
+RELEVANT_DAYS = {
+    ReportMode.EVENING: ("today", "tomorrow", "day_after_tomorrow"),
+    ReportMode.MORNING: ("today", "tomorrow"),
+    ReportMode.DAY: ("today",),
+}
+
+# Nachkommastellen, auf die Messwerte vor dem Hashen gerundet werden
+PRECISION = 2
+
+FINGERPRINT_PATH = os.path.join("data", "fingerprints.json")
+
+def _normalise(value: Any) -> Any:
+    """Stabile, JSON-fähige Form: Dataclasses als Dictionaries, Zahlen gerundet, Zeiten als ISO-String"""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {f.name: _normalise(getattr(value, f.name)) for f in dataclasses.fields(value)}
+    if isinstance(value, float):
+        return round(value, PRECISION)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, ReportMode):
+        return value.value
+    if isinstance(value, Mapping):
+        return {str(k): _normalise(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalise(v) for v in value]
+    return value
+
+def input_fingerprint(
+    stage_name: str,
+    mode: ReportMode,
+    day: date,
+    weather: StageWeather,
+    thresholds: Dict[str, Any],
+    extra: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    SHA-256 über alle Eingaben eines Berichts: Etappe, Modus, Tag, die für den
+    Modus relevanten Stundenreihen und die Schwellen.
+
+    Args:
+        stage_name: Name der Etappe
+        mode: Berichtsmodus
+        day: Berichtstag
+        weather: Wetterdaten (bereits auf die Ankunftsfenster beschränkt)
+        thresholds: Schwellenwerte aus config.yaml
+        extra: Weitere Einflussgrößen, z.B. Ausgabeformat oder Snapshot
+
+    Returns:
+        Fingerabdruck als Hex-String
+    """
+    payload = {
+        "stage": stage_name,
+        "mode": mode.value,
+        "day": day.isoformat(),
+        "thresholds": _normalise(thresholds),
+        "weather": {name: _normalise(getattr(weather, name)) for name in RELEVANT_DAYS[mode]},
+        "extra": _normalise(extra or {}),
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+class FingerprintStore:
+    """Letzter Fingerabdruck und gerenderter Text je Etappe und Modus"""
+
+    def __init__(self, path: str = FINGERPRINT_PATH):
+        """
+        Args:
+            path: Datei für die gespeicherten Fingerabdrücke
+        """
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _key(stage_name: str, mode: ReportMode) -> str:
+        return f"{stage_name}|{mode.value}"
+
+    @classmethod
+    def load(cls, path: str = FINGERPRINT_PATH) -> "FingerprintStore":
+        """Lädt die Fingerabdrücke; fehlt die Datei oder ist sie defekt, beginnt der Speicher leer"""
+        store = cls(path)
+        try:
+            with open(path) as f:
+                store.entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Fingerabdrücke {path} nicht lesbar, beginne neu: {e}")
+        return store
+
+    def matches(self, stage_name: str, mode: ReportMode, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns:
+            Gespeicherter Eintrag ({"fingerprint", "text", "time"}), wenn der
+            letzte Lauf dieselben Eingaben hatte, sonst None
+        """
+        entry = self.entries.get(self._key(stage_name, mode))
+        if entry and entry.get("fingerprint") == fingerprint:
+            return entry
+        return None
+
+    def record(self, stage_name: str, mode: ReportMode, fingerprint: str, text: Optional[str]) -> None:
+        """Merkt Fingerabdruck und Text (None: kein Bericht nötig) und speichert atomar"""
+        self.entries[self._key(stage_name, mode)] = {
+            "fingerprint": fingerprint,
+            "text": text,
+            "time": datetime.now().isoformat(timespec="seconds"),
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.entries, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.path)
@@ -0,0 +1,103 @@
+"""
+Dateicache für Antworten der Open-Meteo API.
+
+Der Vorwärmer (python -m src.main --prewarm) ruft einige Minuten vor jedem
+geplanten Bericht dieselben Anfragen ab wie der Bericht selbst; der Bericht
+liest sie dann ohne Netzwerkzugriff aus dem Cache. Ist die API beim Bericht
+nicht erreichbar, dienen ältere Einträge (bis STALE_SECONDS) als Ersatz.
+
+Schlüssel ist der Endpunkt mit allen Anfrageparametern; da diese Etappe,
+Koordinaten, Zeitraum und Variablen enthalten, trifft ein Eintrag nur genau
+die Anfrage, die ihn erzeugt hat.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join("data", "forecast_cache")
+
+# Einträge bis zu diesem Alter ersetzen den Abruf (Sekunden)
+FRESH_SECONDS = 15 * 60
+
+# Einträge bis zu diesem Alter dienen als Ersatz, wenn die API ausfällt (Sekunden)
+STALE_SECONDS = 6 * 3600
+
+class ForecastCache:
+    """API-Antworten als JSON-Dateien je Anfrage"""
+
+    def __init__(self, directory: str = CACHE_DIR, stale_seconds: float = STALE_SECONDS):
+        """
+        Args:
+            directory: Verzeichnis der Cache-Dateien
+            stale_seconds: Höchstalter eines Eintrags als Ersatz bei API-Ausfall
+        """
+        self.directory = directory
+        self.stale_seconds = stale_seconds
+
+    @staticmethod
+    def key(url: str, params: Dict[str, Any]) -> str:
+        """Schlüssel einer Anfrage aus Endpunkt und Parametern"""
+        raw = json.dumps([url, params], sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def _path(self, url: str, params: Dict[str, Any]) -> str:
+        return os.path.join(self.directory, f"{self.key(url, params)}.json")
+
+    def get(self, url: str, params: Dict[str, Any], max_age: float) -> Optional[Dict[str, Any]]:
+        """
+        Liest einen Eintrag.
+
+        Args:
+            url: Endpunkt der Anfrage
+            params: Parameter der Anfrage
+            max_age: Höchstalter in Sekunden
+
+        Returns:
+            Eintrag mit "fetched" (Zeitstempel) und "data" (API-Antwort);
+            None, wenn keiner vorhanden oder er älter als max_age ist
+        """
+        try:
+            with open(self._path(url, params), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("fetched", 0) > max_age:
+            return None
+        return entry
+
+    def put(self, url: str, params: Dict[str, Any], data: Dict[str, Any]) -> None:
+        """Speichert eine API-Antwort atomar"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(url, params)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"url": url, "fetched": time.time(), "data": data}, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def prune(self) -> int:
+        """
+        Entfernt Einträge, die auch als Ersatz zu alt sind.
+
+        Returns:
+            Anzahl entfernter Dateien
+        """
+        removed = 0
+        limit = time.time() - self.stale_seconds
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return 0
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < limit:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
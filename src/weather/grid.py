@@ -0,0 +1,204 @@
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+from src.weather.models import WeatherData, WeatherPoint
+
+# Mittlerer Erdradius in km
+EARTH_RADIUS_KM = 6371.0
+
+# Knotenabstand des Gitters in Grad (ca. 5 km)
+DEFAULT_SPACING = 0.05
+
+# Felder, die zwischen den Gitterknoten bilinear interpoliert werden
+INTERPOLATED_FIELDS = (
+    "elevation",
+    "temperature",
+    "feels_like",
+    "precipitation",
+    "rain_probability",
+    "thunderstorm_probability",
+    "wind_speed",
+    "cloud_cover",
+)
+
+def distance_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Großkreisentfernung zwischen zwei (lat, lon) in km (Haversine)"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+def _minutes(hhmm: str) -> int:
+    """Uhrzeit HH:MM in Minuten seit Mitternacht"""
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+def densify_route(points: Sequence[Dict[str, Any]], step_km: float = 0.5) -> List[Dict[str, Any]]:
+    """
+    Verdichtet eine Route, sodass zwei Punkte höchstens step_km auseinander
+    liegen. Zwischenpunkte erhalten linear interpolierte Höhe und Ankunftszeit,
+    sofern beide Nachbarn sie tragen.
+
+    Args:
+        points: Etappenpunkte mit "lat", "lon" und optional "ele"
+        step_km: Maximaler Abstand in km
+
+    Returns:
+        Verdichtete Punktliste (Originalpunkte bleiben enthalten)
+    """
+    if not points:
+        return []
+    result = [dict(points[0])]
+    for prev, cur in zip(points, points[1:]):
+        steps = max(1, math.ceil(distance_km((prev["lat"], prev["lon"]), (cur["lat"], cur["lon"])) / step_km))
+        for k in range(1, steps):
+            f = k / steps
+            point = {
+                "lat": prev["lat"] + (cur["lat"] - prev["lat"]) * f,
+                "lon": prev["lon"] + (cur["lon"] - prev["lon"]) * f
+            }
+            if prev.get("ele") is not None and cur.get("ele") is not None:
+                point["ele"] = prev["ele"] + (cur["ele"] - prev["ele"]) * f
+            if prev.get("ankunft") and cur.get("ankunft"):
+                minutes = _minutes(prev["ankunft"]) + (_minutes(cur["ankunft"]) - _minutes(prev["ankunft"])) * f
+                point["ankunft"] = f"{int(minutes) // 60:02d}:{int(minutes) % 60:02d}"
+            result.append(point)
+        result.append(dict(cur))
+    return result
+
+def _axis(low: float, high: float, spacing: float) -> List[float]:
+    """Knotenkoordinaten, die [low, high] mit mindestens zwei Knoten abdecken"""
+    start = math.floor(low / spacing)
+    end = max(math.ceil(high / spacing), start + 1)
+    return [round(i * spacing, 6) for i in range(start, end + 1)]
+
+def _locate(axis: List[float], value: float) -> Tuple[int, float]:
+    """Index der unteren Zelle und relative Lage (0..1) innerhalb der Zelle"""
+    spacing = axis[1] - axis[0]
+    i = min(max(int((value - axis[0]) // spacing), 0), len(axis) - 2)
+    return i, min(max((value - axis[i]) / spacing, 0.0), 1.0)
+
+def _weighted(values: Sequence[Optional[float]], weights: Sequence[float]) -> Optional[float]:
+    """Gewichtetes Mittel; fehlende Werte werden ausgelassen und die Gewichte renormiert"""
+    total = weight = 0.0
+    for v, w in zip(values, weights):
+        if v is not None and w:
+            total += v * w
+            weight += w
+    if not weight:
+        return None
+    return round(total / weight, 2)
+
+@dataclass
+class GridLattice:
+    """Grobes Gitter über der Bounding Box einer Etappe"""
+    lats: List[float]
+    lons: List[float]
+    nodes: Dict[Tuple[int, int], Dict[str, List[Any]]]  # (i, j) -> Zeitreihen je Feld
+
+    @classmethod
+    def covering(cls, points: Sequence[Dict[str, Any]], spacing: float = DEFAULT_SPACING) -> "GridLattice":
+        """Leeres Gitter, das alle Punkte umschließt"""
+        lats = [p["lat"] for p in points]
+        lons = [p["lon"] for p in points]
+        return cls(
+            lats=_axis(min(lats), max(lats), spacing),
+            lons=_axis(min(lons), max(lons), spacing),
+            nodes={}
+        )
+
+    def coordinates(self) -> List[Tuple[float, float]]:
+        """Alle Knoten als (lat, lon), zeilenweise"""
+        return [(lat, lon) for lat in self.lats for lon in self.lons]
+
+    def fill(self, node_data: Sequence[WeatherData]) -> None:
+        """
+        Übernimmt die Vorhersagen der Knoten (Reihenfolge wie coordinates()).
+
+        Args:
+            node_data: WeatherData je Knoten, alle mit denselben Zeitpunkten
+        """
+        keys = [(i, j) for i in range(len(self.lats)) for j in range(len(self.lons))]
+        for key, data in zip(keys, node_data):
+            columns = {field: [getattr(p, field) for p in data.points] for field in INTERPOLATED_FIELDS}
+            columns["time"] = [p.time for p in data.points]
+            columns["wind_direction"] = [p.wind_direction for p in data.points]
+            self.nodes[key] = columns
+
+    def interpolate(self, latitude: float, longitude: float, elevation: Optional[float] = None) -> WeatherData:
+        """
+        Bilineare Interpolation der vier umgebenden Knoten auf einen Punkt.
+        Die Gewichte werden einmal je Punkt berechnet und auf alle Stunden
+        angewendet; die Windrichtung stammt vom nächstgelegenen Knoten.
+
+        Args:
+            latitude: Breitengrad des Punkts
+            longitude: Längengrad des Punkts
+            elevation: Höhe des Punkts für die Temperaturkorrektur (optional)
+
+        Returns:
+            WeatherData-Objekt für den Punkt
+        """
+        i, t = _locate(self.lats, latitude)
+        j, u = _locate(self.lons, longitude)
+        corners = [self.nodes[(i, j)], self.nodes[(i, j + 1)], self.nodes[(i + 1, j)], self.nodes[(i + 1, j + 1)]]
+        weights = [(1 - t) * (1 - u), (1 - t) * u, t * (1 - u), t * u]
+        nearest = corners[max(range(4), key=weights.__getitem__)]
+
+        columns = {
+            field: [_weighted(values, weights) for values in zip(*(c[field] for c in corners))]
+            for field in INTERPOLATED_FIELDS
+        }
+        points = [
+            WeatherPoint(
+                latitude=latitude,
+                longitude=longitude,
+                elevation=columns["elevation"][k],
+                time=time,
+                temperature=columns["temperature"][k],
+                feels_like=columns["feels_like"][k],
+                precipitation=columns["precipitation"][k],
+                thunderstorm_probability=columns["thunderstorm_probability"][k],
+                wind_speed=columns["wind_speed"][k],
+                wind_direction=nearest["wind_direction"][k],
+                cloud_cover=columns["cloud_cover"][k],
+                rain_probability=columns["rain_probability"][k]
+            )
+            for k, time in enumerate(nearest["time"])
+        ]
+        return WeatherData(points=points).for_location(latitude, longitude, elevation)
+
+def fetch_route_weather(
+    api_client: Any,
+    points: Sequence[Dict[str, Any]],
+    start_date: datetime,
+    end_date: datetime,
+    spacing: float = DEFAULT_SPACING,
+    step_km: Optional[float] = None
+) -> WeatherData:
+    """
+    Holt ein grobes Gitter über der Etappe mit einer einzigen Anfrage und
+    interpoliert es auf die (verdichtete) Route.
+
+    Args:
+        api_client: WeatherAPIClient
+        points: Etappenpunkte mit "lat", "lon" und optional "ele"
+        start_date: Startdatum
+        end_date: Enddatum
+        spacing: Knotenabstand in Grad
+        step_km: Maximaler Punktabstand nach Verdichtung (None: nicht verdichten)
+
+    Returns:
+        WeatherData mit den Stundenwerten aller Routenpunkte
+    """
+    if not points:
+        return WeatherData(points=[])
+    lattice = GridLattice.covering(points, spacing)
+    route = densify_route(points, step_km) if step_km else list(points)
+    # Modellhöhe nur, wenn jeder Routenpunkt danach auf seine Höhe umgerechnet wird
+    model_elevation = all(point.get("ele") is not None for point in route)
+    lattice.fill(api_client.get_weather_batch(lattice.coordinates(), start_date, end_date, model_elevation))
+    result = WeatherData(points=[])
+    for point in route:
+        result.points.extend(lattice.interpolate(point["lat"], point["lon"], point.get("ele")).points)
+    return result
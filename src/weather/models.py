@@ -1,6 +1,6 @@
-from dataclasses import dataclass
-from datetime import datetime
-from typing import List, Optional, Dict, Any
+from dataclasses import dataclass, replace
+from datetime import datetime, date
+from typing import List, Optional, Dict, Any, Tuple
 from enum import Enum
 
 class ReportMode(Enum):
@@ -22,8 +22,117 @@ class WeatherPoint:
     thunderstorm_probability: Optional[float]
     wind_speed: float
     wind_direction: float
-    cloud_cover: float
+    cloud_cover: Optional[float]  # None: unbekannt (Tageswerte des zweistufigen Abrufs)
     rain_probability: Optional[float] = None  # Neue Feld für Regenwahrscheinlichkeit
+    whole_day: bool = False  # Tageswert, gilt für den ganzen Tag statt für eine Stunde
+
+# Temperaturabnahme der Standardatmosphäre in K pro Meter
+LAPSE_RATE = 0.0065
+
+# Zeitfenster je Standort in Minuten seit Mitternacht, siehe berechne_ankunftsfenster
+Window = Tuple[int, int]
+
+def _in_window(t: datetime, window: Window) -> bool:
+    """Prüft, ob die Uhrzeit von t im Fenster liegt"""
+    minutes = t.hour * 60 + t.minute
+    return window[0] <= minutes <= window[1]
+
+@dataclass
+class EnsembleData:
+    """Ensemble-Vorhersage eines Standorts: je Variable eine Member×Stunden-Matrix"""
+    latitude: float
+    longitude: float
+    times: List[datetime]
+    members: Dict[str, List[List[Optional[float]]]]  # Variable -> [Member][Stunde]
+
+    def member_count(self) -> int:
+        """Anzahl der Ensemble-Member (über alle Variablen gleich)"""
+        return max((len(matrix) for matrix in self.members.values()), default=0)
+
+    def split_by_day(self) -> Dict[date, "EnsembleData"]:
+        """Teilt die Matrizen nach Kalendertag auf"""
+        indices: Dict[date, List[int]] = {}
+        for i, t in enumerate(self.times):
+            indices.setdefault(t.date(), []).append(i)
+        days = {}
+        for day, idx in indices.items():
+            lo, hi = idx[0], idx[-1] + 1
+            days[day] = EnsembleData(
+                latitude=self.latitude,
+                longitude=self.longitude,
+                times=self.times[lo:hi],
+                members={var: [row[lo:hi] for row in matrix] for var, matrix in self.members.items()}
+            )
+        return days
+
+    def restrict_to_window(self, window: Window) -> "EnsembleData":
+        """Behält nur die Stunden innerhalb des Zeitfensters"""
+        idx = [i for i, t in enumerate(self.times) if _in_window(t, window)]
+        return EnsembleData(
+            latitude=self.latitude,
+            longitude=self.longitude,
+            times=[self.times[i] for i in idx],
+            members={var: [[row[i] for i in idx] for row in matrix] for var, matrix in self.members.items()}
+        )
+
+@dataclass
+class MultiModelData:
+    """Vorhersagen mehrerer Wettermodelle für einen Standort"""
+    latitude: float
+    longitude: float
+    times: List[datetime]
+    values: Dict[str, Dict[str, List[Optional[float]]]]  # Variable -> Modell -> Stundenwerte
+
+    def models(self) -> List[str]:
+        """Namen der enthaltenen Modelle"""
+        names: List[str] = []
+        for per_model in self.values.values():
+            names.extend(m for m in per_model if m not in names)
+        return names
+
+    def split_by_day(self) -> Dict[date, "MultiModelData"]:
+        """Teilt die Zeitreihen nach Kalendertag auf"""
+        indices: Dict[date, List[int]] = {}
+        for i, t in enumerate(self.times):
+            indices.setdefault(t.date(), []).append(i)
+        days = {}
+        for day, idx in indices.items():
+            lo, hi = idx[0], idx[-1] + 1
+            days[day] = MultiModelData(
+                latitude=self.latitude,
+                longitude=self.longitude,
+                times=self.times[lo:hi],
+                values={
+                    var: {model: series[lo:hi] for model, series in per_model.items()}
+                    for var, per_model in self.values.items()
+                }
+            )
+        return days
+
+    def restrict_to_window(self, window: Window) -> "MultiModelData":
+        """Behält nur die Stunden innerhalb des Zeitfensters"""
+        idx = [i for i, t in enumerate(self.times) if _in_window(t, window)]
+        return MultiModelData(
+            latitude=self.latitude,
+            longitude=self.longitude,
+            times=[self.times[i] for i in idx],
+            values={
+                var: {model: [series[i] for i in idx] for model, series in per_model.items()}
+                for var, per_model in self.values.items()
+            }
+        )
+
+# Felder eines WeatherPoint, die als stündliche Zeitreihe ausgewertet werden
+SERIES_FIELDS = (
+    "time",
+    "temperature",
+    "feels_like",
+    "precipitation",
+    "rain_probability",
+    "thunderstorm_probability",
+    "wind_speed",
+    "cloud_cover",
+)
 
 @dataclass
 class WeatherData:
@@ -33,6 +142,8 @@ class WeatherData:
     rain_time_max: Optional[str] = None
     thunder_time_threshold: Optional[str] = None
     thunder_time_max: Optional[str] = None
+    ensemble: Optional[List[EnsembleData]] = None  # Ensemble je Etappenpunkt (optional)
+    models: Optional[List[MultiModelData]] = None  # Modellvergleich je Etappenpunkt (optional)
     
     def get_last_point(self) -> Optional[WeatherPoint]:
         """Gibt den letzten Messpunkt zurück"""
@@ -48,9 +159,104 @@ class WeatherData:
             "precipitation": max((p.precipitation for p in self.points), default=0),
             "thunderstorm_probability": max(((p.thunderstorm_probability or 0) for p in self.points), default=0),
             "wind_speed": max((p.wind_speed for p in self.points), default=0),
-            "cloud_cover": max((p.cloud_cover for p in self.points), default=0)
+            "cloud_cover": max((p.cloud_cover for p in self.points if p.cloud_cover is not None), default=None)
         }
 
+    def get_hourly_series(self) -> Dict[Tuple[float, float], Dict[str, List[Any]]]:
+        """
+        Liefert die Messpunkte spaltenweise als Zeitreihen je Standort.
+        
+        Returns:
+            Dictionary (lat, lon) -> {Feldname: Werteliste}, Reihenfolge wie in points
+        """
+        series: Dict[Tuple[float, float], Dict[str, List[Any]]] = {}
+        for p in self.points:
+            key = (p.latitude, p.longitude)
+            columns = series.get(key)
+            if columns is None:
+                columns = series[key] = {field: [] for field in SERIES_FIELDS}
+            for field in SERIES_FIELDS:
+                columns[field].append(getattr(p, field))
+        return series
+
+    def split_by_day(self) -> Dict[date, "WeatherData"]:
+        """Teilt die Messpunkte nach Kalendertag auf (Reihenfolge bleibt erhalten)"""
+        days: Dict[date, WeatherData] = {}
+        for p in self.points:
+            day = p.time.date()
+            if day not in days:
+                days[day] = WeatherData(points=[])
+            days[day].points.append(p)
+        return days
+
+    def for_location(self, latitude: float, longitude: float, elevation: Optional[float]) -> "WeatherData":
+        """
+        Überträgt die Daten einer Modellzelle auf einen Punkt in der Zelle.
+        Temperatur und gefühlte Temperatur werden mit LAPSE_RATE von der
+        Modellhöhe auf die Punkthöhe umgerechnet.
+        
+        Args:
+            latitude: Breitengrad des Punkts
+            longitude: Längengrad des Punkts
+            elevation: Höhe des Punkts (None: Modellhöhe beibehalten)
+            
+        Returns:
+            Neues WeatherData-Objekt
+        """
+        points = []
+        for p in self.points:
+            offset = (p.elevation - elevation) * LAPSE_RATE if elevation is not None and p.elevation is not None else 0
+            points.append(replace(
+                p,
+                latitude=latitude,
+                longitude=longitude,
+                elevation=elevation if elevation is not None else p.elevation,
+                temperature=round(p.temperature + offset, 1) if p.temperature is not None else None,
+                feels_like=round(p.feels_like + offset, 1) if p.feels_like is not None else None
+            ))
+        return WeatherData(
+            points=points,
+            rain_time_threshold=self.rain_time_threshold,
+            rain_time_max=self.rain_time_max,
+            thunder_time_threshold=self.thunder_time_threshold,
+            thunder_time_max=self.thunder_time_max
+        )
+
+    def restrict_to_windows(self, windows: Dict[Tuple[float, float], Window]) -> "WeatherData":
+        """
+        Beschränkt jeden Standort auf sein Zeitfenster (z.B. um die Ankunftszeit).
+        Standorte ohne Fenster behalten alle Stunden, Tageswerte (whole_day)
+        bleiben erhalten, da sie jedes Fenster des Tages einschließen.
+        
+        Args:
+            windows: Dictionary (lat, lon) -> (von, bis) in Minuten seit Mitternacht
+            
+        Returns:
+            Neues WeatherData-Objekt
+        """
+        def keep(lat: float, lon: float, t: datetime) -> bool:
+            window = windows.get((lat, lon))
+            return window is None or _in_window(t, window)
+        
+        def restrict(items):
+            if items is None:
+                return None
+            return [
+                item.restrict_to_window(windows[(item.latitude, item.longitude)])
+                if (item.latitude, item.longitude) in windows else item
+                for item in items
+            ]
+        
+        return WeatherData(
+            points=[p for p in self.points if p.whole_day or keep(p.latitude, p.longitude, p.time)],
+            rain_time_threshold=self.rain_time_threshold,
+            rain_time_max=self.rain_time_max,
+            thunder_time_threshold=self.thunder_time_threshold,
+            thunder_time_max=self.thunder_time_max,
+            ensemble=restrict(self.ensemble),
+            models=restrict(self.models)
+        )
+
     def get_min_values(self) -> Dict[str, float]:
         """Berechnet die Minimalwerte über alle Punkte"""
         if not self.points:
@@ -61,7 +267,7 @@ class WeatherData:
             "precipitation": min((p.precipitation for p in self.points), default=0),
             "thunderstorm_probability": min(((p.thunderstorm_probability or 0) for p in self.points), default=0),
             "wind_speed": min((p.wind_speed for p in self.points), default=0),
-            "cloud_cover": min((p.cloud_cover for p in self.points), default=0)
+            "cloud_cover": min((p.cloud_cover for p in self.points if p.cloud_cover is not None), default=None)
         }
 
 @dataclass
@@ -83,7 +289,7 @@ class WeatherReport:
     max_precipitation: float
     max_thunderstorm_probability: Optional[float]
     max_wind_speed: float
-    max_cloud_cover: float
+    max_cloud_cover: Optional[float]
     next_day_thunderstorm: Optional[float]  # Gewitter +1
     text: str  # Der generierte Berichtstext
     max_precipitation_probability: Optional[float] = None  # Regenwahrscheinlichkeit
@@ -105,4 +311,13 @@ class WeatherReport:
     thunder_prob_threshold: Optional[float] = None
     thunder_prob_time_threshold: Optional[str] = None
     thunder_prob_max: Optional[float] = None
-    thunder_prob_time_max: Optional[str] = None 
\ No newline at end of file
+    thunder_prob_time_max: Optional[str] = None
+    # Gleitende Fenster (z.B. Regensumme 3h, Dauerwind), Schlüssel wie in schwellen
+    rolling_metrics: Optional[Dict[str, Dict[str, Any]]] = None
+    # Anteil der Ensemble-Member über der Schwelle (0..1) je Risiko
+    ensemble_probabilities: Optional[Dict[str, float]] = None
+    # Modellvergleich: Variable -> {models, spread, agreement}; Gesamtkonfidenz
+    model_comparison: Optional[Dict[str, Dict[str, Any]]] = None
+    model_confidence: Optional[str] = None
+    # Tageswarnung: größter Anstieg je Feld gegenüber dem Morgen-Snapshot
+    deltas: Optional[Dict[str, float]] = None 
\ No newline at end of file
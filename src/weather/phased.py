@@ -0,0 +1,148 @@
+import logging
+from datetime import datetime, date, time
+from typing import List, Dict, Any, Optional
+from src.weather.models import WeatherData, WeatherPoint
+
+logger = logging.getLogger(__name__)
+
+# Anteil einer Schwelle, ab dem ein Tag stündlich nachgeladen wird
+APPROACH_FACTOR = 0.8
+
+# WMO-Wettercodes für Gewitter
+THUNDERSTORM_CODES = range(95, 100)
+
+# Tageswert der Gewitterwahrscheinlichkeit, falls die Antwort einen liefert.
+# Open-Meteo hat keinen; der Wettercode allein ist keine obere Schranke der
+# stündlichen Wahrscheinlichkeit, daher wird ohne ihn stündlich nachgeladen.
+DAILY_THUNDERSTORM = "thunderstorm_probability_max"
+
+# (Tageswert, Schwelle). Die Tageswerte sind obere Schranken der stündlichen
+# Werte (Tagessumme >= jede Stunden- und Fenstersumme), es wird also nichts übersehen.
+DAILY_CHECKS = (
+    ("precipitation_probability_max", "regen"),
+    ("precipitation_sum", "regenmenge"),
+    ("wind_speed_10m_max", "wind"),
+    ("apparent_temperature_max", "hitze"),
+)
+
+def needs_hourly(daily: Dict[str, Any], thresholds: Dict[str, Any]) -> bool:
+    """
+    Prüft, ob ein Tag an einem Punkt eine Schwelle erreicht oder sich ihr nähert.
+
+    Args:
+        daily: Tageswerte eines Punkts (Open-Meteo daily)
+        thresholds: Schwellenwerte aus config.yaml
+
+    Returns:
+        True, wenn die stündliche Reihe benötigt wird
+    """
+    if (daily.get("weather_code") or 0) in THUNDERSTORM_CODES:
+        return True
+    if thresholds.get("gewitter"):
+        value = daily.get(DAILY_THUNDERSTORM)
+        if value is None or value >= thresholds["gewitter"] * APPROACH_FACTOR:
+            return True
+    for key, threshold_key in DAILY_CHECKS:
+        threshold = thresholds.get(threshold_key)
+        value = daily.get(key)
+        if threshold and value is not None and value >= threshold * APPROACH_FACTOR:
+            return True
+    # Gleitende Fenster: Regensumme über n Stunden <= Tagessumme, Dauerwind <= Tagesmaximum
+    for key, threshold in thresholds.items():
+        if not threshold:
+            continue
+        if key.startswith("regen_") and (daily.get("precipitation_sum") or 0) >= threshold * APPROACH_FACTOR:
+            return True
+        if key.startswith("wind_") and (daily.get("wind_speed_10m_max") or 0) >= threshold * APPROACH_FACTOR:
+            return True
+    return False
+
+def daily_points(latitude: float, longitude: float, elevation: Optional[float], day: date, daily: Dict[str, Any]) -> List[WeatherPoint]:
+    """
+    Ersetzt die Stundenreihe eines ruhigen Tages durch zwei Punkte: die
+    Tagesmaxima um 12:00 und die Tiefsttemperatur um 23:00 (Nachttemperatur).
+    Beide gelten für den ganzen Tag (whole_day) und bleiben daher auch bei
+    Ankunftsfenstern erhalten. Bewölkung und Gewitter liefern die Tageswerte
+    nicht; sie bleiben unbekannt (None).
+    """
+    peak = WeatherPoint(
+        latitude=latitude,
+        longitude=longitude,
+        elevation=elevation,
+        time=datetime.combine(day, time(12, 0)),
+        temperature=daily.get("temperature_2m_max"),
+        feels_like=daily.get("apparent_temperature_max"),
+        precipitation=daily.get("precipitation_sum") or 0,
+        thunderstorm_probability=None,
+        wind_speed=daily.get("wind_speed_10m_max") or 0,
+        wind_direction=daily.get("wind_direction_10m_dominant") or 0,
+        cloud_cover=None,
+        rain_probability=daily.get("precipitation_probability_max"),
+        whole_day=True
+    )
+    night = WeatherPoint(
+        latitude=latitude,
+        longitude=longitude,
+        elevation=elevation,
+        time=datetime.combine(day, time(23, 0)),
+        temperature=daily.get("temperature_2m_min"),
+        feels_like=daily.get("apparent_temperature_min"),
+        precipitation=0,
+        thunderstorm_probability=None,
+        wind_speed=0,
+        wind_direction=0,
+        cloud_cover=None,
+        rain_probability=None,
+        whole_day=True
+    )
+    return [peak, night]
+
+def fetch_coarse_to_fine(
+    api_client: Any,
+    points: List[Dict[str, Any]],
+    start_date: datetime,
+    end_date: datetime,
+    thresholds: Dict[str, Any]
+) -> WeatherData:
+    """
+    Zweistufiger Abruf: zuerst Tageswerte für alle Punkte (eine Anfrage),
+    danach Stundenreihen nur für Punkte und Tage nahe einer Schwelle.
+
+    Args:
+        api_client: WeatherAPIClient
+        points: Etappenpunkte mit "lat", "lon" und optional "ele"
+        start_date: Startdatum
+        end_date: Enddatum
+        thresholds: Schwellenwerte aus config.yaml
+
+    Returns:
+        WeatherData mit Stundenwerten für kritische Tage und Tageswerten sonst
+    """
+    if not points:
+        return WeatherData(points=[])
+    # Modellhöhe nur, wenn jeder Punkt danach auf seine Höhe umgerechnet wird
+    model_elevation = all(p.get("ele") is not None for p in points)
+    daily = api_client.get_daily_batch([(p["lat"], p["lon"]) for p in points], start_date, end_date, model_elevation)
+
+    result = WeatherData(points=[])
+    hourly_days = 0
+    for point, (model_elevation, days) in zip(points, daily):
+        critical = sorted(day for day, values in days.items() if needs_hourly(values, thresholds))
+        hourly: Dict[date, WeatherData] = {}
+        if critical:
+            data = api_client.get_weather_for_points(
+                [point],
+                datetime.combine(critical[0], time()),
+                datetime.combine(critical[-1], time())
+            )
+            hourly = data.split_by_day()
+        for day in sorted(days):
+            # Bereits geladene Zwischentage ebenfalls stündlich übernehmen
+            if day in hourly:
+                result.points.extend(hourly[day].points)
+                hourly_days += 1
+            else:
+                coarse = WeatherData(points=daily_points(point["lat"], point["lon"], model_elevation, day, days[day]))
+                result.points.extend(coarse.for_location(point["lat"], point["lon"], point.get("ele")).points)
+    logger.info(f"Zweistufiger Abruf: {hourly_days} von {sum(len(d) for _, d in daily)} Punkt-Tagen stündlich")
+    return result
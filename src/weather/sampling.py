@@ -0,0 +1,128 @@
+import heapq
+import logging
+from typing import Callable, Hashable, List, Dict, Any, Optional, Sequence, Tuple
+from src.weather.models import WeatherData
+
+logger = logging.getLogger(__name__)
+
+# Toleranzen für benachbarte Punkte: Feld -> maximal erlaubte Differenz der Maxima
+DEFAULT_TOLERANCES = {
+    "thunderstorm_probability": 20,  # %
+    "precipitation": 1.0,            # mm/h
+    "wind_speed": 10,                # km/h
+}
+
+# Standardabstand der Kandidatenpunkte auf der Route in km
+ADAPTIVE_STEP_KM = 0.5
+
+class AdaptiveSampler:
+    """
+    Wählt Wetterpunkte adaptiv: zuerst die Startauswahl (immer vollständig),
+    dann rekursiv Mittelpunkte dort, wo sich benachbarte Punkte stärker als
+    die Toleranz unterscheiden. Die größte Abweichung wird zuerst verfeinert,
+    bis keine Abweichung mehr vorliegt oder das Budget für zusätzliche
+    Anfragen erschöpft ist.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[Dict[str, Any]], WeatherData],
+        tolerances: Optional[Dict[str, float]] = None,
+        budget: int = 10,
+        request_key: Optional[Callable[[Dict[str, Any]], Hashable]] = None
+    ):
+        """
+        Args:
+            fetch: Holt die Wetterdaten eines Routenpunkts
+            tolerances: Toleranzen je Feld (Standard: DEFAULT_TOLERANCES)
+            budget: Maximale Anzahl Anfragen für Mittelpunkte
+            request_key: Anfrage, die ein Punkt auslöst (z.B. seine
+                Modellzelle); Punkte mit bereits geladenem Schlüssel kosten
+                keine Anfrage, fetch verwendet die geladenen Daten wieder.
+                Ohne: jeder Punkt eine Anfrage
+        """
+        self.fetch = fetch
+        self.tolerances = tolerances or DEFAULT_TOLERANCES
+        self.budget = budget
+        self.request_key = request_key
+        self.requests = 0
+        self.extra_requests = 0
+
+    def _divergence(self, a: Dict[str, float], b: Dict[str, float]) -> float:
+        """Größte Abweichung zweier Punkte relativ zur jeweiligen Toleranz"""
+        return max(
+            (abs(a.get(field, 0) - b.get(field, 0)) / tolerance for field, tolerance in self.tolerances.items()),
+            default=0
+        )
+
+    def sample(self, route: Sequence[Dict[str, Any]], initial: Optional[List[int]] = None) -> Dict[int, WeatherData]:
+        """
+        Tastet die Route adaptiv ab.
+
+        Args:
+            route: Kandidatenpunkte in Routenreihenfolge
+            initial: Indizes der Startauswahl (Standard: erster und letzter Punkt)
+
+        Returns:
+            Dictionary Routenindex -> WeatherData der abgefragten Punkte
+        """
+        if not route:
+            return {}
+        indices = sorted(set(initial if initial else [0, len(route) - 1]))
+        sampled: Dict[int, WeatherData] = {}
+        maxima: Dict[int, Dict[str, float]] = {}
+        loaded = set()
+
+        def cost(index: int) -> int:
+            """Anzahl neuer Anfragen für einen Punkt (0 bei geladener Zelle)"""
+            if self.request_key is None:
+                return 1
+            return 0 if self.request_key(route[index]) in loaded else 1
+
+        def take(index: int) -> int:
+            new = cost(index)
+            self.requests += new
+            sampled[index] = self.fetch(route[index])
+            maxima[index] = sampled[index].get_max_values()
+            if self.request_key is not None:
+                loaded.add(self.request_key(route[index]))
+            return new
+
+        # Die Startauswahl (Etappenpunkte inkl. Ziel) wird immer vollständig abgefragt
+        for index in indices:
+            take(index)
+
+        # Max-Heap der Abschnitte nach Abweichung (negiert für heapq)
+        heap: List[Tuple[float, int, int]] = []
+
+        def push(lo: int, hi: int) -> None:
+            if hi - lo < 2:
+                return
+            divergence = self._divergence(maxima[lo], maxima[hi])
+            if divergence > 1:
+                heapq.heappush(heap, (-divergence, lo, hi))
+
+        done = sorted(sampled)
+        for lo, hi in zip(done, done[1:]):
+            push(lo, hi)
+        skipped = 0
+        while heap:
+            _, lo, hi = heapq.heappop(heap)
+            mid = (lo + hi) // 2
+            # Nach erschöpftem Budget nur noch Mittelpunkte in geladenen Zellen
+            if cost(mid) and self.extra_requests >= self.budget:
+                skipped += 1
+                continue
+            self.extra_requests += take(mid)
+            push(lo, mid)
+            push(mid, hi)
+        if skipped:
+            logger.info(f"Anfragebudget ({self.budget}) erschöpft, {skipped} Abschnitte nicht verfeinert")
+        return sampled
+
+def combine(sampled: Dict[int, WeatherData]) -> WeatherData:
+    """Fügt die abgefragten Punkte in Routenreihenfolge zu einem WeatherData zusammen"""
+    result = WeatherData(points=[])
+    for index in sorted(sampled):
+        result.points.extend(sampled[index].points)
+    return result
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+from src.weather.models import WeatherData
+
+logger = logging.getLogger(__name__)
+
+# Risikovariablen, die im Snapshot gespeichert und verglichen werden
+RISK_FIELDS = (
+    "precipitation",
+    "rain_probability",
+    "thunderstorm_probability",
+    "wind_speed",
+    "feels_like",
+)
+
+SNAPSHOT_DIR = os.path.join("data", "snapshots")
+
+# Snapshots werden nur am Tag des Morgenberichts verglichen; ältere Tage entfallen
+SNAPSHOT_KEEP_DAYS = 2
+
+def point_key(latitude: float, longitude: float) -> str:
+    """Schlüssel eines Standorts im Snapshot"""
+    return f"{latitude:.4f},{longitude:.4f}"
+
+def _digest(rows: List[List[Any]]) -> str:
+    """Kurzer Fingerabdruck der Stundenzeilen eines Standorts"""
+    return hashlib.sha1(json.dumps(rows, separators=(",", ":")).encode()).hexdigest()[:16]
+
+def _rows(data: WeatherData) -> Dict[str, List[List[Any]]]:
+    """Stundenzeilen [HH:MM, Werte aus RISK_FIELDS] je Standort"""
+    rows: Dict[str, List[List[Any]]] = {}
+    for p in data.points:
+        rows.setdefault(point_key(p.latitude, p.longitude), []).append(
+            [p.time.strftime("%H:%M")] + [getattr(p, name) for name in RISK_FIELDS]
+        )
+    return rows
+
+def snapshot_path(stage_name: str, date: datetime, directory: str = SNAPSHOT_DIR) -> str:
+    """Dateipfad des Snapshots einer Etappe an einem Tag"""
+    safe_name = "".join(c if c.isalnum() else "_" for c in stage_name)
+    return os.path.join(directory, f"{date.strftime('%Y-%m-%d')}_{safe_name}.json")
+
+def prune_snapshots(directory: str = SNAPSHOT_DIR, keep_days: int = SNAPSHOT_KEEP_DAYS, today: Optional[date] = None) -> int:
+    """
+    Entfernt Snapshots, deren Tag (Dateiname) keep_days oder mehr zurückliegt.
+
+    Args:
+        directory: Verzeichnis der Snapshots
+        keep_days: Anzahl aufbewahrter Tage inklusive heute
+        today: Heutiges Datum (Standard: date.today())
+
+    Returns:
+        Anzahl entfernter Dateien
+    """
+    limit = ((today or date.today()) - timedelta(days=keep_days - 1)).isoformat()
+    removed = 0
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return 0
+    for name in names:
+        day = name[:10]
+        try:
+            date.fromisoformat(day)
+        except ValueError:
+            continue
+        if day < limit:
+            try:
+                os.remove(os.path.join(directory, name))
+                removed += 1
+            except OSError:
+                continue
+    return removed
+
+@dataclass
+class ForecastSnapshot:
+    """Kompakte Kopie der im Morgenbericht gemeldeten Stundenreihen"""
+    stage_name: str
+    date: str
+    rows: Dict[str, List[List[Any]]]  # Standort -> [[HH:MM, Werte...], ...]
+    digests: Dict[str, str] = field(default_factory=dict)  # Standort -> Fingerabdruck
+
+    @classmethod
+    def from_weather(cls, stage_name: str, date: datetime, data: WeatherData) -> "ForecastSnapshot":
+        """Erstellt einen Snapshot aus den Wetterdaten eines Tages"""
+        rows = _rows(data)
+        return cls(
+            stage_name=stage_name,
+            date=date.strftime("%Y-%m-%d"),
+            rows=rows,
+            digests={key: _digest(value) for key, value in rows.items()}
+        )
+
+    def save(self, path: str) -> None:
+        """Speichert den Snapshot atomar als JSON"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(
+                {"stage_name": self.stage_name, "date": self.date, "fields": RISK_FIELDS,
+                 "rows": self.rows, "digests": self.digests},
+                f,
+                separators=(",", ":")
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["ForecastSnapshot"]:
+        """
+        Lädt einen Snapshot.
+
+        Returns:
+            ForecastSnapshot oder None, wenn keine (passende) Datei existiert
+        """
+        try:
+            with open(path) as f:
+                raw = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Snapshot {path} nicht lesbar: {e}")
+            return None
+        if tuple(raw.get("fields", ())) != RISK_FIELDS:
+            logger.warning(f"Snapshot {path} hat ein anderes Format und wird ignoriert")
+            return None
+        return cls(stage_name=raw["stage_name"], date=raw["date"], rows=raw["rows"], digests=raw.get("digests", {}))
+
+    def diff(self, data: WeatherData) -> Dict[str, Dict[str, Dict[str, Tuple[Any, Any]]]]:
+        """
+        Vergleicht aktuelle Daten inkrementell mit dem Snapshot. Standorte mit
+        unverändertem Fingerabdruck werden übersprungen, sonst nur geänderte
+        Stunden verglichen.
+
+        Args:
+            data: Aktuelle Wetterdaten desselben Tages
+
+        Returns:
+            Standort -> HH:MM -> Feld -> (alt, neu), nur für geänderte Werte
+        """
+        changes: Dict[str, Dict[str, Dict[str, Tuple[Any, Any]]]] = {}
+        for key, rows in _rows(data).items():
+            if self.digests.get(key) == _digest(rows):
+                continue
+            old_rows = {row[0]: row for row in self.rows.get(key, [])}
+            for row in rows:
+                old = old_rows.get(row[0])
+                if old == row:
+                    continue
+                fields = {
+                    name: (old[i] if old else None, row[i])
+                    for i, name in enumerate(RISK_FIELDS, start=1)
+                    if old is None or old[i] != row[i]
+                }
+                changes.setdefault(key, {})[row[0]] = fields
+        return changes
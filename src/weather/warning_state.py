@@ -0,0 +1,182 @@
+import json
+import logging
+import os
+from datetime import date
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Risiko -> (WeatherReport-Feld, Schlüssel der Schwelle, Wert in Prozentpunkten)
+WARNING_RISKS = {
+    "gewitter": ("max_thunderstorm_probability", "gewitter", True),
+    "regen": ("rain_prob_max", "regen", True),
+    "regenmenge": ("max_precipitation", "regenmenge", False),
+    "wind": ("max_wind_speed", "wind", False),
+    "hitze": ("max_feels_like", "hitze", False),
+}
+
+# Präfix der Risiken aus dem Vergleich mit dem Morgenbericht (Feld dahinter)
+SNAPSHOT_PREFIX = "seit_morgen:"
+
+WARNING_STATE_PATH = os.path.join("data", "warning_state.json")
+
+class WarningState:
+    """
+    Persistenter Warnzustand der Tageswarnungen. Gesendet wird nur, wenn ein
+    Risiko seine Schwelle neu überschreitet oder sich seit der letzten
+    Meldung um mehr als delta_prozent ändert. Ein Risiko gilt erst wieder als
+    unterschritten, wenn es um das Hystereseband unter die Schwelle fällt;
+    Werte, die um die Schwelle pendeln, lösen so keine neuen Meldungen aus.
+    Pro Tag werden höchstens daily_budget Warnungen gesendet.
+
+    Neben den Maxima aus WARNING_RISKS zählen gleitende Kennzahlen (z.B.
+    regen_3h, Schwelle unter demselben Schlüssel) und Verschlechterungen
+    gegenüber dem Morgenbericht als eigene Risiken.
+    """
+
+    def __init__(
+        self,
+        thresholds: Dict[str, float],
+        path: str = WARNING_STATE_PATH,
+        daily_budget: int = 3,
+        hysteresis: float = 0.1
+    ):
+        """
+        Args:
+            thresholds: Schwellenwerte aus config.yaml (inkl. delta_prozent)
+            path: Datei für den Zustand
+            daily_budget: Maximale Anzahl Warnungen pro Tag
+            hysteresis: Breite des Hysteresebands als Anteil der Schwelle
+        """
+        self.thresholds = thresholds
+        self.path = path
+        self.daily_budget = daily_budget
+        self.hysteresis = hysteresis
+        self.day: Optional[str] = None
+        self.sent = 0
+        self.risks: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def load(cls, thresholds: Dict[str, float], path: str = WARNING_STATE_PATH, **kwargs: Any) -> "WarningState":
+        """Lädt den Zustand; fehlt die Datei oder ist sie defekt, beginnt er leer"""
+        state = cls(thresholds, path, **kwargs)
+        try:
+            with open(path) as f:
+                raw = json.load(f)
+            state.day = raw.get("day")
+            state.sent = raw.get("sent", 0)
+            state.risks = raw.get("risks", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Warnzustand {path} nicht lesbar, beginne neu: {e}")
+        return state
+
+    def save(self) -> None:
+        """Speichert den Zustand atomar"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"day": self.day, "sent": self.sent, "risks": self.risks}, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def _changed(self, value: float, last: Optional[float], percent_points: bool) -> bool:
+        """Änderung seit der letzten Meldung um mehr als delta_prozent"""
+        limit = self.thresholds.get("delta_prozent")
+        if not limit or last is None:
+            return False
+        if percent_points:
+            return abs(value - last) > limit
+        return last != 0 and abs(value - last) / abs(last) * 100 > limit
+
+    def _risks(self, values: Dict[str, Optional[float]]) -> List[Tuple[str, Optional[float], bool]]:
+        """(Risiko, Schwelle, Wert in Prozentpunkten) für alle bekannten und übergebenen Risiken"""
+        risks = [(risk, self.thresholds.get(key), percent_points) for risk, (_, key, percent_points) in WARNING_RISKS.items()]
+        # Gleitende Kennzahlen haben ihre Schwelle unter dem eigenen Schlüssel
+        risks.extend((risk, self.thresholds.get(risk), False) for risk in values if risk not in WARNING_RISKS)
+        return risks
+
+    def observe(
+        self,
+        values: Dict[str, Optional[float]],
+        today: date,
+        increases: Optional[Dict[str, float]] = None
+    ) -> None:
+        """
+        Schreibt den Zustand ohne Meldung fort: ein neuer Tag setzt Budget und
+        Risiken zurück, Risiken unter dem Hystereseband enden.
+
+        Args:
+            values: Aktuelle Werte je Risiko (Schlüssel wie WARNING_RISKS
+                oder gleitende Kennzahl wie regen_3h)
+            today: Heutiges Datum
+            increases: Verschlechterung je Feld seit dem Morgenbericht;
+                nicht mehr enthaltene Felder enden
+        """
+        if self.day != today.isoformat():
+            self.day = today.isoformat()
+            self.sent = 0
+            self.risks = {}
+        for risk, threshold, _ in self._risks(values):
+            value = values.get(risk)
+            entry = self.risks.get(risk)
+            if entry and entry["active"] and threshold and value is not None and value < threshold * (1 - self.hysteresis):
+                # Erst unterhalb des Hysteresebands gilt das Risiko als beendet
+                self.risks[risk] = {"active": False, "value": None}
+        for risk, entry in list(self.risks.items()):
+            if risk.startswith(SNAPSHOT_PREFIX) and entry["active"] and risk[len(SNAPSHOT_PREFIX):] not in (increases or {}):
+                self.risks[risk] = {"active": False, "value": None}
+
+    def decide(
+        self,
+        values: Dict[str, Optional[float]],
+        today: date,
+        increases: Optional[Dict[str, float]] = None
+    ) -> List[str]:
+        """
+        Entscheidet, ob gesendet wird, und aktualisiert den Zustand.
+
+        Args:
+            values: Aktuelle Werte je Risiko (Schlüssel wie WARNING_RISKS
+                oder gleitende Kennzahl wie regen_3h)
+            today: Heutiges Datum (neuer Tag setzt Budget und Zustand zurück)
+            increases: Signifikante Verschlechterung je Feld seit dem
+                Morgenbericht (Feld -> Anstieg)
+
+        Returns:
+            Gründe für eine Warnung; leer, wenn nicht gesendet werden soll
+        """
+        self.observe(values, today, increases)
+        reasons = []
+        for risk, threshold, percent_points in self._risks(values):
+            value = values.get(risk)
+            if not threshold or value is None:
+                continue
+            entry = self.risks.get(risk) or {"active": False, "value": None}
+            if entry["active"]:
+                if self._changed(value, entry["value"], percent_points):
+                    reasons.append(f"{risk} {entry['value']:g} → {value:g}")
+            elif value >= threshold:
+                reasons.append(f"{risk} über Schwelle ({value:g})")
+        for field, increase in (increases or {}).items():
+            entry = self.risks.get(SNAPSHOT_PREFIX + field) or {"active": False, "value": None}
+            if entry["active"]:
+                if self._changed(increase, entry["value"], field.endswith("_probability")):
+                    reasons.append(f"{field} seit Morgenbericht +{entry['value']:g} → +{increase:g}")
+            else:
+                reasons.append(f"{field} seit Morgenbericht +{increase:g}")
+
+        if not reasons:
+            return []
+        if self.sent >= self.daily_budget:
+            logger.info(f"Tagesbudget von {self.daily_budget} Warnungen erreicht, unterdrücke: {', '.join(reasons)}")
+            return []
+        self.sent += 1
+        # Gemeldete Werte werden zur neuen Vergleichsbasis
+        for risk, threshold, _ in self._risks(values):
+            value = values.get(risk)
+            if value is not None and threshold and value >= threshold:
+                self.risks[risk] = {"active": True, "value": value}
+        for field, increase in (increases or {}).items():
+            self.risks[SNAPSHOT_PREFIX + field] = {"active": True, "value": increase}
+        return reasons
@@ -0,0 +1,385 @@
+import json
+import os
+import random
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from datetime import datetime, timedelta
+from src.weather.models import WeatherPoint, WeatherData, StageWeather, ReportMode, EnsembleData
+from src.report.generator import ReportGenerator
+from src.weather.snapshot import ForecastSnapshot, prune_snapshots, snapshot_path
+from src.weather.warning_state import WarningState
+from wetter.delta import berechne_delta
+from src.weather.api import WeatherAPIClient
+from src.weather.aggregator import WeatherAggregator, rolling_sum, rolling_mean
+
+
+def punkt(stunde, tag=1, temp=18, feels_like=16, regen_mm=0, regen_prob=0, gewitter=0, wind=10):
+    return WeatherPoint(
+        latitude=42.5,
+        longitude=8.9,
+        elevation=1200,
+        time=datetime(2025, 6, tag, stunde, 0),
+        temperature=temp,
+        feels_like=feels_like,
+        precipitation=regen_mm,
+        rain_probability=regen_prob,
+        thunderstorm_probability=gewitter,
+        wind_speed=wind,
+        wind_direction=180,
+        cloud_cover=50
+    )
+
+
+class TestWeatherAggregator(unittest.TestCase):
+    def setUp(self):
+        self.thresholds = {
+            "regen": 25,
+            "regenmenge": 2,
+            "gewitter": 20,
+            "delta_prozent": 20,
+            "hitze": 32,
+            "wind": 20
+        }
+        self.aggregator = WeatherAggregator(self.thresholds)
+        self.weather = StageWeather(
+            today=WeatherData(points=[
+                punkt(10, regen_mm=1, regen_prob=10, gewitter=5, wind=12),
+                punkt(15, regen_mm=6, regen_prob=70, gewitter=45, wind=35, temp=11)
+            ]),
+            tomorrow=WeatherData(points=[
+                punkt(9, tag=2, regen_mm=3, regen_prob=30, gewitter=25),
+                punkt(16, tag=2, regen_mm=4, regen_prob=60, gewitter=55, feels_like=33)
+            ]),
+            day_after_tomorrow=WeatherData(points=[
+                punkt(14, tag=3, gewitter=40)
+            ])
+        )
+
+    def test_all_modes_match_single_modes(self):
+        """aggregate_all_modes liefert dieselben Berichte wie die Einzelaufrufe"""
+        date = datetime(2025, 6, 1)
+        reports = self.aggregator.aggregate_all_modes("E1 Ortu", date, self.weather)
+        self.assertEqual(
+            reports[ReportMode.EVENING],
+            self.aggregator.aggregate_evening_report("E1 Ortu", date, self.weather)
+        )
+        self.assertEqual(
+            reports[ReportMode.MORNING],
+            self.aggregator.aggregate_morning_report("E1 Ortu", date, self.weather)
+        )
+        self.assertEqual(
+            reports[ReportMode.DAY],
+            self.aggregator.aggregate_day_warning("E1 Ortu", date, self.weather)
+        )
+
+    def test_evening_report_values(self):
+        """Abendbericht: Nacht vom letzten Punkt heute, Risiken von morgen, Gewitter +1 von übermorgen"""
+        report = self.aggregator.aggregate_evening_report("E1 Ortu", datetime(2025, 6, 1), self.weather)
+        self.assertEqual(report.night_temperature, 11)
+        self.assertEqual(report.max_feels_like, 33)
+        self.assertEqual(report.thunder_prob_threshold, 25)
+        self.assertEqual(report.thunder_prob_time_threshold, "09:00")
+        self.assertEqual(report.thunder_prob_max, 55)
+        self.assertEqual(report.thunderstorm_plus1, 40)
+
+    def test_day_warning_none_when_calm(self):
+        """Ohne Schwellenüberschreitung gibt es keine Tageswarnung"""
+        calm = StageWeather(today=WeatherData(points=[punkt(12)]))
+        reports = self.aggregator.aggregate_all_modes("E1 Ortu", datetime(2025, 6, 1), calm)
+        self.assertIsNone(reports[ReportMode.DAY])
+        self.assertEqual(reports[ReportMode.MORNING].max_wind_speed, 10)
+
+    def test_split_by_day(self):
+        """Ein mehrtägiger Datensatz wird nach Kalendertagen aufgeteilt"""
+        data = WeatherData(points=self.weather.today.points + self.weather.tomorrow.points)
+        days = data.split_by_day()
+        self.assertEqual(len(days), 2)
+        self.assertEqual(len(days[datetime(2025, 6, 2).date()].points), 2)
+
+
+class TestRollingMetrics(unittest.TestCase):
+    def test_rolling_functions_match_naive(self):
+        """Präfixsummen liefern dieselben Werte wie die naive Berechnung"""
+        values = [0.5, 3, None, 7, 1, 0, 4, 4, 2, 9, 0, 1]
+        for window in (1, 3, 6):
+            windows = [
+                [v or 0 for v in values[i:i + window]]
+                for i in range(len(values) - window + 1)
+            ]
+            self.assertEqual(rolling_sum(values, window), [sum(w) for w in windows])
+            for got, expected in zip(rolling_mean(values, window), windows):
+                self.assertAlmostEqual(got, sum(expected) / window)
+
+    def test_short_series_uses_single_window(self):
+        """Reihen kürzer als das Fenster ergeben ein einziges Fenster"""
+        self.assertEqual(rolling_sum([1, 2], 6), [3])
+        self.assertEqual(rolling_sum([], 3), [])
+
+    def test_rolling_metrics_in_report(self):
+        """Regensumme 3h und Dauerwind werden je Standort berechnet und bewertet"""
+        thresholds = {"regen": 25, "gewitter": 20, "wind": 40, "regen_3h": 5, "wind_3h": 30}
+        aggregator = WeatherAggregator(thresholds)
+        today = WeatherData(points=[
+            punkt(h, regen_mm=mm, wind=w)
+            for h, mm, w in [(9, 0, 10), (10, 2, 25), (11, 2, 35), (12, 2, 35), (13, 0, 10)]
+        ])
+        report = aggregator.aggregate_day_warning("E1 Ortu", datetime(2025, 6, 1), StageWeather(today=today))
+        self.assertIsNotNone(report)
+        self.assertEqual(report.rolling_metrics["regen_3h"]["value"], 6)
+        self.assertEqual(report.rolling_metrics["regen_3h"]["time"], "12:00")
+        self.assertTrue(report.rolling_metrics["regen_3h"]["exceeded"])
+        self.assertAlmostEqual(report.rolling_metrics["wind_3h"]["value"], 31.7)
+        self.assertTrue(report.rolling_metrics["wind_3h"]["exceeded"])
+
+    def test_exceeded_rolling_metrics_are_rendered(self):
+        """Überschrittene gleitende Kennzahlen erscheinen mit Wert und Fensterende in jedem Modus"""
+        thresholds = {"regen": 25, "regenmenge": 2, "gewitter": 20, "wind": 20, "hitze": 32, "regen_3h": 5, "wind_3h": 30}
+        aggregator = WeatherAggregator(thresholds)
+        generator = ReportGenerator(thresholds)
+        today = WeatherData(points=[punkt(h, regen_mm=1.9) for h in (13, 14, 15)])
+        weather = StageWeather(today=today, tomorrow=today)
+        reports = [
+            aggregator.aggregate_day_warning("E1 Ortu", datetime(2025, 6, 1), weather),
+            aggregator.aggregate_morning_report("E1 Ortu", datetime(2025, 6, 1), weather),
+            aggregator.aggregate_evening_report("E1 Ortu", datetime(2025, 6, 1), weather),
+        ]
+        for report in reports:
+            text = generator.generate_report(report)
+            self.assertIn("Regen 3h: 5.7mm bis 15:00", text)
+            self.assertNotIn("Wind 3h", text)
+
+
+
+def ensemble(members, hours=24, lat=42.5, lon=8.9, **fixed):
+    """Erzeugt ein Ensemble, in dem Member i den Wert fixed[var][i] zur Mittagsstunde hat"""
+    times = [datetime(2025, 6, 1) + timedelta(hours=h) for h in range(hours)]
+    matrices = {}
+    for var in ("precipitation", "wind_speed", "feels_like"):
+        peaks = fixed.get(var, [0] * members)
+        matrices[var] = [[peaks[m] if h == 12 else 0 for h in range(hours)] for m in range(members)]
+    return EnsembleData(latitude=lat, longitude=lon, times=times, members=matrices)
+
+
+class TestEnsemble(unittest.TestCase):
+    def setUp(self):
+        self.aggregator = WeatherAggregator({"regen": 25, "regenmenge": 2, "gewitter": 20, "wind": 20, "hitze": 32})
+
+    def test_probabilities_over_points(self):
+        """Ein Member zählt, wenn er an irgendeinem Punkt die Schwelle erreicht"""
+        a = ensemble(4, precipitation=[0, 3, 0, 0], wind_speed=[25, 0, 0, 0])
+        b = ensemble(4, precipitation=[0, 0, 2, 1], feels_like=[20, 20, 20, 20])
+        result = self.aggregator.aggregate_ensemble([a, b])
+        self.assertEqual(result, {"regen": 0.5, "wind": 0.25, "hitze": 0.0})
+
+    def test_ensemble_attached_to_report(self):
+        """Ensemble-Wahrscheinlichkeiten landen im Bericht des jeweiligen Tages"""
+        today = WeatherData(points=[punkt(12)], ensemble=[ensemble(2, wind_speed=[30, 10])])
+        report = self.aggregator.aggregate_morning_report("E1 Ortu", datetime(2025, 6, 1), StageWeather(today=today))
+        self.assertEqual(report.ensemble_probabilities["wind"], 0.5)
+
+    def test_parse_ensemble_response(self):
+        """Kontrolllauf und Member-Spalten werden zu einer Matrix zusammengefasst"""
+        response = {
+            "hourly": {
+                "time": ["2025-06-01T00:00", "2025-06-02T00:00"],
+                "precipitation": [0.0, 1.0],
+                "precipitation_member01": [0.5, None],
+                "precipitation_member02": [2.0, 0.0],
+                "wind_speed_10m": [10, 12],
+                "wind_speed_10m_member01": [11, 14],
+            }
+        }
+        data = WeatherAPIClient()._parse_ensemble(response, 42.5, 8.9)
+        self.assertEqual(data.member_count(), 3)
+        self.assertEqual(data.members["precipitation"][2], [2.0, 0.0])
+        days = data.split_by_day()
+        self.assertEqual(days[datetime(2025, 6, 2).date()].members["wind_speed"], [[12], [14]])
+
+    def ensembles_50_members_72_hours_10_points(self):
+        """50 Member × 72 Stunden × 10 Punkte mit Zufallswerten"""
+        rnd = random.Random(7)
+        times = [datetime(2025, 6, 1) + timedelta(hours=h) for h in range(72)]
+        return [
+            EnsembleData(42.5, 8.9, times, {
+                var: [[rnd.uniform(0, 40) for _ in range(72)] for _ in range(50)]
+                for var in ("precipitation", "wind_speed", "feels_like")
+            })
+            for _ in range(10)
+        ]
+
+    def test_50_members_72_hours_10_points(self):
+        """Große Ensembles liefern eine Wahrscheinlichkeit je Risiko"""
+        result = self.aggregator.aggregate_ensemble(self.ensembles_50_members_72_hours_10_points())
+        self.assertEqual(set(result), {"regen", "wind", "hitze"})
+
+    @unittest.skipUnless(os.environ.get("PERF_TESTS"), "Zeitmessung nur mit PERF_TESTS=1 (auf ausgelasteten Rechnern unzuverlässig)")
+    def test_performance_50_members_72_hours_10_points(self):
+        """50 Member × 72 Stunden × 10 Punkte bleiben deutlich unter 100 ms"""
+        ensembles = self.ensembles_50_members_72_hours_10_points()
+        start = time.perf_counter()
+        self.aggregator.aggregate_ensemble(ensembles)
+        self.assertLess(time.perf_counter() - start, 0.1)
+
+
+FIXTURE_MULTIMODEL = os.path.join(os.path.dirname(__file__), "testdaten_multimodel.json")
+
+
+class TestModelComparison(unittest.TestCase):
+    def setUp(self):
+        self.thresholds = {"regen": 25, "regenmenge": 2, "gewitter": 20, "wind": 20, "hitze": 32}
+        self.aggregator = WeatherAggregator(self.thresholds)
+        with open(FIXTURE_MULTIMODEL) as f:
+            response = json.load(f)
+        client = WeatherAPIClient()
+        with patch.object(WeatherAPIClient, "_make_request", return_value=response) as request:
+            self.data = client.get_multi_model(42.5, 8.9, datetime(2025, 6, 17), datetime(2025, 6, 17))
+        self.params = request.call_args[0][0]
+
+    def test_models_requested_in_one_call(self):
+        """Alle Modelle werden mit einer Anfrage geholt und je Variable getrennt geparst"""
+        self.assertEqual(self.params["models"], "icon_seamless,meteofrance_seamless,ecmwf_ifs025")
+        self.assertEqual(self.data.models(), list(WeatherAPIClient.DEFAULT_MODELS))
+        self.assertEqual(len(self.data.values["precipitation"]["ecmwf_ifs025"]), 24)
+
+    def test_spread_and_agreement(self):
+        """Streuung relativ zur Schwelle ergibt die Übereinstimmung je Variable"""
+        comparison = self.aggregator.compare_models([self.data])
+        self.assertEqual(comparison["precipitation"]["models"]["meteofrance_seamless"], 4.1)
+        self.assertEqual(comparison["precipitation"]["spread"], 2.3)
+        self.assertEqual(comparison["precipitation"]["agreement"], "niedrig")
+        self.assertEqual(comparison["wind_speed"]["agreement"], "mittel")
+        self.assertEqual(comparison["feels_like"]["agreement"], "hoch")
+
+    def test_confidence_marker_in_inreach(self):
+        """Die InReach-Zeile endet mit der schlechtesten Modellübereinstimmung"""
+        today = WeatherData(points=[punkt(12)], models=[self.data])
+        report = self.aggregator.aggregate_morning_report("E1 Ortu", datetime(2025, 6, 17), StageWeather(today=today))
+        self.assertEqual(report.model_confidence, "niedrig")
+        self.assertTrue(ReportGenerator(self.thresholds).generate_inreach(report).endswith("| Konf niedrig"))
+
+
+class TestDaySnapshot(unittest.TestCase):
+    def setUp(self):
+        self.thresholds = {"regen": 25, "regenmenge": 2, "gewitter": 20, "delta_prozent": 20, "hitze": 32, "wind": 20}
+        self.aggregator = WeatherAggregator(self.thresholds)
+        self.morning = WeatherData(points=[punkt(h, regen_prob=10, gewitter=30, wind=12) for h in range(6, 20)])
+        self.snapshot = ForecastSnapshot.from_weather("E1 Ortu", datetime(2025, 6, 1), self.morning)
+
+    def day(self, changes):
+        """Morgendaten mit geänderten Stunden {stunde: punkt-Argumente}"""
+        return StageWeather(today=WeatherData(points=[
+            punkt(h, **changes.get(h, {"regen_prob": 10, "gewitter": 30, "wind": 12})) for h in range(6, 20)
+        ]))
+
+    def test_unchanged_forecast_no_warning(self):
+        """Unveränderte Vorhersage: keine Warnung, obwohl Gewitter über der Schwelle liegt"""
+        self.assertIsNone(self.aggregator.aggregate_day_warning("E1 Ortu", datetime(2025, 6, 1), self.day({}), self.snapshot))
+        self.assertEqual(self.snapshot.diff(self.morning), {})
+
+    def test_only_changed_hours_are_compared(self):
+        """Nur geänderte Stunden und Felder erscheinen im Vergleich"""
+        diff = self.snapshot.diff(self.day({15: {"regen_prob": 15, "gewitter": 30, "wind": 12}}).today)
+        self.assertEqual(diff, {"42.5000,8.9000": {"15:00": {"rain_probability": (10, 15)}}})
+
+    def test_significant_increase_warns(self):
+        """Anstieg um delta_prozent oder neue Schwellenüberschreitung löst die Warnung aus"""
+        weather = self.day({14: {"regen_prob": 10, "gewitter": 55, "wind": 12}})
+        report = self.aggregator.aggregate_day_warning("E1 Ortu", datetime(2025, 6, 1), weather, self.snapshot)
+        self.assertEqual(report.deltas, {"thunderstorm_probability": 25})
+        self.assertIn("Gewitterwahrscheinlichkeit: +25%", ReportGenerator(self.thresholds).generate_report(report))
+        windy = self.day({16: {"regen_prob": 10, "gewitter": 30, "wind": 22}})
+        self.assertIsNotNone(self.aggregator.aggregate_day_warning("E1 Ortu", datetime(2025, 6, 1), windy, self.snapshot))
+
+    def test_snapshot_roundtrip(self):
+        """Gespeicherte Snapshots vergleichen sich wie frisch erzeugte"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f"{tmp}/snap.json"
+            self.snapshot.save(path)
+            loaded = ForecastSnapshot.load(path)
+        self.assertEqual(loaded.diff(self.morning), {})
+        self.assertIsNone(ForecastSnapshot.load(f"{tmp}/fehlt.json"))
+
+    def test_prune_keeps_recent_days(self):
+        """Nach dem Speichern bleiben nur die Snapshots von heute und gestern"""
+        with tempfile.TemporaryDirectory() as tmp:
+            for day in (1, 5, 6):
+                self.snapshot.save(snapshot_path("E1 Ortu", datetime(2025, 6, day), tmp))
+            self.assertEqual(prune_snapshots(tmp, today=datetime(2025, 6, 6).date()), 1)
+            self.assertEqual(sorted(os.listdir(tmp)), ["2025-06-05_E1_Ortu.json", "2025-06-06_E1_Ortu.json"])
+
+    def test_berechne_delta_fields(self):
+        """Der Legacy-Vergleich kann mehrere Felder je Punkt auswerten"""
+        alt = [{"regen": 10, "gewitter": 20}]
+        neu = [{"regen": 30, "gewitter": 15}]
+        self.assertEqual(berechne_delta(alt, neu), [20])
+        self.assertEqual(berechne_delta(alt, neu, ["regen", "gewitter"]), [{"regen": 20, "gewitter": -5}])
+
+
+class TestWarningState(unittest.TestCase):
+    def setUp(self):
+        self.thresholds = {"regen": 25, "regenmenge": 2, "gewitter": 20, "delta_prozent": 20, "hitze": 32, "wind": 20}
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = f"{self.tmp.name}/state.json"
+        self.day = datetime(2025, 6, 1).date()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def sends(self, state, values):
+        return [bool(state.decide({"gewitter": v}, self.day)) for v in values]
+
+    def test_hysteresis_suppresses_flapping(self):
+        """Werte um die Schwelle melden nur einmal, erst unter dem Band wieder neu"""
+        state = WarningState(self.thresholds, self.path, daily_budget=10)
+        self.assertEqual(self.sends(state, [21, 19, 21, 18.5, 22]), [True, False, False, False, False])
+        self.assertEqual(self.sends(state, [17, 21]), [False, True])
+
+    def test_change_by_delta_prozent_sends(self):
+        """Ein aktives Risiko meldet erneut, wenn es sich um mehr als delta_prozent ändert"""
+        state = WarningState(self.thresholds, self.path, daily_budget=10)
+        self.assertEqual(self.sends(state, [30, 45, 55]), [True, False, True])
+
+    def test_daily_budget_and_persistence(self):
+        """Das Tagesbudget gilt über Läufe hinweg und wird am nächsten Tag zurückgesetzt"""
+        state = WarningState(self.thresholds, self.path, daily_budget=1)
+        self.assertTrue(state.decide({"gewitter": 30}, self.day))
+        state.save()
+        reloaded = WarningState.load(self.thresholds, self.path, daily_budget=1)
+        self.assertFalse(reloaded.decide({"gewitter": 30, "wind": 40}, self.day))
+        self.assertTrue(reloaded.decide({"wind": 40}, datetime(2025, 6, 2).date()))
+
+    def test_day_warning_uses_state(self):
+        """aggregate_day_warning unterdrückt die zweite, unveränderte Warnung"""
+        aggregator = WeatherAggregator(self.thresholds)
+        weather = StageWeather(today=WeatherData(points=[punkt(14, gewitter=45)]))
+        state = WarningState(self.thresholds, self.path)
+        self.assertIsNotNone(aggregator.aggregate_day_warning("E1 Ortu", datetime(2025, 6, 1, 10), weather, state=state))
+        self.assertIsNone(aggregator.aggregate_day_warning("E1 Ortu", datetime(2025, 6, 1, 11), weather, state=state))
+
+    def test_rolling_metric_warns_with_state(self):
+        """Eine überschrittene gleitende Kennzahl (regen_3h) gilt auch mit Warnzustand als Risiko"""
+        thresholds = dict(self.thresholds, regen_3h=5)
+        aggregator = WeatherAggregator(thresholds)
+        weather = StageWeather(today=WeatherData(points=[punkt(h, regen_mm=1.9) for h in (13, 14, 15)]))
+        state = WarningState(thresholds, self.path)
+        self.assertIsNotNone(aggregator.aggregate_day_warning("E1 Ortu", datetime(2025, 6, 1, 10), weather, state=state))
+        self.assertEqual(state.risks["regen_3h"], {"active": True, "value": 5.7})
+        self.assertIsNone(aggregator.aggregate_day_warning("E1 Ortu", datetime(2025, 6, 1, 11), weather, state=state))
+
+    def test_snapshot_increase_warns_with_state(self):
+        """Ein Anstieg über delta_prozent seit dem Morgenbericht meldet auch unterhalb der Schwelle"""
+        aggregator = WeatherAggregator(self.thresholds)
+        morning = WeatherData(points=[punkt(h) for h in range(6, 20)])
+        snapshot = ForecastSnapshot.from_weather("E1 Ortu", datetime(2025, 6, 1), morning)
+        weather = StageWeather(today=WeatherData(points=[punkt(h, regen_prob=24 if h == 15 else 0) for h in range(6, 20)]))
+        state = WarningState(self.thresholds, self.path)
+        report = aggregator.aggregate_day_warning("E1 Ortu", datetime(2025, 6, 1, 10), weather, snapshot, state)
+        self.assertEqual(report.deltas, {"rain_probability": 24})
+        # Unveränderter Anstieg meldet nicht erneut
+        self.assertIsNone(aggregator.aggregate_day_warning("E1 Ortu", datetime(2025, 6, 1, 11), weather, snapshot, state))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+import unittest
+from src.weather.models import ReportMode
+from src.report.batch import iter_cases, render_batch, write_jsonl, BatchRenderer
+
+TESTDATEN = os.path.join(os.path.dirname(__file__), "testdaten_edgecase.json")
+SCHWELLEN = {"regen": 25, "regenmenge": 2, "gewitter": 20, "delta_prozent": 20, "hitze": 32, "wind": 20}
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        with open(TESTDATEN) as f:
+            self.data = json.load(f)
+        self.temp_dir = tempfile.mkdtemp()
+        self.jsonl = os.path.join(self.temp_dir, "szenarien.jsonl")
+        with open(self.jsonl, "w") as f:
+            for i in range(5):
+                f.write(json.dumps(dict(self.data, id=f"s{i}")) + "\n")
+            f.write("\n")
+            f.write(json.dumps({"today": {"hourly": [{"time": "kaputt"}]}}) + "\n")
+
+    def tearDown(self):
+        os.remove(self.jsonl)
+        os.rmdir(self.temp_dir)
+
+    def test_iter_cases_directory(self):
+        """Im Verzeichnis werden nur Testdaten im StageWeather-Format gelesen"""
+        cases = list(iter_cases(os.path.dirname(__file__)))
+        self.assertIn("testdaten_edgecase.json", [case_id for case_id, _ in cases])
+        self.assertTrue(all("today" in data for _, data in cases))
+
+    def test_iter_cases_jsonl(self):
+        """JSONL: ID aus den Daten, sonst Datei:Zeile; Leerzeilen werden übersprungen"""
+        ids = [case_id for case_id, _ in iter_cases(self.jsonl)]
+        self.assertEqual(ids, ["s0", "s1", "s2", "s3", "s4", f"{self.jsonl}:7"])
+
+    def test_render_all_variants(self):
+        """Alle Modi und Varianten; derselbe Text wie beim Einzelaufruf"""
+        result = BatchRenderer(SCHWELLEN).render(("s0", dict(self.data, etappe={"name": "Etappe 1"})))
+        self.assertEqual(set(result), {"id", "evening", "morning", "day"})
+        self.assertTrue(result["evening"]["long"].startswith("Wetterbericht für Etappe 1 am 17.06.2025"))
+        self.assertTrue(result["morning"]["inreach"].startswith("Etappe 1 | Gewitter"))
+
+    def test_error_does_not_abort(self):
+        """Ein defektes Szenario liefert einen Fehlereintrag, der Rest wird gerendert"""
+        results = list(render_batch(iter_cases(self.jsonl), SCHWELLEN, modes=[ReportMode.DAY], variants=["inreach"]))
+        self.assertEqual(len(results), 6)
+        self.assertIn("error", results[-1])
+        self.assertEqual(set(results[0]["day"]), {"inreach"})
+
+    def test_pool_matches_serial(self):
+        """Worker-Pool liefert dieselben Ergebnisse in Eingabereihenfolge"""
+        serial = list(render_batch(iter_cases(self.jsonl), SCHWELLEN))
+        pooled = list(render_batch(iter_cases(self.jsonl), SCHWELLEN, workers=2, chunk_size=2))
+        self.assertEqual(serial, pooled)
+
+    def test_write_jsonl(self):
+        """Eine Zeile je Szenario, Fehler werden gezählt"""
+        out = tempfile.TemporaryFile("w+")
+        errors = write_jsonl(render_batch(iter_cases(self.jsonl), SCHWELLEN), out)
+        out.seek(0)
+        self.assertEqual(errors, 1)
+        self.assertEqual(len(out.readlines()), 6)
+
+if __name__ == "__main__":
+    unittest.main()
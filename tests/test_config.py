@@ -2,7 +2,11 @@ import unittest
 import os
 import tempfile
 import yaml
+from datetime import date
+from unittest.mock import patch
 from wetter.config import validate_config, lade_konfiguration, ConfigValidationError, ConfigError
+import src.config
+from src.config import ConfigService, ConfigFileError
 
 class TestConfig(unittest.TestCase):
     def setUp(self):
@@ -113,5 +117,56 @@ class TestConfig(unittest.TestCase):
         with self.assertRaises(ConfigError):
             lade_konfiguration(self.config_path)
 
+class TestConfigService(unittest.TestCase):
+    setUp = TestConfig.setUp
+    tearDown = TestConfig.tearDown
+
+    def _schreibe(self, config):
+        with open(self.config_path, 'w') as f:
+            yaml.dump(config, f)
+        # Änderungszeit explizit verschieben, damit die Erkennung nicht von der Dateisystem-Auflösung abhängt
+        st = os.stat(self.config_path)
+        os.utime(self.config_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    def test_liest_nur_einmal(self):
+        """Unveränderte Datei wird nicht erneut geparst"""
+        service = ConfigService(self.config_path)
+        with patch('src.config.lese_yaml', wraps=src.config.lese_yaml) as lesen:
+            first = service.get()
+            second = service.get()
+        self.assertIs(first, second)
+        self.assertEqual(lesen.call_count, 1)
+
+    def test_typisierte_schwellen(self):
+        """Startdatum als date, Schwellen typisiert und als Mapping"""
+        config = ConfigService(self.config_path).get()
+        self.assertEqual(config['startdatum'], date(2024, 3, 10))
+        self.assertEqual(config.schwellen.regen, 50)
+        self.assertIsNone(config.schwellen.regenmenge)
+        self.assertEqual(config['schwellen'].get('wind'), 40)
+
+    def test_unveraenderlich(self):
+        """Die gecachte Konfiguration kann nicht verändert werden"""
+        config = ConfigService(self.config_path).get()
+        with self.assertRaises(TypeError):
+            config['schwellen']['regen'] = 1
+        with self.assertRaises(AttributeError):
+            config.schwellen.regen = 1
+
+    def test_aenderung_wird_erkannt(self):
+        """Nach einer Änderung der Datei wird neu geladen"""
+        service = ConfigService(self.config_path)
+        self.assertEqual(service.get().schwellen.wind, 40)
+        changed = dict(self.valid_config, schwellen=dict(self.valid_config['schwellen'], wind=60, regen_3h=5))
+        self._schreibe(changed)
+        config = service.get()
+        self.assertEqual(config.schwellen.wind, 60)
+        self.assertEqual(dict(config.schwellen.fenster), {'regen_3h': 5})
+
+    def test_fehlende_datei(self):
+        """Fehlende Datei führt zu ConfigFileError"""
+        with self.assertRaises(ConfigFileError):
+            ConfigService(os.path.join(self.temp_dir, 'fehlt.yaml')).get()
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,193 @@
+import argparse
+import os
+import re
+import signal
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from src.daemon import SCHEDULE, CronJob, Scheduler, parse_cron_field
+
+class FakeClock:
+    """Uhr, die beim Warten vorgestellt wird"""
+
+    def __init__(self, start):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def wait(self, seconds):
+        self.now += timedelta(seconds=seconds)
+        return False
+
+class TestCronJob(unittest.TestCase):
+    def test_parse_field(self):
+        """*, */n, Bereiche und Listen"""
+        self.assertEqual(parse_cron_field("*/30", 0, 59), {0, 30})
+        self.assertEqual(parse_cron_field("09-17", 0, 23), set(range(9, 18)))
+        self.assertEqual(parse_cron_field("1,5-7", 0, 23), {1, 5, 6, 7})
+        with self.assertRaises(ValueError):
+            parse_cron_field("60", 0, 59)
+
+    def test_schedule_matches_crontab(self):
+        """Der Zeitplan des Daemons entspricht crontab.txt"""
+        path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "crontab.txt")
+        entries = []
+        with open(path) as f:
+            for line in f:
+                if line.strip() and not line.startswith("#"):
+                    fields = line.split()
+                    mode = re.search(r"--modus (\w+)", line)
+                    task = mode.group(1) if mode else "outbox"
+                    if "--prewarm" in line:
+                        task = f"prewarm:{task}"
+                    entries.append(CronJob(" ".join(fields[:5]), task))
+        # Vorwärm-Jobs sind im Daemon mit Vorlauf notiert, in der Crontab als eigene Zeiten
+        self.assertEqual(self.runs_of_day(entries), self.runs_of_day(SCHEDULE))
+
+    @staticmethod
+    def runs_of_day(jobs):
+        start = datetime(2025, 6, 1)
+        runs = set()
+        for job in jobs:
+            when = job.next_after(start - timedelta(minutes=1))
+            while when < start + timedelta(days=1):
+                runs.add((when, job.task))
+                when = job.next_after(when)
+        return runs
+
+    def test_next_after(self):
+        """Nächste Ausführung der Tageswarnung und des Abendberichts"""
+        day = CronJob("*/30 09-17 * * *", "day")
+        self.assertEqual(day.next_after(datetime(2025, 6, 1, 8, 10)), datetime(2025, 6, 1, 9, 0))
+        self.assertEqual(day.next_after(datetime(2025, 6, 1, 9, 0)), datetime(2025, 6, 1, 9, 30))
+        self.assertEqual(day.next_after(datetime(2025, 6, 1, 17, 30)), datetime(2025, 6, 2, 9, 0))
+        evening = CronJob("0 19 * * *", "evening")
+        self.assertEqual(evening.next_after(datetime(2025, 6, 1, 19, 0, 30)), datetime(2025, 6, 2, 19, 0))
+
+    def test_next_after_with_lead(self):
+        """Vorwärm-Jobs laufen lead Minuten vor dem Bericht, auch über die volle Stunde"""
+        day = CronJob("*/30 09-17 * * *", "prewarm:day", lead=5)
+        self.assertEqual(day.next_after(datetime(2025, 6, 1, 8, 10)), datetime(2025, 6, 1, 8, 55))
+        self.assertEqual(day.next_after(datetime(2025, 6, 1, 8, 55)), datetime(2025, 6, 1, 9, 25))
+        self.assertEqual(day.next_after(datetime(2025, 6, 1, 17, 25)), datetime(2025, 6, 2, 8, 55))
+
+class TestScheduler(unittest.TestCase):
+    def test_runs_like_cron_for_a_day(self):
+        """Ein Tag im Daemon ergibt dieselben Läufe wie die Crontab"""
+        clock = FakeClock(datetime(2025, 6, 1, 0, 0, 10))
+        runs = []
+
+        def handler(job):
+            runs.append((clock.now.strftime("%H:%M"), job.task))
+            if clock.now >= datetime(2025, 6, 1, 23, 55):
+                scheduler.stop()
+
+        jobs = [job for job in SCHEDULE if job.task != "outbox"] + [CronJob("55 23 * * *", "ende")]
+        scheduler = Scheduler(jobs, handler, clock=clock, wait=clock.wait)
+        scheduler.run_forever()
+        reports = [run for run in runs if run[1] in ("morning", "day", "evening")]
+        self.assertEqual(reports[0], ("04:30", "morning"))
+        self.assertEqual(reports[-1], ("19:00", "evening"))
+        self.assertEqual(sum(1 for run in reports if run[1] == "day"), 18)
+        # Vor jedem Bericht genau ein Vorwärmlauf 5 Minuten früher
+        prewarms = [run for run in runs if run[1].startswith("prewarm:")]
+        self.assertEqual(len(prewarms), len(reports))
+        for (prewarm_time, task), (report_time, mode) in zip(prewarms, reports):
+            self.assertEqual(task, f"prewarm:{mode}")
+            lead = datetime.strptime(report_time, "%H:%M") - datetime.strptime(prewarm_time, "%H:%M")
+            self.assertEqual(lead, timedelta(minutes=5))
+
+    def test_failing_job_does_not_stop_daemon(self):
+        """Fehler eines Laufs werden protokolliert, der nächste Lauf findet statt"""
+        clock = FakeClock(datetime(2025, 6, 1, 9, 0, 10))
+        calls = []
+
+        def handler(job):
+            calls.append(clock.now)
+            if len(calls) == 1:
+                raise RuntimeError("API nicht erreichbar")
+            scheduler.stop()
+
+        scheduler = Scheduler([CronJob("*/30 09-17 * * *", "day")], handler, clock=clock, wait=clock.wait)
+        with self.assertLogs("src.daemon", level="ERROR"):
+            scheduler.run_forever()
+        self.assertEqual(len(calls), 2)
+
+    def test_sigterm_stops_gracefully(self):
+        """SIGTERM beendet das Warten sofort und stellt den vorherigen Handler wieder her"""
+        before = signal.getsignal(signal.SIGTERM)
+        scheduler = Scheduler([CronJob("0 19 * * *", "evening")], lambda job: None)
+        threading.Timer(0.2, os.kill, (os.getpid(), signal.SIGTERM)).start()
+        start = time.perf_counter()
+        scheduler.run_forever()
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertTrue(scheduler.stopped)
+        self.assertIs(signal.getsignal(signal.SIGTERM), before)
+
+class TestRunDaemon(unittest.TestCase):
+    def test_outbox_flushed_on_shutdown(self):
+        """Nach dem Ende des Schedulers wird der Postausgang zugestellt"""
+        import src.main
+
+        config = {"smtp": {"host": "localhost"}}
+        with patch.object(src.main.Scheduler, "run_forever") as run_forever, \
+                patch.object(src.main, "lade_config", return_value=config), \
+                patch.object(src.main.Outbox, "flush", return_value=0) as flush:
+            self.assertEqual(src.main.run_daemon(argparse.Namespace(daemon=True, modus=None)), 0)
+        run_forever.assert_called_once()
+        flush.assert_called_once_with(config["smtp"])
+
+    def test_job_runs_report_with_shared_client(self):
+        """Berichtsjobs nutzen denselben API-Client und die aktuelle Konfiguration"""
+        import src.main
+
+        config = {"smtp": {"host": "localhost"}}
+        clients = []
+
+        def run_forever(scheduler):
+            for task in ("day", "day"):
+                scheduler.handler(CronJob("* * * * *", task))
+
+        def run(args, cfg, api_client=None):
+            self.assertEqual(args.modus, "day")
+            self.assertFalse(args.daemon)
+            clients.append(api_client)
+
+        with patch.object(src.main.Scheduler, "run_forever", run_forever), \
+                patch.object(src.main, "lade_config", return_value=config), \
+                patch.object(src.main, "run", side_effect=run), \
+                patch.object(src.main.Outbox, "flush", return_value=0):
+            src.main.run_daemon(argparse.Namespace(daemon=True, modus=None, dry_run=False))
+        self.assertEqual(len(clients), 2)
+        self.assertIs(clients[0], clients[1])
+        self.assertIsNotNone(clients[0].session)
+
+    def test_prewarm_job_uses_refreshing_client(self):
+        """Vorwärm-Jobs rufen immer ab und schreiben in den Cache des Berichtsclients"""
+        import src.main
+
+        config = {"smtp": {"host": "localhost"}}
+        calls = []
+
+        def run_forever(scheduler):
+            scheduler.handler(CronJob("0 19 * * *", "prewarm:evening", lead=5))
+            scheduler.handler(CronJob("0 19 * * *", "evening"))
+
+        with patch.object(src.main.Scheduler, "run_forever", run_forever), \
+                patch.object(src.main, "lade_config", return_value=config), \
+                patch.object(src.main, "prewarm", side_effect=lambda a, c, api_client=None: calls.append((a.modus, api_client))), \
+                patch.object(src.main, "run", side_effect=lambda a, c, api_client=None: calls.append((a.modus, api_client))), \
+                patch.object(src.main.Outbox, "flush", return_value=0):
+            src.main.run_daemon(argparse.Namespace(daemon=True, modus=None, dry_run=False))
+        (prewarm_mode, prewarm_client), (report_mode, report_client) = calls
+        self.assertEqual((prewarm_mode, report_mode), ("evening", "evening"))
+        self.assertEqual(prewarm_client.max_age, 0)
+        self.assertGreater(report_client.max_age, 0)
+        self.assertIs(prewarm_client.cache, report_client.cache)
+
+if __name__ == "__main__":
+    unittest.main()
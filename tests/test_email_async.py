@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+import unittest
+from email import message_from_bytes
+
+from src.email_async import AsyncSMTPTransport
+from src.email_sender import EmailSendError
+from src.smtp_sink import SMTPSink
+
+class TestAsyncSMTPTransport(unittest.TestCase):
+    def setUp(self):
+        """Lokaler SMTP-Empfänger je Test"""
+        self.sink = SMTPSink()
+        self.sink.start()
+        self.config = self.sink.smtp_config()
+
+    def tearDown(self):
+        self.sink.stop()
+
+    def texts(self, to_addr):
+        return [
+            message_from_bytes(m["data"]).get_payload().strip()
+            for m in self.sink.messages if m["to"] == [to_addr]
+        ]
+
+    def test_send_all_reuses_connections(self):
+        """Je Empfänger in Reihenfolge, insgesamt höchstens concurrency Verbindungen"""
+        messages = {f"{name}@example.com": [f"{name} {i}" for i in range(5)] for name in "abcd"}
+
+        async def run():
+            async with AsyncSMTPTransport(self.config, password="x", concurrency=2) as transport:
+                errors = await transport.send_all(messages)
+            return transport, errors
+
+        transport, errors = asyncio.run(run())
+        self.assertEqual(errors, [None] * 4)
+        self.assertEqual(transport.sent, 20)
+        self.assertLessEqual(self.sink.connections, 2)
+        for to_addr, texts in messages.items():
+            self.assertEqual(self.texts(to_addr), texts)
+
+    def test_dot_stuffing(self):
+        """Zeilen mit führendem Punkt kommen unverändert an"""
+        async def run():
+            async with AsyncSMTPTransport(self.config, password="x") as transport:
+                await transport.send(".\n..Punkt", "a@example.com")
+        asyncio.run(run())
+        text, = self.texts("a@example.com")
+        self.assertEqual(text.splitlines(), [".", "..Punkt"])
+
+    def test_reconnect_after_drop(self):
+        """Eine getrennte Leerlaufverbindung wird durch eine neue ersetzt"""
+        async def run():
+            async with AsyncSMTPTransport(self.config, password="x", concurrency=1) as transport:
+                await transport.send("vorher", "a@example.com")
+                self.sink.drop_connections()
+                await transport.send("nachher", "a@example.com")
+            return transport
+        transport = asyncio.run(run())
+        self.assertEqual(transport.connects, 2)
+        self.assertEqual(self.texts("a@example.com"), ["vorher", "nachher"])
+
+    def test_timeout_per_message(self):
+        """Ein hängender Server führt nach dem Timeout zu EmailSendError"""
+        async def run():
+            async def hang(reader, writer):
+                await asyncio.sleep(10)
+            server = await asyncio.start_server(hang, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                config = self.sink.smtp_config(port=port)
+                async with AsyncSMTPTransport(config, password="x", timeout=0.2, max_retries=2) as transport:
+                    start = time.perf_counter()
+                    with self.assertRaises(EmailSendError):
+                        await transport.send("x", "a@example.com")
+                    return time.perf_counter() - start
+            finally:
+                server.close()
+        self.assertLess(asyncio.run(run()), 2)
+
+    def test_overlaps_with_fetch(self):
+        """Der Versand läuft, während die nächste Vorhersage abgerufen wird"""
+        received = threading.Event()
+        original = self.sink._received
+
+        def record(*args):
+            original(*args)
+            received.set()
+        self.sink._received = record
+
+        def fetch():
+            # Kehrt erst zurück, wenn die Nachricht angekommen ist; ohne
+            # Überlappung wartet der Abruf vergeblich und liefert False
+            return received.wait(5)
+
+        async def run():
+            async with AsyncSMTPTransport(self.config, password="x") as transport:
+                versand = asyncio.create_task(transport.send_all({"a@example.com": ["Etappe 1"]}))
+                zugestellt = await asyncio.to_thread(fetch)
+                await versand
+            return zugestellt
+
+        self.assertTrue(asyncio.run(run()))
+        self.assertEqual(self.texts("a@example.com"), ["Etappe 1"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+from datetime import datetime
+
+from generate_etappen_json import (berechne_distanz, berechne_gehzeit, berechne_gehzeiten, erzeuge_etappenpunkte,
+                                   gitterzelle, kilometerpunkte, waehle_wetterpunkte)
+from src.etappen import berechne_ankunftsfenster
+from src.main import beschraenke_auf_ankunft
+from src.weather.models import WeatherPoint, WeatherData, StageWeather, ReportMode
+
+
+def wetterpunkt(lat, stunde, gewitter=0):
+    return WeatherPoint(
+        latitude=lat,
+        longitude=8.9,
+        elevation=1200,
+        time=datetime(2025, 6, 1, stunde, 0),
+        temperature=18,
+        feels_like=16,
+        precipitation=0,
+        thunderstorm_probability=gewitter,
+        wind_speed=10,
+        wind_direction=180,
+        cloud_cover=50
+    )
+
+
+class TestGehzeit(unittest.TestCase):
+    def test_din_33466(self):
+        """Größerer Anteil plus halber kleinerer Anteil"""
+        # 8 km = 2 h horizontal, 600 Hm Aufstieg = 2 h vertikal -> 3 h
+        self.assertAlmostEqual(berechne_gehzeit(8, 600, 0), 3.0)
+        # 4 km = 1 h, 500 Hm Abstieg = 1 h -> 1.5 h
+        self.assertAlmostEqual(berechne_gehzeit(4, 0, 500), 1.5)
+
+    def test_kumulierte_gehzeiten_steigen(self):
+        """Kumulierte Gehzeiten beginnen bei 0 und fallen nie"""
+        punkte = [(42.50, 8.90, 1000), (42.51, 8.90, 1300), (42.52, 8.90, 1100), (42.53, 8.90, 1100)]
+        zeiten = berechne_gehzeiten(punkte)
+        self.assertEqual(zeiten[0], 0.0)
+        self.assertEqual(zeiten, sorted(zeiten))
+
+    def test_etappenpunkte_mit_ankunft(self):
+        """Ausgewählte Punkte tragen Höhe und Ankunftszeit ab der Startzeit"""
+        punkte = [(42.50 + i * 0.01, 8.90, 1000 + i * 100) for i in range(8)]
+        ergebnis = erzeuge_etappenpunkte(punkte, "06:30")
+        # Höchster Punkt (7,8 km, 700 Hm): 2,33 h + 1,94 h / 2 nach DIN -> 3,3 h
+        self.assertEqual(ergebnis[-1]["ele"], 1700)
+        self.assertEqual(ergebnis[-1]["ankunft"], "09:48")
+        self.assertEqual([p["ankunft"] for p in ergebnis], sorted(p["ankunft"] for p in ergebnis))
+
+
+class TestWetterpunktAuswahl(unittest.TestCase):
+    def setUp(self):
+        # 20 km nach Osten mit einem Gipfel bei km 13
+        self.track = [
+            (42.5, 8.9 + i * 0.0025, 1000 + (900 - abs(i - 53) * 15 if abs(i - 53) < 60 else 0))
+            for i in range(82)
+        ]
+
+    def test_jeder_kilometer_abgedeckt(self):
+        """Jeder Trackkilometer liegt höchstens abdeckung_km von einem Wetterpunkt entfernt"""
+        # Bei 0,5 km decken die Zellvertreter nicht alle Kilometer ab
+        for abdeckung_km in (2.0, 0.5):
+            auswahl = waehle_wetterpunkte(self.track, abdeckung_km=abdeckung_km)
+            for marke in kilometerpunkte(self.track):
+                self.assertLessEqual(min(berechne_distanz(marke, p) for p in auswahl), abdeckung_km)
+
+    def test_start_und_ziel_immer_dabei(self):
+        """Start und Ziel (Nachttemperatur) bleiben erhalten, auch unterhalb des Vertreters ihrer Zelle"""
+        # Abstieg zur Hütte: Ziel liegt 700 m unter dem Pass in derselben Zelle
+        track = [(42.5, 8.9 + i * 0.001, 1500 + i * 100) for i in range(8)] + [(42.5, 8.908, 1467)]
+        auswahl = waehle_wetterpunkte(track, abdeckung_km=2.0)
+        self.assertEqual(auswahl[0], track[0])
+        self.assertEqual(auswahl[-1], (42.5, 8.908, 1467))
+        self.assertIn(max(track, key=lambda p: p[2]), auswahl)
+
+    def test_hoechster_punkt_und_wenige_zellen(self):
+        """Der höchste Punkt ist enthalten, jede Zelle höchstens einmal (außer Start und Ziel), deutlich weniger Punkte als Kilometer"""
+        auswahl = waehle_wetterpunkte(self.track, abdeckung_km=2.0)
+        self.assertIn(max(self.track, key=lambda p: p[2]), auswahl)
+        zellen = [gitterzelle(p) for p in auswahl[1:-1]]
+        self.assertEqual(len(zellen), len(set(zellen)))
+        self.assertLess(len(auswahl), len(kilometerpunkte(self.track)) / 2)
+        self.assertEqual(auswahl, sorted(auswahl, key=self.track.index))
+
+
+class TestAnkunftsfenster(unittest.TestCase):
+    def setUp(self):
+        self.etappe = {"punkte": [
+            {"lat": 42.5, "lon": 8.9, "ankunft": "07:00"},
+            {"lat": 42.6, "lon": 8.9, "ankunft": "12:30"},
+            {"lat": 42.7, "lon": 8.9}
+        ]}
+
+    def test_fenster_je_punkt(self):
+        """Fenster in Minuten seit Mitternacht, Punkte ohne Ankunft fehlen"""
+        fenster = berechne_ankunftsfenster(self.etappe, 2)
+        self.assertEqual(fenster, {(42.5, 8.9): (300, 540), (42.6, 8.9): (630, 870)})
+
+    def test_spaetes_gewitter_am_start_zaehlt_nicht(self):
+        """Ein Gewitter um 17 Uhr am Startpunkt fällt aus dem Fenster, am Punkt ohne Ankunft nicht"""
+        tag = WeatherData(points=[
+            wetterpunkt(42.5, 7), wetterpunkt(42.5, 17, gewitter=80),
+            wetterpunkt(42.6, 12, gewitter=30),
+            wetterpunkt(42.7, 17, gewitter=50)
+        ])
+        weather = StageWeather(today=tag)
+        fenster = berechne_ankunftsfenster(self.etappe, 2)
+        morning = beschraenke_auf_ankunft(weather, fenster, ReportMode.MORNING)
+        self.assertEqual(len(morning.today.points), 3)
+        self.assertEqual(morning.today.get_max_values()["thunderstorm_probability"], 50)
+        # Abends bleibt der heutige Tag für die Nachttemperatur vollständig
+        evening = beschraenke_auf_ankunft(weather, fenster, ReportMode.EVENING)
+        self.assertIs(evening.today, tag)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import date
+from src.weather.adapter import create_stage_weather
+from src.weather.models import ReportMode
+from src.weather.fingerprint import input_fingerprint, FingerprintStore
+
+TESTDATEN = os.path.join(os.path.dirname(__file__), "testdaten_edgecase.json")
+SCHWELLEN = {"regen": 25, "gewitter": 20, "delta_prozent": 20, "hitze": 32, "wind": 20}
+
+class TestFingerprint(unittest.TestCase):
+    def setUp(self):
+        with open(TESTDATEN) as f:
+            self.data = json.load(f)
+
+    def _fingerprint(self, data=None, mode=ReportMode.MORNING, thresholds=SCHWELLEN, extra=None):
+        weather = create_stage_weather(data or self.data)
+        return input_fingerprint("Etappe 1", mode, date(2025, 6, 17), weather, thresholds, extra)
+
+    def test_stable(self):
+        """Gleiche Eingaben ergeben denselben Fingerabdruck, auch aus neu erzeugten Objekten"""
+        self.assertEqual(self._fingerprint(), self._fingerprint())
+        self.assertEqual(self._fingerprint(thresholds=dict(reversed(list(SCHWELLEN.items())))), self._fingerprint())
+
+    def test_relevant_changes(self):
+        """Geänderte Stundenwerte, Schwellen, Modus oder Zusatzangaben ändern den Fingerabdruck"""
+        base = self._fingerprint()
+        changed = json.loads(json.dumps(self.data))
+        changed["today"]["hourly"][5]["wind_speed_10m"] += 1
+        self.assertNotEqual(self._fingerprint(data=changed), base)
+        self.assertNotEqual(self._fingerprint(thresholds=dict(SCHWELLEN, wind=30)), base)
+        self.assertNotEqual(self._fingerprint(mode=ReportMode.EVENING), base)
+        self.assertNotEqual(self._fingerprint(extra={"inreach": True}), base)
+
+    def test_irrelevant_day_ignored(self):
+        """Der übernächste Tag geht nur in den Abendbericht ein"""
+        changed = json.loads(json.dumps(self.data))
+        changed["day_after_tomorrow"]["hourly"][0]["thunderstorm_probability"] = 99
+        self.assertEqual(self._fingerprint(data=changed), self._fingerprint())
+        self.assertNotEqual(
+            self._fingerprint(data=changed, mode=ReportMode.EVENING),
+            self._fingerprint(mode=ReportMode.EVENING)
+        )
+
+    def test_store_roundtrip(self):
+        """Gespeicherter Fingerabdruck wird beim nächsten Lauf wiedererkannt"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "data", "fingerprints.json")
+            store = FingerprintStore.load(path)
+            self.assertIsNone(store.matches("Etappe 1", ReportMode.DAY, "abc"))
+            store.record("Etappe 1", ReportMode.DAY, "abc", "Text")
+            loaded = FingerprintStore.load(path)
+            self.assertEqual(loaded.matches("Etappe 1", ReportMode.DAY, "abc")["text"], "Text")
+            self.assertIsNone(loaded.matches("Etappe 1", ReportMode.DAY, "def"))
+            self.assertIsNone(loaded.matches("Etappe 1", ReportMode.MORNING, "abc"))
+
+if __name__ == "__main__":
+    unittest.main()
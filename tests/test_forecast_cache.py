@@ -0,0 +1,147 @@
+import argparse
+import functools
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from src.weather.api import WeatherAPIClient, WeatherAPIRequestError
+from src.weather.forecast_cache import ForecastCache
+
+PARAMS = {"latitude": 42.5, "longitude": 8.9, "hourly": "temperature_2m", "start_date": "2025-06-01"}
+
+def antwort(temperatur=20.0):
+    """Open-Meteo-Antwort für einen Punkt"""
+    return {
+        "latitude": 42.5,
+        "longitude": 8.9,
+        "elevation": 1500.0,
+        "hourly": {
+            "time": ["2025-06-01T10:00"],
+            "temperature_2m": [temperatur],
+            "apparent_temperature": [temperatur - 2],
+            "precipitation": [0.0],
+            "thunderstorm_probability": [0],
+            "windspeed_10m": [10],
+            "winddirection_10m": [180],
+            "cloudcover": [20]
+        }
+    }
+
+def response(data):
+    """requests-Antwort mit JSON-Inhalt"""
+    mock = MagicMock()
+    mock.json.return_value = data
+    return mock
+
+class TestForecastCache(unittest.TestCase):
+    def setUp(self):
+        """Eigenes Cache-Verzeichnis je Test"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = ForecastCache(self.tmpdir, stale_seconds=3600)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def age(self, seconds):
+        """Lässt alle Einträge um seconds altern"""
+        for name in os.listdir(self.tmpdir):
+            path = os.path.join(self.tmpdir, name)
+            with open(path) as f:
+                entry = json.load(f)
+            entry["fetched"] -= seconds
+            with open(path, "w") as f:
+                json.dump(entry, f)
+            os.utime(path, (entry["fetched"],) * 2)
+
+    def test_entry_respects_max_age(self):
+        """Einträge gelten bis max_age und nur für genau dieselbe Anfrage"""
+        self.cache.put(WeatherAPIClient.BASE_URL, PARAMS, antwort())
+        entry = self.cache.get(WeatherAPIClient.BASE_URL, PARAMS, 60)
+        self.assertEqual(entry["data"], antwort())
+        self.assertIsNone(self.cache.get(WeatherAPIClient.BASE_URL, dict(PARAMS, start_date="2025-06-02"), 60))
+        self.assertIsNone(self.cache.get(WeatherAPIClient.ENSEMBLE_URL, PARAMS, 60))
+        self.age(120)
+        self.assertIsNone(self.cache.get(WeatherAPIClient.BASE_URL, PARAMS, 60))
+
+    def test_prune_removes_entries_older_than_stale(self):
+        """prune() entfernt nur Einträge, die auch als Ersatz zu alt sind"""
+        self.cache.put(WeatherAPIClient.BASE_URL, PARAMS, antwort())
+        self.age(7200)
+        self.cache.put(WeatherAPIClient.BASE_URL, dict(PARAMS, start_date="2025-06-02"), antwort())
+        self.assertEqual(self.cache.prune(), 1)
+        self.assertEqual(len(os.listdir(self.tmpdir)), 1)
+
+    def test_fresh_entry_replaces_request(self):
+        """Ein frischer Eintrag ersetzt den Abruf"""
+        client = WeatherAPIClient(cache=self.cache)
+        with patch("requests.get", return_value=response(antwort())) as get:
+            client._make_request(PARAMS)
+            client._make_request(PARAMS)
+        self.assertEqual(get.call_count, 1)
+
+    def test_max_age_zero_always_fetches(self):
+        """Der Vorwärmer (max_age=0) ruft immer ab und aktualisiert den Eintrag"""
+        client = WeatherAPIClient(cache=self.cache, max_age=0)
+        with patch("requests.get", side_effect=[response(antwort(20.0)), response(antwort(25.0))]) as get:
+            client._make_request(PARAMS)
+            client._make_request(PARAMS)
+        self.assertEqual(get.call_count, 2)
+        entry = self.cache.get(WeatherAPIClient.BASE_URL, PARAMS, 60)
+        self.assertEqual(entry["data"]["hourly"]["temperature_2m"], [25.0])
+
+    def test_stale_entry_used_when_api_down(self):
+        """Fällt die API aus, wird ein älterer Eintrag mit Warnung verwendet"""
+        self.cache.put(WeatherAPIClient.BASE_URL, PARAMS, antwort())
+        self.age(1800)
+        client = WeatherAPIClient(cache=self.cache)
+        with patch("requests.get", side_effect=requests.ConnectionError("Netz weg")), \
+                self.assertLogs("src.weather.api", level="WARNING") as logs:
+            data = client._make_request(PARAMS)
+        self.assertEqual(data, antwort())
+        self.assertIn("vor 30 min", logs.output[0])
+
+    def test_api_down_without_usable_entry(self):
+        """Ohne ausreichend aktuellen Eintrag bleibt es beim Fehler"""
+        self.cache.put(WeatherAPIClient.BASE_URL, PARAMS, antwort())
+        self.age(7200)
+        client = WeatherAPIClient(cache=self.cache)
+        with patch("requests.get", side_effect=requests.ConnectionError("Netz weg")):
+            with self.assertRaises(WeatherAPIRequestError):
+                client._make_request(PARAMS)
+
+class TestPrewarm(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_report_after_prewarm_needs_no_network(self):
+        """Nach dem Vorwärmen lädt der Bericht dieselben Daten ohne API-Zugriff"""
+        import src.main
+
+        etappe = {"name": "Etappe 1", "punkte": [{"lat": 42.5, "lon": 8.9, "ele": 1500}]}
+        args = argparse.Namespace(
+            modus="evening", ensemble=False, gitter=None, adaptiv=None, zweistufig=False, modelle=None
+        )
+        cache_factory = functools.partial(ForecastCache, self.tmpdir)
+        with patch.object(src.main, "ForecastCache", cache_factory), \
+                patch.object(src.main, "lade_heutige_etappe", return_value=etappe), \
+                patch("requests.get", return_value=response(antwort())) as get:
+            src.main.prewarm(args, {})
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(len(os.listdir(self.tmpdir)), 1)
+
+        client = WeatherAPIClient(cache=cache_factory())
+        with patch("requests.get", side_effect=requests.ConnectionError("Netz weg")) as get:
+            weather = src.main.lade_wetter(args, {}, etappe, client)
+        get.assert_not_called()
+        self.assertIsNotNone(weather)
+
+if __name__ == "__main__":
+    unittest.main()
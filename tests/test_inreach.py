@@ -0,0 +1,97 @@
+import random
+import re
+import unittest
+from datetime import datetime
+from src.weather.models import WeatherReport, ReportMode
+from src.report.inreach import InReachPacker, INREACH_LIMIT
+
+SCHWELLEN = {"regen": 25, "regenmenge": 2, "gewitter": 20, "delta_prozent": 20, "hitze": 32, "wind": 20}
+
+STAGE_NAMES = [
+    "E1",
+    "Etappe 3",
+    "Etappe 7: Refuge de Petra Piana – Refuge de l'Onda",
+    "Etappe 12: Bergerie de Capannelle nach Refuge de Prati über Bocca di Verdi und Punta della Cappella (GR20 Süd)",
+    "X" * 300,
+]
+VALUES = [None, 0, 3, 25, 49.5, 100, 1234.5]
+TIMES = [None, "06:00", "14:00", "2025-06-17T23:00", "2025-06-17T16:00:00"]
+
+def make_report(rng: random.Random) -> WeatherReport:
+    report = WeatherReport(
+        mode=rng.choice(list(ReportMode)),
+        stage_name=rng.choice(STAGE_NAMES),
+        date=datetime(2025, 6, 17),
+        night_temperature=rng.choice([None, -12.5, 0, 8.3, 17.3]),
+        max_temperature=20,
+        max_feels_like=rng.choice(VALUES),
+        max_precipitation=rng.choice(VALUES),
+        max_thunderstorm_probability=rng.choice(VALUES),
+        max_wind_speed=rng.choice(VALUES),
+        max_cloud_cover=0,
+        next_day_thunderstorm=rng.choice(VALUES),
+        text="",
+        model_confidence=rng.choice([None, "hoch", "mittel", "niedrig"]),
+    )
+    for prefix in ("rain_prob", "rain_amt", "thunder_prob"):
+        setattr(report, f"{prefix}_threshold", rng.choice(VALUES))
+        setattr(report, f"{prefix}_time_threshold", rng.choice(TIMES))
+        setattr(report, f"{prefix}_max", rng.choice(VALUES))
+        setattr(report, f"{prefix}_time_max", rng.choice(TIMES))
+    return report
+
+class TestInReachPacker(unittest.TestCase):
+    def setUp(self):
+        self.packer = InReachPacker(SCHWELLEN)
+
+    def test_corpus_never_exceeds_limit(self):
+        """Zufallskorpus inkl. überlanger Namen und Extremwerte: keine Nachricht über dem Limit"""
+        rng = random.Random(41)
+        for _ in range(5000):
+            report = make_report(rng)
+            messages = self.packer.pack(report)
+            self.assertTrue(messages)
+            for message in messages:
+                self.assertLessEqual(len(message), INREACH_LIMIT, message)
+            if len(messages) > 1:
+                for i, message in enumerate(messages, start=1):
+                    self.assertTrue(message.startswith(f"{i}/{len(messages)} "), message)
+
+    def test_small_limit_splits_with_numbering(self):
+        """Bei kleinem Limit wird nummeriert aufgeteilt, ohne Felder zu verlieren"""
+        rng = random.Random(7)
+        packer = InReachPacker(SCHWELLEN, limit=40)
+        for _ in range(500):
+            report = make_report(rng)
+            report.stage_name = "Etappe 3"
+            messages = packer.pack(report)
+            for message in messages:
+                self.assertLessEqual(len(message), 40, message)
+            if report.model_confidence:
+                self.assertIn(report.model_confidence, " ".join(messages))
+
+    def test_typical_report_single_message(self):
+        """Ein normaler Bericht passt unverkürzt in eine Nachricht"""
+        report = WeatherReport(
+            mode=ReportMode.EVENING, stage_name="Etappe 3", date=datetime(2025, 6, 17),
+            night_temperature=8.3, max_temperature=20, max_feels_like=28, max_precipitation=3,
+            max_thunderstorm_probability=50, max_wind_speed=30, max_cloud_cover=0, next_day_thunderstorm=None, text="",
+            thunder_prob_threshold=35, thunder_prob_time_threshold="14:00", thunder_prob_max=50, thunder_prob_time_max="16:00",
+            rain_prob_threshold=40, rain_prob_time_threshold="13:00", rain_prob_max=40, rain_prob_time_max="13:00",
+        )
+        messages = self.packer.pack(report)
+        self.assertEqual(messages, ["Etappe 3 | Gewitter 35%@14 (50%@16) | Regen 40%@13 | Wind 30km/h | Hitze 28°C | Nacht 8.3°C"])
+
+    def test_highest_risk_first(self):
+        """Das Risiko mit dem größten Abstand zur Schwelle steht vorne"""
+        report = WeatherReport(
+            mode=ReportMode.MORNING, stage_name="Etappe 3", date=datetime(2025, 6, 17),
+            night_temperature=None, max_temperature=20, max_feels_like=20, max_precipitation=0,
+            max_thunderstorm_probability=10, max_wind_speed=60, max_cloud_cover=0, next_day_thunderstorm=None, text="",
+            thunder_prob_threshold=10, thunder_prob_time_threshold="14:00", thunder_prob_max=10, thunder_prob_time_max="14:00",
+        )
+        message = self.packer.pack(report)[0]
+        self.assertTrue(re.match(r"Etappe 3 \| Wind 60km/h \| Hitze 20°C \| Gewitter", message), message)
+
+if __name__ == "__main__":
+    unittest.main()
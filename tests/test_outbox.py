@@ -0,0 +1,125 @@
+import fcntl
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from email import message_from_bytes
+from unittest.mock import patch
+
+from src.email_sender import SMTPSession
+from src.outbox import Outbox
+from src.smtp_sink import SMTPSink
+
+class TestOutbox(unittest.TestCase):
+    def setUp(self):
+        """Leerer Postausgang und lokaler SMTP-Empfänger je Test"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.outbox = Outbox(os.path.join(self.tmpdir, "outbox"), base_delay=60, max_delay=600)
+        self.sink = SMTPSink()
+        self.sink.start()
+        self.config = self.sink.smtp_config()
+        # Port ohne Server: jede Verbindung schlägt sofort fehl
+        self.down = self.sink.smtp_config(port=1)
+
+    def tearDown(self):
+        self.sink.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def texts(self):
+        return [message_from_bytes(m["data"]).get_payload().strip() for m in self.sink.messages]
+
+    def test_flush_delivers_in_order(self):
+        """Nachrichten werden in Ablagereihenfolge über eine Verbindung zugestellt"""
+        for i in range(5):
+            self.outbox.enqueue(f"Nachricht {i}", "a@example.com")
+        self.assertEqual(self.outbox.flush(self.config, password="x"), 5)
+        self.assertEqual(self.texts(), [f"Nachricht {i}" for i in range(5)])
+        self.assertEqual(self.sink.connections, 1)
+        self.assertEqual(len(self.outbox), 0)
+
+    def test_failure_is_not_blocking(self):
+        """Ein Fehlschlag kehrt sofort zurück und lässt die Nachricht liegen"""
+        self.outbox.enqueue("Bericht", "a@example.com")
+        start = time.perf_counter()
+        self.assertEqual(self.outbox.flush(self.down, password="x"), 0)
+        self.assertLess(time.perf_counter() - start, 1)
+        (name, entry), = self.outbox.pending()
+        self.assertEqual(entry["attempts"], 1)
+        self.assertIsNotNone(entry["last_error"])
+
+    def test_exponential_backoff(self):
+        """Die Wartezeit verdoppelt sich je Fehlversuch bis zur Obergrenze"""
+        self.outbox.enqueue("Bericht", "a@example.com")
+        now = time.time()
+        delays = []
+        for _ in range(6):
+            self.outbox.flush(self.down, password="x", now=now)
+            (_, entry), = self.outbox.pending()
+            delays.append(entry["next_attempt"] - now)
+            now = entry["next_attempt"]
+        self.assertEqual(delays, [60, 120, 240, 480, 600, 600])
+
+    def test_retry_waits_for_backoff_and_keeps_order(self):
+        """Vor Ablauf der Wartezeit wird nichts zugestellt, danach alles in Reihenfolge"""
+        self.outbox.enqueue("erste", "a@example.com")
+        now = time.time()
+        self.outbox.flush(self.down, password="x", now=now)
+        self.outbox.enqueue("zweite", "a@example.com")
+        self.assertEqual(self.outbox.flush(self.config, password="x", now=now + 10), 0)
+        self.assertEqual(self.sink.messages, [])
+        self.assertEqual(self.outbox.flush(self.config, password="x", now=now + 61), 2)
+        self.assertEqual(self.texts(), ["erste", "zweite"])
+
+    def test_invalid_address_moves_to_failed(self):
+        """Eine ungültige Adresse blockiert die Warteschlange nicht"""
+        self.outbox.enqueue("kaputt", "keine-adresse")
+        self.outbox.enqueue("gut", "a@example.com")
+        self.assertEqual(self.outbox.flush(self.config, password="x"), 1)
+        self.assertEqual(self.texts(), ["gut"])
+        self.assertEqual(len(os.listdir(os.path.join(self.outbox.path, "failed"))), 1)
+
+    def test_permanent_rejection_moves_to_failed(self):
+        """Ein dauerhaft abgelehnter Empfänger (5xx) blockiert spätere Berichte nicht"""
+        self.sink.reject.add("weg@example.com")
+        self.outbox.enqueue("abgelehnt", "weg@example.com")
+        self.outbox.enqueue("gut", "a@example.com")
+        self.assertEqual(self.outbox.flush(self.config, password="x"), 1)
+        self.assertEqual(self.texts(), ["gut"])
+        self.assertEqual(len(self.outbox), 0)
+        self.assertEqual(len(os.listdir(os.path.join(self.outbox.path, "failed"))), 1)
+
+    def test_dropped_connection_is_rebuilt_within_flush(self):
+        """Trennt der Server die Verbindung, baut flush() sie einmal sofort neu auf"""
+        for i in range(2):
+            self.outbox.enqueue(f"Nachricht {i}", "a@example.com")
+        sends = []
+        original = SMTPSession.send
+
+        def send(session, *args, **kwargs):
+            # Vor der zweiten Nachricht trennt der Server die Leerlauf-Verbindung
+            if sends:
+                self.sink.drop_connections()
+                time.sleep(0.05)
+            sends.append(args)
+            return original(session, *args, **kwargs)
+
+        with patch.object(SMTPSession, "send", send):
+            self.assertEqual(self.outbox.flush(self.config, password="x"), 2)
+        self.assertEqual(self.texts(), ["Nachricht 0", "Nachricht 1"])
+        self.assertEqual(self.sink.connections, 2)
+
+    def test_concurrent_flush_is_skipped(self):
+        """Hält ein anderer Prozess die Sperre, stellt flush() nichts zu"""
+        self.outbox.enqueue("Bericht", "a@example.com")
+        with open(os.path.join(self.outbox.path, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            other = open(os.path.join(self.outbox.path, ".lock"), "w")
+            try:
+                self.assertEqual(Outbox(self.outbox.path).flush(self.config, password="x"), 0)
+            finally:
+                other.close()
+        self.assertEqual(len(self.outbox), 1)
+
+if __name__ == "__main__":
+    unittest.main()
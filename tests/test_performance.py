@@ -1,3 +1,6 @@
+import os
+import subprocess
+import sys
 import unittest
 import time
 from unittest.mock import patch
@@ -5,6 +8,11 @@ import pytest
 from wetter.wetterdaten import hole_wetterdaten
 from wetter.analyse import generiere_wetterbericht
 from wetter.kurztext import generiere_kurznachricht
+from datetime import datetime
+from src.weather.models import WeatherReport, ReportMode
+from src.report.generator import ReportGenerator
+from src.report import templates
+from src import smtp_benchmark
 
 class TestPerformance(unittest.TestCase):
     def setUp(self):
@@ -146,5 +154,130 @@ class TestPerformance(unittest.TestCase):
             self.assertIsNotNone(result)
             self.assertLess(total_time, 5.0)  # Should handle rate limiting in reasonable time
 
+class TestTemplatePerformance(unittest.TestCase):
+    def setUp(self):
+        self.report = WeatherReport(
+            mode=ReportMode.EVENING, stage_name="Etappe 1", date=datetime(2025, 6, 1),
+            night_temperature=12.5, max_temperature=25, max_feels_like=28, max_precipitation=3,
+            max_thunderstorm_probability=40, max_wind_speed=30, max_cloud_cover=50,
+            next_day_thunderstorm=20, text="",
+            rain_prob_threshold=40, rain_prob_time_threshold="11:00", rain_prob_max=70, rain_prob_time_max="15:00",
+            rain_amt_threshold=1.2, rain_amt_time_threshold="12:00", rain_amt_max=3.0, rain_amt_time_max="16:00",
+            thunder_prob_threshold=30, thunder_prob_time_threshold="13:00", thunder_prob_max=40, thunder_prob_time_max="17:00"
+        )
+        self.generator = ReportGenerator({})
+
+    def _reports_per_second(self, render, n=2000):
+        start_time = time.perf_counter()
+        for _ in range(n):
+            render()
+        return n / (time.perf_counter() - start_time)
+
+    def test_precompiled_templates(self):
+        """Vorkompiliertes InReach-Template: gleiche Ausgabe wie frisch kompiliert"""
+        pattern = "{stage} | Gewitter {thunder} | Regen {rain} | Wind {wind} | Hitze {heat} | Nacht {night}"
+        values = vars(self.report)
+        self.assertEqual(templates.Template(pattern, templates._INREACH_FIELDS).render(values), templates.EVENING_INREACH.render(values))
+
+    @unittest.skipUnless(os.environ.get("PERF_TESTS"), "Zeitmessung nur mit PERF_TESTS=1 (auf ausgelasteten Rechnern unzuverlässig)")
+    def test_template_rate(self):
+        """Absoluter Durchsatz des vorkompilierten InReach-Templates"""
+        values = vars(self.report)
+        rate = self._reports_per_second(lambda: templates.EVENING_INREACH.render(values))
+        print(f"\nInReach-Template: {rate:.0f} Berichte/s")
+        self.assertGreater(rate, 10000)
+
+    @unittest.skipUnless(os.environ.get("PERF_TESTS"), "Zeitmessung nur mit PERF_TESTS=1 (auf ausgelasteten Rechnern unzuverlässig)")
+    def test_report_generation_rate(self):
+        """Lang- und Kurztext aller Modi in angemessener Zeit"""
+        def render():
+            self.generator.generate_evening_report_long(self.report)
+            self.generator.generate_morning_report(self.report)
+            self.generator.generate_inreach(self.report)
+        rate = self._reports_per_second(render)
+        print(f"\nBerichtserzeugung: {rate:.0f} Berichte/s")
+        self.assertGreater(rate, 1000)
+
+class TestDeliveryThroughput(unittest.TestCase):
+    """Versand gegen den lokalen SMTP-Empfänger mit simulierter Antwortzeit"""
+
+    def test_percentile(self):
+        """Nearest-Rank-Quantile"""
+        values = [float(i) for i in range(1, 101)]
+        self.assertEqual(smtp_benchmark.percentile(values, 50), 50.0)
+        self.assertEqual(smtp_benchmark.percentile(values, 99), 99.0)
+        self.assertEqual(smtp_benchmark.percentile([], 99), 0.0)
+
+    def test_delivery_variants(self):
+        """Alle Nachrichten kommen an; Verbindungen je Variante"""
+        results = {
+            variant: smtp_benchmark.benchmark(variant, count=20, latency=0.005)
+            for variant in smtp_benchmark.VARIANTS
+        }
+        for result in results.values():
+            self.assertEqual(result["delivered"], 20)
+        self.assertEqual(results["sende_email"]["connections"], 20)
+        self.assertEqual(results["session"]["connections"], 1)
+        # Standard: vier parallele Verbindungen der asynchronen Variante
+        self.assertLessEqual(results["async"]["connections"], 4)
+
+    @unittest.skipUnless(os.environ.get("PERF_TESTS"), "Zeitvergleich nur mit PERF_TESTS=1 (auf ausgelasteten Rechnern unzuverlässig)")
+    def test_reused_connections_are_faster(self):
+        """Nachrichten/s und p50/p99 je Variante; wiederverwendete Verbindungen sind schneller"""
+        results = {
+            variant: smtp_benchmark.benchmark(variant, count=20, latency=0.005)
+            for variant in smtp_benchmark.VARIANTS
+        }
+        print()
+        for result in results.values():
+            print(smtp_benchmark.format_result(result))
+        self.assertGreater(results["session"]["rate"], results["sende_email"]["rate"])
+        self.assertGreater(results["async"]["rate"], results["session"]["rate"])
+
+    def test_failures_are_retried(self):
+        """Abgelehnte Zustellversuche werden wiederholt und gehen nicht verloren"""
+        result = smtp_benchmark.benchmark("session", count=40, fail_rate=0.2, retries=5, seed=1)
+        self.assertEqual(result["delivered"], 40)
+        self.assertGreater(result["connections"], 1)
+
+class TestColdImport(unittest.TestCase):
+    """Importe ohne Konfiguration, .env, Logging-Dateien oder HTTP-Bibliotheken"""
+
+    HEAVY = ("requests", "dotenv", "yaml")
+
+    def _cold_import(self, module):
+        """Importiert ein Modul in einem frischen Interpreter; liefert (Millisekunden, geladene schwere Module, Log-Handler)"""
+        code = (
+            "import logging, sys, time\n"
+            "t = time.perf_counter()\n"
+            f"import {module}\n"
+            "ms = (time.perf_counter() - t) * 1000\n"
+            f"print(ms, ','.join(m for m in {self.HEAVY!r} if m in sys.modules), len(logging.getLogger().handlers))"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=root)
+        env.pop("GMAIL_APP_PW", None)
+        out = subprocess.run([sys.executable, "-c", code], cwd=root, env=env, capture_output=True, text=True, check=True)
+        self.assertEqual(out.stderr, "")
+        ms, heavy, handlers = out.stdout.split(" ")
+        return float(ms), [m for m in heavy.split(",") if m], int(handlers)
+
+    def test_pipeline_modules_import_lightly(self):
+        """Aggregator, Generator und Batch-Rendering laden weder Konfiguration noch requests"""
+        print()
+        for module in ("src.weather.aggregator", "src.report.generator", "src.report.batch", "src.config"):
+            ms, heavy, handlers = self._cold_import(module)
+            print(f"Kaltimport {module}: {ms:.1f} ms")
+            self.assertEqual(heavy, [], module)
+            self.assertEqual(handlers, 0, module)
+
+    def test_entry_points_without_side_effects(self):
+        """Einstiegsmodule laden beim Import keine Konfiguration und richten kein Logging ein"""
+        for module in ("src.main", "wetter.fetch", "wetter.notify"):
+            ms, heavy, handlers = self._cold_import(module)
+            self.assertNotIn("dotenv", heavy, module)
+            self.assertNotIn("yaml", heavy, module)
+            self.assertEqual(handlers, 0, module)
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,136 @@
+import argparse
+import functools
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from src.run_lock import RunLock, RunLockTimeout
+
+class TestRunLock(unittest.TestCase):
+    def setUp(self):
+        """Eigenes Sperrverzeichnis je Test"""
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def lock(self, key="evening", **kwargs):
+        return RunLock(key, directory=self.tmpdir, poll_interval=0.01, **kwargs)
+
+    def hold(self, seconds, result=None, started=None):
+        """Hält die Sperre in einem Thread und veröffentlicht danach ein Ergebnis"""
+        def work():
+            with self.lock() as lock:
+                if started:
+                    started.set()
+                time.sleep(seconds)
+                if result is not None:
+                    lock.publish(result)
+        thread = threading.Thread(target=work)
+        thread.start()
+        return thread
+
+    def test_no_shared_result_without_overlap(self):
+        """Ein früherer, abgeschlossener Lauf wird nicht übernommen"""
+        with self.lock() as lock:
+            lock.publish({"text": "gestern"})
+        with self.lock() as lock:
+            self.assertFalse(lock.waited)
+            self.assertIsNone(lock.shared_result())
+
+    def test_waiter_reuses_result(self):
+        """Der zweite Lauf wartet auf den ersten und übernimmt dessen Bericht"""
+        started = threading.Event()
+        thread = self.hold(0.2, {"text": "Bericht"}, started)
+        started.wait()
+        with self.lock() as lock:
+            self.assertTrue(lock.waited)
+            self.assertEqual(lock.shared_result()["text"], "Bericht")
+        thread.join()
+
+    def test_failed_run_is_not_shared(self):
+        """Schlägt der erste Lauf fehl, rechnet der wartende selbst"""
+        started = threading.Event()
+
+        def fail():
+            with self.assertRaises(RuntimeError):
+                with self.lock():
+                    started.set()
+                    time.sleep(0.1)
+                    raise RuntimeError("API nicht erreichbar")
+        thread = threading.Thread(target=fail)
+        thread.start()
+        started.wait()
+        with self.lock() as lock:
+            self.assertIsNone(lock.shared_result())
+            self.assertIsNone(lock.recovered)
+        thread.join()
+
+    def test_timeout(self):
+        """Wird die Sperre nicht rechtzeitig frei, bricht der Lauf ab"""
+        started = threading.Event()
+        thread = self.hold(0.5, started=started)
+        started.wait()
+        with self.assertRaises(RunLockTimeout):
+            self.lock(timeout=0.1).acquire()
+        thread.join()
+
+    def test_stale_lock_of_dead_process(self):
+        """Die Sperre eines gestorbenen Prozesses wird sofort übernommen und erkannt"""
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = (
+            "import os\n"
+            "from src.run_lock import RunLock\n"
+            f"RunLock('evening', directory={self.tmpdir!r}).acquire()\n"
+            "print(os.getpid(), flush=True)\n"
+            "os._exit(1)\n"
+        )
+        out = subprocess.run([sys.executable, "-c", code], cwd=root, env=dict(os.environ, PYTHONPATH=root),
+                             capture_output=True, text=True, check=False)
+        dead_pid = int(out.stdout)
+        with self.assertLogs("src.run_lock", level="WARNING"):
+            with self.lock(timeout=1) as lock:
+                self.assertFalse(lock.waited)
+                self.assertEqual(lock.recovered["pid"], dead_pid)
+
+    def overlapping_runs(self, *runs):
+        """Startet je args einen Lauf kurz nacheinander; liefert die Anzahl der Berichtsabrufe"""
+        import src.main
+
+        calls = []
+
+        def run_report(args, config, api_client=None):
+            calls.append(threading.get_ident())
+            time.sleep(0.2)
+            return "Abendbericht"
+
+        lock = functools.partial(RunLock, directory=self.tmpdir, poll_interval=0.01)
+        with patch.object(src.main, "RunLock", lock), patch.object(src.main, "run_report", side_effect=run_report), \
+                patch.object(src.main, "lade_heutige_etappe", return_value={"name": "Etappe 1"}):
+            threads = [threading.Thread(target=src.main.run, args=(args, {})) for args in runs]
+            for thread in threads:
+                thread.start()
+                time.sleep(0.05)
+            for thread in threads:
+                thread.join()
+        return len(calls)
+
+    def test_overlapping_runs_send_once(self):
+        """Zwei gleichzeitige Läufe desselben Modus rufen den Bericht nur einmal ab"""
+        args = argparse.Namespace(modus="evening", dry_run=False, inreach=False)
+        self.assertEqual(self.overlapping_runs(args, args), 1)
+
+    def test_runs_with_other_options_do_not_share(self):
+        """Ein Lauf mit anderen Abrufoptionen übernimmt kein fremdes Ergebnis"""
+        cron = argparse.Namespace(modus="evening", dry_run=False, inreach=False, gitter=None)
+        manual = argparse.Namespace(modus="evening", dry_run=False, inreach=False, gitter=0.5)
+        self.assertEqual(self.overlapping_runs(cron, manual), 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import time
+import unittest
+from email import message_from_bytes
+from unittest.mock import patch
+
+from src.email_sender import SMTPSession, EmailRejectedError, EmailSendError, empfaenger, sende_email
+from src.smtp_sink import SMTPSink
+
+class TestSMTPSession(unittest.TestCase):
+    def setUp(self):
+        """Lokaler SMTP-Empfänger je Test"""
+        self.sink = SMTPSink()
+        self.sink.start()
+        self.config = self.sink.smtp_config(to=["a@example.com", "b@example.com"])
+
+    def tearDown(self):
+        self.sink.stop()
+
+    def test_one_connection_for_all_messages(self):
+        """Alle Nachrichten und Empfänger laufen über eine Verbindung"""
+        with SMTPSession(self.config, password="x") as session:
+            for to_addr in empfaenger(self.config):
+                for i in range(3):
+                    session.send(f"Bericht {i}", to_addr)
+        self.assertEqual(session.connects, 1)
+        self.assertEqual(self.sink.connections, 1)
+        self.assertEqual(len(self.sink.messages), 6)
+        msg = message_from_bytes(self.sink.messages[-1]["data"])
+        self.assertEqual(msg["To"], "b@example.com")
+        self.assertEqual(msg.get_payload().strip(), "Bericht 2")
+
+    def test_reconnect_after_drop(self):
+        """Eine vom Server getrennte Verbindung wird ohne Wartezeit neu aufgebaut"""
+        with SMTPSession(self.config, password="x", retry_delay=60) as session:
+            session.send("vorher", "a@example.com")
+            self.sink.drop_connections()
+            start = time.perf_counter()
+            session.send("nachher", "a@example.com")
+            elapsed = time.perf_counter() - start
+        self.assertEqual(session.connects, 2)
+        self.assertEqual(len(self.sink.messages), 2)
+        self.assertLess(elapsed, 5)
+
+    def test_reconnect_does_not_use_up_attempts(self):
+        """Auch mit einem einzigen Versuch wird eine getrennte Verbindung neu aufgebaut"""
+        with SMTPSession(self.config, password="x", max_retries=1) as session:
+            session.send("vorher", "a@example.com")
+            self.sink.drop_connections()
+            session.send("nachher", "a@example.com")
+        self.assertEqual(session.connects, 2)
+        self.assertEqual(len(self.sink.messages), 2)
+
+    def test_permanent_rejection_is_not_retried(self):
+        """Ein 5xx für den Empfänger bricht ohne Wartezeit und Wiederholung ab"""
+        self.sink.reject.add("weg@example.com")
+        with patch("src.email_sender.time.sleep") as sleep:
+            with SMTPSession(self.config, password="x", max_retries=3) as session:
+                with self.assertRaises(EmailRejectedError) as raised:
+                    session.send("x", "weg@example.com")
+        self.assertEqual(raised.exception.code, 550)
+        sleep.assert_not_called()
+        self.assertEqual(session.connects, 1)
+
+    def test_no_sleep_after_last_attempt(self):
+        """Nach dem letzten Fehlversuch wird nicht mehr gewartet"""
+        config = self.sink.smtp_config(port=1)
+        with patch("src.email_sender.time.sleep") as sleep:
+            with self.assertRaises(EmailSendError):
+                SMTPSession(config, password="x", max_retries=3, retry_delay=5).send("x", "a@example.com")
+        self.assertEqual(sleep.call_count, 2)
+
+    def test_sende_email_delivers_to_all_recipients(self):
+        """sende_email beliefert alle Empfänger aus smtp.to"""
+        with patch.dict("os.environ", {"GMAIL_APP_PW": "x"}):
+            sende_email("Bericht", self.config)
+        self.assertEqual([m["to"] for m in self.sink.messages], [["a@example.com"], ["b@example.com"]])
+        self.assertEqual(self.sink.connections, 1)
+
+    def test_connections_per_variant(self):
+        """sende_email baut je Nachricht eine Verbindung auf, eine Sitzung nur eine (Zeiten: src.smtp_benchmark)"""
+        config = self.sink.smtp_config()
+        count = 5
+        with patch.dict("os.environ", {"GMAIL_APP_PW": "x"}):
+            for i in range(count):
+                sende_email(f"Bericht {i}", config)
+            self.assertEqual(self.sink.connections, count)
+            with SMTPSession(config) as session:
+                for i in range(count):
+                    session.send(f"Bericht {i}", config["to"])
+        self.assertEqual(len(self.sink.messages), 2 * count)
+        self.assertEqual(session.connects, 1)
+        self.assertEqual(self.sink.connections, count + 1)
+
+if __name__ == "__main__":
+    unittest.main()
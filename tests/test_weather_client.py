@@ -0,0 +1,299 @@
+import unittest
+from datetime import date, datetime
+from unittest.mock import patch
+
+from src.weather.api import WeatherAPIClient
+from src.etappen import berechne_ankunftsfenster
+from src.main import beschraenke_auf_ankunft
+from src.weather.aggregator import WeatherAggregator
+from src.weather.models import ReportMode, StageWeather, WeatherData, WeatherPoint
+from src.weather.sampling import AdaptiveSampler
+from src.weather.phased import fetch_coarse_to_fine, needs_hourly
+from src.weather.grid import GridLattice, densify_route, distance_km, fetch_route_weather
+
+
+def antwort(elevation=1500.0, temperaturen=(20.0, 22.0)):
+    """Open-Meteo-Antwort für eine Zelle auf Modellhöhe"""
+    return {
+        "latitude": 42.5,
+        "longitude": 8.9,
+        "elevation": elevation,
+        "hourly": {
+            "time": ["2025-06-01T10:00", "2025-06-01T11:00"],
+            "temperature_2m": list(temperaturen),
+            "apparent_temperature": [t - 2 for t in temperaturen],
+            "precipitation": [0.0, 0.4],
+            "thunderstorm_probability": [0, 10],
+            "windspeed_10m": [10, 12],
+            "winddirection_10m": [180, 190],
+            "cloudcover": [20, 40]
+        }
+    }
+
+
+class TestGridCellSharing(unittest.TestCase):
+    def setUp(self):
+        self.client = WeatherAPIClient()
+        self.start = datetime(2025, 6, 1)
+
+    def test_points_in_one_cell_share_request(self):
+        """Punkte derselben Zelle lösen nur eine Anfrage auf Modellhöhe aus"""
+        punkte = [
+            {"lat": 42.5010, "lon": 8.9010, "ele": 1000},
+            {"lat": 42.5020, "lon": 8.9050, "ele": 2500},
+            {"lat": 42.6010, "lon": 8.9010, "ele": 1500},
+        ]
+        with patch.object(WeatherAPIClient, "_make_request", return_value=antwort()) as request:
+            data = self.client.get_weather_for_points(punkte, self.start, self.start)
+        self.assertEqual(request.call_count, 2)
+        self.assertEqual(request.call_args_list[0][0][0]["elevation"], "nan")
+        self.assertEqual(len(data.points), 6)
+
+    def test_lapse_rate_correction(self):
+        """Temperaturen werden mit 0,65 K/100 m auf die Punkthöhe umgerechnet"""
+        punkte = [{"lat": 42.5010, "lon": 8.9010, "ele": 1000}, {"lat": 42.5020, "lon": 8.9050, "ele": 2500}]
+        with patch.object(WeatherAPIClient, "_make_request", return_value=antwort()):
+            data = self.client.get_weather_for_points(punkte, self.start, self.start)
+        hut, pass_ = data.points[0], data.points[2]
+        self.assertEqual(hut.temperature, 23.2)
+        self.assertEqual(hut.feels_like, 21.2)
+        self.assertEqual(pass_.temperature, 13.5)
+        self.assertEqual((pass_.latitude, pass_.elevation), (42.5020, 2500))
+
+    def test_point_without_elevation_uses_terrain_correction(self):
+        """Ohne gespeicherte Höhe korrigiert Open-Meteo auf die Geländehöhe (kein elevation=nan)"""
+        punkte = [{"lat": 42.5010, "lon": 8.9010}, {"lat": 42.5020, "lon": 8.9050}]
+        with patch.object(WeatherAPIClient, "_make_request", return_value=antwort()) as request:
+            data = self.client.get_weather_for_points(punkte, self.start, self.start)
+        self.assertEqual(request.call_count, 2)
+        for call in request.call_args_list:
+            self.assertNotIn("elevation", call[0][0])
+        self.assertEqual(data.points[0].temperature, 20.0)
+        self.assertEqual(data.points[0].elevation, 1500.0)
+
+    def test_batches_request_model_height_only_with_elevations(self):
+        """Gitter- und Tagesabruf fragen nur dann auf Modellhöhe ab, wenn jeder Punkt eine Höhe hat"""
+        coordinates = [(42.5, 8.9)]
+        with patch.object(WeatherAPIClient, "_make_request", return_value=antwort()) as request:
+            self.client.get_weather_batch(coordinates, self.start, self.start, model_elevation=False)
+            self.client.get_weather_batch(coordinates, self.start, self.start)
+        self.assertNotIn("elevation", request.call_args_list[0][0][0])
+        self.assertEqual(request.call_args_list[1][0][0]["elevation"], "nan")
+        punkte = [{"lat": 42.5, "lon": 8.9}]
+        with patch.object(WeatherAPIClient, "get_daily_batch", return_value=[]) as daily:
+            fetch_coarse_to_fine(self.client, punkte, self.start, self.start, {})
+            fetch_coarse_to_fine(self.client, [dict(punkte[0], ele=1200)], self.start, self.start, {})
+        self.assertEqual([call[0][3] for call in daily.call_args_list], [False, True])
+
+
+class TestGridInterpolation(unittest.TestCase):
+    def setUp(self):
+        self.client = WeatherAPIClient()
+        self.start = datetime(2025, 6, 1)
+        self.route = [{"lat": 42.51, "lon": 8.86, "ele": 1500}, {"lat": 42.47, "lon": 8.91, "ele": 1500}]
+
+    def knoten_antworten(self, params):
+        """Batch-Antwort: Regen steigt nach Norden, Wind nach Osten"""
+        lats = [float(v) for v in params["latitude"].split(",")]
+        lons = [float(v) for v in params["longitude"].split(",")]
+        result = []
+        for lat, lon in zip(lats, lons):
+            item = antwort()
+            item["hourly"]["precipitation"] = [round((lat - 42.4) * 100, 2)] * 2
+            item["hourly"]["windspeed_10m"] = [round((lon - 8.8) * 100, 2)] * 2
+            result.append(item)
+        return result
+
+    def test_one_batched_request_for_dense_route(self):
+        """Die verdichtete Route kostet genau eine Anfrage für das ganze Gitter"""
+        route = densify_route(self.route, 0.2)
+        with patch.object(WeatherAPIClient, "_make_request", side_effect=self.knoten_antworten) as request:
+            data = fetch_route_weather(self.client, route, self.start, self.start)
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual(len(data.points), 2 * len(route))
+
+    def test_bilinear_interpolation_is_exact_for_linear_fields(self):
+        """Linear verlaufende Felder werden exakt auf Zwischenpunkte übertragen"""
+        with patch.object(WeatherAPIClient, "_make_request", side_effect=self.knoten_antworten):
+            data = fetch_route_weather(self.client, [{"lat": 42.4875, "lon": 8.8825}], self.start, self.start)
+        self.assertAlmostEqual(data.points[0].precipitation, 8.75)
+        self.assertAlmostEqual(data.points[0].wind_speed, 8.25)
+
+    def test_densify_route(self):
+        """Verdichtete Punkte liegen höchstens step_km auseinander, Ankunft wird interpoliert"""
+        route = [{"lat": 42.5, "lon": 8.9, "ankunft": "07:00"}, {"lat": 42.5, "lon": 8.95, "ankunft": "09:00"}]
+        dense = densify_route(route, 1.0)
+        self.assertEqual(dense[0], route[0])
+        self.assertEqual(dense[-1], route[-1])
+        for a, b in zip(dense, dense[1:]):
+            self.assertLessEqual(distance_km((a["lat"], a["lon"]), (b["lat"], b["lon"])), 1.0)
+        self.assertEqual(dense[len(dense) // 2]["ankunft"][:2], "08")
+
+    def test_lattice_covers_points(self):
+        """Das Gitter umschließt alle Punkte mit mindestens 2x2 Knoten"""
+        lattice = GridLattice.covering([{"lat": 42.51, "lon": 8.86}])
+        self.assertEqual(len(lattice.coordinates()), 4)
+        self.assertLessEqual(lattice.lats[0], 42.51)
+        self.assertGreaterEqual(lattice.lats[-1], 42.51)
+
+
+def gewitterfeld(zentrum, breite=3):
+    """Fetch-Funktion: lokale Gewitterzelle um einen Routenindex"""
+    def fetch(punkt):
+        gewitter = 80 if abs(punkt["index"] - zentrum) <= breite else 0
+        return WeatherData(points=[WeatherPoint(
+            latitude=punkt["lat"], longitude=punkt["lon"], elevation=1500,
+            time=datetime(2025, 6, 1, 14), temperature=20, feels_like=18,
+            precipitation=0, thunderstorm_probability=gewitter,
+            wind_speed=10, wind_direction=180, cloud_cover=50
+        )])
+    return fetch
+
+
+class TestAdaptiveSampler(unittest.TestCase):
+    def setUp(self):
+        self.route = [{"lat": 42.5 + i * 0.001, "lon": 8.9, "index": i} for i in range(61)]
+
+    def test_calm_day_uses_only_initial_points(self):
+        """Ohne Abweichungen bleibt es bei der Startauswahl"""
+        sampler = AdaptiveSampler(gewitterfeld(zentrum=500), budget=20)
+        sampled = sampler.sample(self.route, [0, 30, 60])
+        self.assertEqual(sorted(sampled), [0, 30, 60])
+        self.assertEqual(sampler.requests, 3)
+
+    def test_finds_local_cell_between_sparse_points(self):
+        """Eine Gewitterzelle nahe einem Startpunkt wird durch Verfeinerung eingegrenzt"""
+        sampler = AdaptiveSampler(gewitterfeld(zentrum=33), budget=20)
+        sampled = sampler.sample(self.route, [0, 30, 60])
+        self.assertLessEqual(sampler.requests, 20)
+        hits = [i for i, data in sampled.items() if data.points[0].thunderstorm_probability]
+        self.assertIn(30, hits)
+        self.assertGreater(len(hits), 1)
+        self.assertTrue(all(abs(i - 33) <= 3 for i in hits))
+
+    def test_budget_is_respected(self):
+        """Das Budget begrenzt nur die Mittelpunkte, die Etappenpunkte bleiben alle erhalten"""
+        sampler = AdaptiveSampler(gewitterfeld(zentrum=15, breite=0), budget=2)
+        sampled = sampler.sample(self.route, [0, 15, 30, 45, 60])
+        self.assertEqual(sampler.extra_requests, 2)
+        self.assertEqual(sampler.requests, 7)
+        self.assertTrue({0, 15, 30, 45, 60} <= set(sampled))
+        # Auch ohne Budget fehlt kein Etappenpunkt (z.B. das Ziel)
+        sampled = AdaptiveSampler(gewitterfeld(zentrum=15), budget=0).sample(self.route, [0, 15, 30, 45, 60])
+        self.assertEqual(sorted(sampled), [0, 15, 30, 45, 60])
+
+    def test_midpoints_in_loaded_cells_are_free(self):
+        """Mittelpunkte in bereits geladenen Zellen kosten kein Budget"""
+        # Zellen zu je 20 Routenindizes
+        sampler = AdaptiveSampler(gewitterfeld(zentrum=33), budget=1, request_key=lambda p: p["index"] // 20)
+        sampled = sampler.sample(self.route, [0, 30, 60])
+        self.assertEqual(sampler.extra_requests, 1)
+        self.assertGreater(len(sampled), 4)
+
+    def test_client_shares_cells_between_calls(self):
+        """Geteilte Zellen: ein zweiter Punkt derselben Zelle löst keine Anfrage aus"""
+        client = WeatherAPIClient()
+        cells = {}
+        start = datetime(2025, 6, 1)
+        punkte = [{"lat": 42.5010, "lon": 8.9010, "ele": 1000}, {"lat": 42.5020, "lon": 8.9050, "ele": 2500}]
+        self.assertEqual(client.request_key(punkte[0]), client.request_key(punkte[1]))
+        with patch.object(WeatherAPIClient, "_make_request", return_value=antwort()) as request:
+            for punkt in punkte:
+                client.get_weather_for_points([punkt], start, start, cells=cells)
+        self.assertEqual(request.call_count, 1)
+
+
+def tageswerte(regen=0, wind=10, code=1):
+    """Open-Meteo daily-Antwort eines Punkts für drei Tage, Regenrisiko am 2. Tag"""
+    return {
+        "elevation": 1500.0,
+        "daily": {
+            "time": ["2025-06-01", "2025-06-02", "2025-06-03"],
+            "temperature_2m_max": [22, 23, 21],
+            "temperature_2m_min": [9, 10, 8],
+            "apparent_temperature_max": [21, 22, 20],
+            "apparent_temperature_min": [7, 8, 6],
+            "precipitation_sum": [0, 0.4, 0],
+            "precipitation_probability_max": [5, regen, 5],
+            "wind_speed_10m_max": [wind, wind, wind],
+            "wind_direction_10m_dominant": [180, 180, 180],
+            "weather_code": [1, code, 1]
+        }
+    }
+
+
+class TestCoarseToFine(unittest.TestCase):
+    def setUp(self):
+        # Ohne Gewitterschwelle, siehe test_thunderstorm_threshold_needs_hourly
+        self.thresholds = {"regen": 25, "regenmenge": 2, "wind": 20, "hitze": 32, "regen_3h": 5}
+        self.punkte = [{"lat": 42.5, "lon": 8.9, "ele": 1500}, {"lat": 42.6, "lon": 8.9, "ele": 1500}]
+
+    def test_needs_hourly_near_threshold(self):
+        """Stündlich nur bei Annäherung an eine Schwelle oder Gewittercode"""
+        daily = {"precipitation_probability_max": 10, "precipitation_sum": 0.5, "wind_speed_10m_max": 12}
+        self.assertFalse(needs_hourly(daily, self.thresholds))
+        self.assertTrue(needs_hourly(dict(daily, precipitation_probability_max=20), self.thresholds))
+        self.assertTrue(needs_hourly(dict(daily, wind_speed_10m_max=17), self.thresholds))
+        self.assertTrue(needs_hourly(dict(daily, weather_code=95), self.thresholds))
+
+    def test_thunderstorm_threshold_needs_hourly(self):
+        """Ohne tägliche Gewitterwahrscheinlichkeit wird bei Gewitterschwelle stündlich geladen"""
+        thresholds = dict(self.thresholds, gewitter=20)
+        daily = {"precipitation_probability_max": 10, "precipitation_sum": 0.5, "wind_speed_10m_max": 12, "weather_code": 3}
+        self.assertTrue(needs_hourly(daily, thresholds))
+        self.assertFalse(needs_hourly(dict(daily, thunderstorm_probability_max=5), thresholds))
+        self.assertTrue(needs_hourly(dict(daily, thunderstorm_probability_max=16), thresholds))
+
+    def test_thunderstorm_without_code_is_reported(self):
+        """Hohe Gewitterwahrscheinlichkeit ohne Gewittercode geht nicht verloren"""
+        thresholds = dict(self.thresholds, gewitter=20)
+        def request(params):
+            if "daily" in params:
+                return [tageswerte(code=3)]
+            stunden = antwort()
+            stunden["hourly"]["thunderstorm_probability"] = [10, 40]
+            return stunden
+        with patch.object(WeatherAPIClient, "_make_request", side_effect=request):
+            data = fetch_coarse_to_fine(WeatherAPIClient(), self.punkte[:1], datetime(2025, 6, 1), datetime(2025, 6, 1), thresholds)
+        weather = StageWeather(today=data, tomorrow=WeatherData(points=[]))
+        report = WeatherAggregator(thresholds).aggregate_morning_report("Etappe", datetime(2025, 6, 1), weather)
+        self.assertEqual(report.max_thunderstorm_probability, 40)
+
+    def test_hourly_only_for_critical_point_and_day(self):
+        """Ein Tagesabruf für alle Punkte, Stundenwerte nur für den kritischen Punkt-Tag"""
+        def request(params):
+            if "daily" in params:
+                return [tageswerte(), tageswerte(regen=40)]
+            stunden = antwort()
+            stunden["hourly"]["time"] = ["2025-06-02T10:00", "2025-06-02T11:00"]
+            return stunden
+        with patch.object(WeatherAPIClient, "_make_request", side_effect=request) as mock:
+            data = fetch_coarse_to_fine(WeatherAPIClient(), self.punkte, datetime(2025, 6, 1), datetime(2025, 6, 3), self.thresholds)
+        self.assertEqual(mock.call_count, 2)
+        hourly_params = mock.call_args_list[1][0][0]
+        self.assertEqual((hourly_params["start_date"], hourly_params["end_date"]), ("2025-06-02", "2025-06-02"))
+        # 3 + 2 ruhige Tage zu je 2 Punkten, dazu die Stundenreihe des kritischen Tags
+        self.assertEqual(len(data.points), 5 * 2 + 2)
+        self.assertEqual([p.time.hour for p in data.points if p.latitude == 42.6][2:4], [10, 11])
+        night = [p for p in data.points if p.latitude == 42.5 and p.time.hour == 23]
+        self.assertEqual(night[0].temperature, 9)
+
+    def test_calm_day_survives_arrival_windows(self):
+        """Tageswerte ruhiger Tage fallen nicht aus den Ankunftsfenstern, Bewölkung bleibt unbekannt"""
+        etappe = {"punkte": [dict(self.punkte[0], ankunft="07:00"), dict(self.punkte[1], ankunft="15:30")]}
+        with patch.object(WeatherAPIClient, "_make_request", return_value=[tageswerte(), tageswerte()]):
+            data = fetch_coarse_to_fine(WeatherAPIClient(), etappe["punkte"], datetime(2025, 6, 1), datetime(2025, 6, 3), self.thresholds)
+        days = data.split_by_day()
+        weather = StageWeather(today=days[date(2025, 6, 1)], tomorrow=days[date(2025, 6, 2)])
+        morning = beschraenke_auf_ankunft(weather, berechne_ankunftsfenster(etappe, 2), ReportMode.MORNING)
+        self.assertEqual(len(morning.today.points), 4)
+        self.assertIsNone(morning.today.points[0].cloud_cover)
+        report = WeatherAggregator(self.thresholds).aggregate_morning_report("Etappe", datetime(2025, 6, 1), morning)
+        self.assertEqual(report.max_temperature, 22)
+        self.assertEqual(report.max_feels_like, 21)
+        self.assertEqual(report.max_wind_speed, 10)
+        self.assertIsNone(report.max_cloud_cover)
+
+
+if __name__ == '__main__':
+    unittest.main()
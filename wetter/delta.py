@@ -1,8 +1,16 @@
-def berechne_delta(alt, neu):
+def berechne_delta(alt, neu, felder=None):
     """
-    Vergleicht die Regenwahrscheinlichkeit pro Punkt.
+    Vergleicht die Werte pro Punkt.
+
+    Ohne felder wird wie bisher nur die Regenwahrscheinlichkeit verglichen
+    (Liste von Differenzen), sonst je Punkt ein Dictionary Feld -> Differenz.
     """
-    return [b.get("regen", 0) - a.get("regen", 0) for a, b in zip(alt, neu)]
+    if felder is None:
+        return [b.get("regen", 0) - a.get("regen", 0) for a, b in zip(alt, neu)]
+    return [
+        {feld: (b.get(feld) or 0) - (a.get(feld) or 0) for feld in felder}
+        for a, b in zip(alt, neu)
+    ]
 
 
 def delta_warnung(alt, neu, schwelle, etappenname):
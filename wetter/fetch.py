@@ -6,7 +6,7 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 import requests
-from src.config import config
+from src.config import get_config
 
 logger = logging.getLogger(__name__)
 
@@ -196,6 +196,7 @@ def hole_wetterdaten(punkte: List[Dict[str, float]], modus: str = "tag") -> Dict
     wind_values = [d["daily"]["wind_speed_10m_max"][0] for d in alle_daten if d["daily"]["wind_speed_10m_max"][0] is not None]
     gewitter_values = [max(d["hourly"]["thunderstorm_probability"]) for d in alle_daten if d["hourly"]["thunderstorm_probability"] and all(x is not None for x in d["hourly"]["thunderstorm_probability"])]
     # Schwellenwerte aus config
+    config = get_config()
     regen_schwelle = config["schwellen"]["regen"]
     gewitter_schwelle = config["schwellen"]["gewitter"]
     # Frühester Zeitpunkt, an dem überhaupt Regen/Gewitter möglich ist (über alle Punkte)
@@ -2,34 +2,35 @@ import os
 import smtplib
 from email.message import EmailMessage
 
-import yaml
-from dotenv import load_dotenv
+from src.config import config_service
 
-# .env mit sensiblen Zugangsdaten laden
-load_dotenv(".credentials.env")
 
-# SMTP-Kennwort aus .env
-GMAIL_APP_PW = os.getenv("GMAIL_APP_PW")
+def lade_smtp_einstellungen():
+    """Zugangsdaten aus .credentials.env und SMTP-Daten aus config.yaml, erst beim Versand geladen"""
+    from dotenv import load_dotenv
 
-# Konfiguration aus YAML
-with open("config.yaml") as f:
-    config = yaml.safe_load(f)
-
-SMTP_HOST = config["smtp"]["host"]
-SMTP_PORT = config["smtp"]["port"]
-SMTP_USER = config["smtp"]["user"]
-EMAIL_TO = config["smtp"]["to"]
-EMAIL_SUBJECT = config["smtp"].get("subject", "Wetterwarnung")
+    # .env mit sensiblen Zugangsdaten laden
+    load_dotenv(".credentials.env")
+    smtp = config_service("config.yaml").rohdaten()["smtp"]
+    return {
+        "host": smtp["host"],
+        "port": smtp["port"],
+        "user": smtp["user"],
+        "to": smtp["to"],
+        "subject": smtp.get("subject", "Wetterwarnung"),
+        "password": os.getenv("GMAIL_APP_PW"),
+    }
 
 
 def sende_email(text):
+    smtp_config = lade_smtp_einstellungen()
     msg = EmailMessage()
     msg.set_content(text)
-    msg["Subject"] = EMAIL_SUBJECT
-    msg["From"] = SMTP_USER
-    msg["To"] = EMAIL_TO
+    msg["Subject"] = smtp_config["subject"]
+    msg["From"] = smtp_config["user"]
+    msg["To"] = smtp_config["to"]
 
-    with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as smtp:
+    with smtplib.SMTP(smtp_config["host"], smtp_config["port"]) as smtp:
         smtp.starttls()
-        smtp.login(SMTP_USER, GMAIL_APP_PW)
+        smtp.login(smtp_config["user"], smtp_config["password"])
         smtp.send_message(msg)